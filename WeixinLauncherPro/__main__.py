@@ -0,0 +1,9 @@
+import os
+import sys
+
+# modules import each other as top-level packages (core.*, ui.*), like app.py does
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from cli import main  # noqa: E402
+
+sys.exit(main())
@@ -1,27 +1,23 @@
 import importlib.util
+import multiprocessing
 import sys
-import tkinter as tk
-from tkinter import messagebox
-main
 
 REQUIRED_MODULES = ["psutil", "win32gui", "win32con", "win32process"]
 
 
 def _show_error(msg: str) -> None:
     try:
- main
+        import tkinter as tk
+        from tkinter import messagebox
         root = tk.Tk()
         root.withdraw()
         messagebox.showerror("启动失败", msg)
         root.destroy()
     except Exception:
-
-main
         print(msg, file=sys.stderr)
 
 
 def _environment_ready() -> bool:
-main
     if sys.platform != "win32":
         _show_error("本工具需在 Windows 上运行（依赖 win32 API）。")
         return False
@@ -45,4 +41,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # isolated plugin workers are spawned child processes
     main()
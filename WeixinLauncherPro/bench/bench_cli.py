@@ -0,0 +1,78 @@
+"""CLI startup benchmark: how much a headless call costs compared to the GUI entry.
+
+Usage:
+  python bench/bench_cli.py [--runs 20]
+
+Times fresh interpreter processes (median of N runs):
+  - bare interpreter (floor),
+  - the CLI up to argument parsing (`python -m WeixinLauncherPro --help`),
+  - the CLI modules a launch needs (cli, core.config, core.weixin_launcher, core.arrange),
+  - psutil and pywin32 alone: finding windows needs both, so they are the floor
+    of any list/launch/arrange call (pywin32 is skipped off Windows),
+  - tkinter + ttk alone, a lower bound for anything that goes through app.py.
+It then reports what the CLI path costs on top of that floor, and checks that
+importing the CLI path never pulls in tkinter or plugins.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CLI_IMPORTS = (
+    "import sys; sys.path.insert(0, {root!r}); import cli, core.config, core.arrange\n"
+    "try:\n    import core.weixin_launcher\nexcept ImportError:\n    pass\n"
+    "bad = [m for m in sys.modules if m == 'tkinter' or m.startswith('plugins')]\n"
+    "sys.exit(1 if bad else 0)"
+)
+
+DEPS_IMPORTS = (
+    "import psutil\n"
+    "try:\n    import win32api, win32con, win32gui, win32process\nexcept ImportError:\n    pass"
+)
+
+
+def _median_ms(cmd, runs: int, cwd: str):
+    times = []
+    rc = 0
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        p = subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append((time.perf_counter() - t0) * 1000.0)
+        rc = rc or p.returncode
+    return statistics.median(times), rc
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=20)
+    args = ap.parse_args()
+
+    py = sys.executable
+    parent = os.path.dirname(ROOT)
+    pkg = os.path.basename(ROOT)
+    cases = [
+        ("python -c pass", [py, "-c", "pass"], ROOT),
+        ("cli --help", [py, "-m", pkg, "--help"], parent),
+        ("cli launch imports", [py, "-c", CLI_IMPORTS.format(root=ROOT)], ROOT),
+        ("psutil + pywin32", [py, "-c", DEPS_IMPORTS], ROOT),
+        ("tkinter + ttk only", [py, "-c", "import tkinter, tkinter.ttk"], ROOT),
+    ]
+    print(f"runs: {args.runs}")
+    ms = {}
+    clean = True
+    for name, cmd, cwd in cases:
+        ms[name], rc = _median_ms(cmd, args.runs, cwd)
+        note = "" if rc == 0 else f"  (exit {rc})"
+        clean &= rc == 0 or name != "cli launch imports"
+        print(f"{name:<20}: {ms[name]:8.1f} ms{note}")
+    print(f"cli launch path beyond psutil/pywin32: {ms['cli launch imports'] - ms['psutil + pywin32']:.1f} ms")
+    return 0 if clean else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""Clipboard benchmark: a new Tk interpreter per job fire vs the shared ClipboardService.
+
+Usage:
+  python bench/bench_clipboard.py [--fires 2000]
+
+"before" is what the scheduler action used to do on every fire (create a
+tk.Tk(), set the clipboard, destroy it). "after" sends each fire from a worker
+thread through ClipboardService to an owning loop thread, once with the fake
+backend (pure queue hop) and, when a display is available, with the real Tk
+backend marshalled through root.after().
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.clipboard import ClipboardService, FakeClipboardBackend, TkClipboardBackend  # noqa: E402
+
+
+def bench_legacy(fires: int) -> float:
+    import tkinter as tk
+    t0 = time.perf_counter()
+    for i in range(fires):
+        r = tk.Tk()
+        r.withdraw()
+        r.clipboard_clear()
+        r.clipboard_append(f"msg {i}")
+        r.update()
+        r.destroy()
+    return fires / (time.perf_counter() - t0)
+
+
+def bench_fake(fires: int) -> float:
+    q: "queue.Queue" = queue.Queue()
+
+    def loop():
+        while True:
+            fn = q.get()
+            if fn is None:
+                return
+            fn()
+
+    t = threading.Thread(target=loop, daemon=True)
+    t.start()
+    svc = ClipboardService(FakeClipboardBackend(), post=q.put)
+    t0 = time.perf_counter()
+    for i in range(fires):
+        svc.copy_sync(f"msg {i}")
+    rate = fires / (time.perf_counter() - t0)
+    q.put(None)
+    return rate
+
+
+def bench_tk(fires: int) -> float:
+    import tkinter as tk
+    root = tk.Tk()
+    root.withdraw()
+    svc = ClipboardService(TkClipboardBackend(root), post=lambda fn: root.after(0, fn))
+    result = {}
+
+    def worker():
+        t0 = time.perf_counter()
+        for i in range(fires):
+            svc.copy_sync(f"msg {i}")
+        result["rate"] = fires / (time.perf_counter() - t0)
+
+    t = threading.Thread(target=worker, daemon=True)
+
+    def poll():
+        if t.is_alive():
+            root.after(5, poll)
+        else:
+            root.quit()
+
+    t.start()
+    root.after(5, poll)
+    root.mainloop()
+    root.destroy()
+    return result.get("rate", 0.0)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fires", type=int, default=2000)
+    args = ap.parse_args()
+
+    print(f"fires: {args.fires}")
+    try:
+        n = max(1, min(args.fires, 200))  # interpreters are slow; a sample is enough
+        print(f"before  new Tk() per fire      : {bench_legacy(n):10.1f} fires/s")
+    except Exception as e:
+        print(f"before  new Tk() per fire      : skipped ({e})")
+    print(f"after   service, fake backend  : {bench_fake(args.fires):10.1f} fires/s")
+    try:
+        print(f"after   service, Tk via after(): {bench_tk(args.fires):10.1f} fires/s")
+    except Exception as e:
+        print(f"after   service, Tk via after(): skipped ({e})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Control API load test against the simulated backend.
+
+Usage:
+  python bench/bench_control.py [--clients 8] [--requests 5000] [--depth 1 16]
+
+Starts a ControlServer on localhost backed by SimBackend (20 fake windows),
+then runs C client connections that each send their share of a request mix
+(ping, windows.list, windows.focus, jobs.list, occasional jobs.add/remove) in
+pipelined batches of the given depth. Reports requests/sec and p50/p99
+latency (send of the batch -> arrival of each reply) per depth.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.control import ControlClient, ControlServer, SimBackend, make_handlers  # noqa: E402
+
+
+def _mix(i: int):
+    k = i % 10
+    if k < 3:
+        return ("ping", {})
+    if k < 6:
+        return ("windows.list", {})
+    if k < 8:
+        return ("windows.focus", {"label": f"微信{i % 20 + 1}"})
+    if k == 8:
+        return ("jobs.list", {})
+    if i % 20 == 9:
+        return ("jobs.add", {"job_id": f"j{i}", "action_type": "focus_and_copy",
+                             "trigger": {"type": "interval", "interval": 60}})
+    return ("jobs.remove", {"job_id": f"j{i - 10}"})
+
+
+def run(port: int, token: str, clients: int, total: int, depth: int):
+    per_client = total // clients
+    lat: list = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def client(cid: int):
+        c = ControlClient(port=port, token=token)
+        mine = []
+        sent = 0
+        while sent < per_client:
+            batch = [_mix(cid * per_client + sent + j) for j in range(min(depth, per_client - sent))]
+            t0 = time.perf_counter()
+            stamps = []
+            replies = c.pipeline(batch, on_reply=lambda idx, r: stamps.append(time.perf_counter()))
+            mine.extend(t - t0 for t in stamps)
+            bad = sum(1 for r in replies if not r.get("ok") and "not found" not in str(r.get("error")))
+            sent += len(batch)
+            if bad:
+                with lock:
+                    errors[0] += bad
+        c.close()
+        with lock:
+            lat.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    lat.sort()
+    return {
+        "rps": len(lat) / elapsed,
+        "p50_ms": statistics.median(lat) * 1000.0,
+        "p99_ms": lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000.0,
+        "errors": errors[0],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--requests", type=int, default=5000)
+    ap.add_argument("--depth", type=int, nargs="+", default=[1, 16])
+    args = ap.parse_args()
+
+    token = "bench"
+    srv = ControlServer(make_handlers(SimBackend(windows=20)), token=token)
+    srv.start()
+    port = srv.address[1]
+    print(f"clients: {args.clients}, requests: {args.requests}")
+    for depth in args.depth:
+        r = run(port, token, args.clients, args.requests, depth)
+        print(f"depth {depth:>3}: {r['rps']:10.0f} req/s   p50 {r['p50_ms']:7.2f} ms   "
+              f"p99 {r['p99_ms']:7.2f} ms   errors {r['errors']}")
+    srv.stop()
+
+
+if __name__ == "__main__":
+    main()
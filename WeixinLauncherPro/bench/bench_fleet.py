@@ -0,0 +1,128 @@
+"""Fleet fan-out benchmark with simulated agents on one machine.
+
+Usage:
+  python bench/bench_fleet.py [--agents 40] [--latency-ms 50] [--dead 2] [--stalled 1]
+
+Starts N agents (ControlServer + SimBackend, each op delayed by a random
+0..2x latency), plus agents that are down (nothing listening) and agents that
+accept but never answer. Then times status / push-profiles / launch fan-outs
+at several concurrency limits and checks that every live agent received its
+profile, that a pushed exe_path reaches the agent's running services, that
+a badly typed config batch is rejected without applying any of it and that
+a launch with a long deadline still gives up on an agent that never
+completes the handshake after the short connect timeout.
+"""
+
+import argparse
+import os
+import random
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.control import ControlClient, ControlServer, RemoteError  # noqa: E402
+from core.fleet import AgentAddr, Coordinator, sim_agent_handlers  # noqa: E402
+
+PROFILES = {
+    "tile": {"layout": "tile", "base_rect": {"x": 0, "y": 0, "w": 800, "h": 600}},
+    "cascade": {"layout": "cascade", "cascade_dx": 40, "cascade_dy": 40},
+}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--agents", type=int, default=40)
+    ap.add_argument("--latency-ms", type=float, default=50.0)
+    ap.add_argument("--dead", type=int, default=2)
+    ap.add_argument("--stalled", type=int, default=1)
+    ap.add_argument("--timeout", type=float, default=1.0)
+    args = ap.parse_args()
+
+    rnd = random.Random(1)
+    servers, agents, stalled = [], [], []
+    for i in range(args.agents):
+        token = f"t{i}"
+        srv = ControlServer(sim_agent_handlers(f"pc{i:02d}", latency_ms=rnd.uniform(0, 2 * args.latency_ms)),
+                            token=token)
+        srv.start()
+        servers.append(srv)
+        agents.append(AgentAddr(f"pc{i:02d}", "127.0.0.1", srv.address[1], token, rnd.choice(list(PROFILES))))
+    for i in range(args.dead):
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+        s.close()  # nothing listens here any more
+        agents.append(AgentAddr(f"dead{i}", "127.0.0.1", port))
+    for i in range(args.stalled):
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        s.listen(8)  # accepts connections, never replies
+        stalled.append(s)
+        agents.append(AgentAddr(f"stalled{i}", "127.0.0.1", s.getsockname()[1]))
+
+    print(f"agents: {args.agents} live, {args.dead} down, {args.stalled} stalled; "
+          f"op latency 0..{2 * args.latency_ms:g} ms; timeout {args.timeout:g}s")
+    for conc in (1, 16, 64):
+        coord = Coordinator(agents, concurrency=conc, timeout=args.timeout)
+        t0 = time.perf_counter()
+        st = coord.status()
+        t_status = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        pushed = coord.push_profiles(PROFILES)
+        t_push = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        launched = coord.launch(2, "tile", timeout=args.timeout)
+        t_launch = time.perf_counter() - t0
+        print(f"concurrency {conc:>3}: status {t_status * 1000:7.0f} ms ({st['up']}/{st['agents']} up)   "
+              f"push {t_push * 1000:7.0f} ms ({sum(r.ok for r in pushed)} ok)   "
+              f"launch {t_launch * 1000:7.0f} ms ({sum(r.ok for r in launched)} ok)")
+
+    wrong = 0
+    for a in agents[:args.agents]:
+        c = ControlClient(a.host, a.port, token=a.token)
+        cfg = c.call("config.get")
+        c.close()
+        if cfg["layout"] != PROFILES[a.profile]["layout"]:
+            wrong += 1
+    print(f"profile check: {args.agents - wrong}/{args.agents} agents carry their profile")
+
+    # a pushed exe_path must reach the agent's live services, not just its config
+    a = agents[0]
+    c = ControlClient(a.host, a.port, token=a.token)
+    c.call("config.apply", fields={"exe_path": r"D:\WeChat\WeChat.exe"})
+    reconfigured = "exe_path" in c.call("stats")["reconfigured"]
+    print(f"reconfigure check: exe_path change applied to the agent's services: {reconfigured}")
+
+    # a batch with a badly typed value is rejected as a whole and reported back
+    try:
+        other = "tile" if PROFILES[a.profile]["layout"] == "cascade" else "cascade"
+        c.call("config.apply", fields={"layout": other, "launch_delay_ms": "abc", "idle_trim": 1})
+        rejected = False
+    except RemoteError as e:
+        rejected = True
+        print(f"validation check: rejected ({e})")
+    untouched = c.call("config.get")["layout"] == PROFILES[a.profile]["layout"]
+    c.close()
+    print(f"validation check: bad batch rejected: {rejected}, nothing applied: {untouched}")
+
+    # the launch deadline covers the launch itself, not connecting: a hung handshake fails fast
+    hung = [AgentAddr("hung", "127.0.0.1", stalled[0].getsockname()[1], token="t")] if stalled else []
+    fast = True
+    if hung:
+        t0 = time.perf_counter()
+        r = Coordinator(hung, timeout=args.timeout).launch(1, timeout=30.0)[0]
+        el = time.perf_counter() - t0
+        fast = not r.ok and el < 2 * args.timeout
+        print(f"connect check: hung agent failed after {el:.2f}s with a 30s launch deadline ({r.error}): {fast}")
+
+    for srv in servers:
+        srv.stop()
+    for s in stalled:
+        s.close()
+    return 0 if not wrong and reconfigured and rejected and untouched and fast else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Label stability and lookup cost: positional numbering vs persistent identities.
+
+Usage:
+  python bench/bench_identity.py [--instances 20] [--restarts 200]
+
+Simulates N logged-in instances (one account each). Random instances restart
+(new pid and hwnd; titles flip between "微信" and ""), and every 50 restarts the
+launcher itself restarts (index reloaded from disk). After each step it counts
+labels that now point at a different account than they started with, for the
+old sort-based numbering and for IdentityIndex. Then times resolving a job
+target: linear scan of the window list vs the index lookup. Finally checks
+that slow account probes (open_files() on Windows) run off the registry's
+event thread: a burst of window events doesn't wait for them, and the
+accounts still reach the identities through a later republish.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.identity import IdentityIndex  # noqa: E402
+from core.registry import WINDOW_CREATE, FakeEventSource, WindowRegistry, number_windows, window_sort_key  # noqa: E402
+
+
+def check_background_probe(n: int, probe_ms: float = 100.0) -> bool:
+    desktop = {}
+
+    def slow_account(pid):
+        time.sleep(probe_ms / 1000.0)
+        return f"wxid_{pid}"
+
+    idx = IdentityIndex(None, probe_process=lambda pid: (1.7e9 + pid, 4), probe_account=slow_account)
+    src = FakeEventSource()
+    reg = WindowRegistry(lambda _e, _c: list(desktop.values()),
+                         lambda h, _e, _c: dict(desktop[h]) if h in desktop else None,
+                         src, exe_path="w.exe", number=idx.number)
+    idx.on_account = reg.republish
+    reg.start()
+    t0 = time.perf_counter()
+    for i in range(n):
+        pid = 2000 + i
+        desktop[0x20000 + pid] = {"hwnd": 0x20000 + pid, "pid": pid, "title": "微信", "class": "x"}
+        src.emit(WINDOW_CREATE, 0x20000 + pid)
+    burst = time.perf_counter() - t0
+    deadline = time.monotonic() + n * probe_ms / 1000.0 + 5
+    while time.monotonic() < deadline and not all(i.account for i in idx.identities()):
+        time.sleep(0.02)
+    bound = sum(1 for i in idx.identities() if i.account == f"wxid_{i.pid}")
+    ok = burst < probe_ms / 1000.0 and bound == n
+    print(f"{n} new windows with {probe_ms:g} ms account probes: events applied in {burst * 1000:.1f} ms, "
+          f"accounts bound later {bound}/{n} -> {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--instances", type=int, default=20)
+    ap.add_argument("--restarts", type=int, default=200)
+    args = ap.parse_args()
+
+    rnd = random.Random(5)
+    path = os.path.join(tempfile.mkdtemp(), "identities.json")
+    procs = {}    # pid -> (create_time, ppid, account)
+    windows = []  # {hwnd, pid, title}
+    next_pid = [1000]
+
+    def spawn(account, i):
+        pid = next_pid[0]
+        next_pid[0] += rnd.randint(1, 50)
+        procs[pid] = (time.time() + pid, 4, account)
+        windows.append({"hwnd": 0x10000 + pid, "pid": pid, "title": rnd.choice(["微信", ""]), "class": "x"})
+
+    def make_index():
+        return IdentityIndex(path, probe_process=lambda pid: procs[pid][:2], probe_account=lambda pid: procs[pid][2],
+                             background=False)
+
+    for i in range(args.instances):
+        spawn(f"wxid_{i:03d}", i)
+    idx = make_index()
+    snap = idx.number(sorted((dict(w) for w in windows), key=window_sort_key))
+    owner_id = {w["label"]: procs[w["pid"]][2] for w in snap}
+    owner_pos = {w["label"]: procs[w["pid"]][2] for w in number_windows(sorted((dict(w) for w in windows), key=window_sort_key))}
+
+    wrong_pos = wrong_id = 0
+    checks = 0
+    for step in range(1, args.restarts + 1):
+        victim = rnd.randrange(len(windows))
+        w = windows.pop(victim)
+        account = procs.pop(w["pid"])[2]
+        spawn(account, victim)
+        if step % 50 == 0:
+            idx.save()
+            idx = make_index()
+        ws = sorted((dict(w) for w in windows), key=window_sort_key)
+        pos = number_windows([dict(w) for w in ws])
+        ident = idx.number([dict(w) for w in ws])
+        wrong_pos += sum(1 for w in pos if owner_pos[w["label"]] != procs[w["pid"]][2])
+        wrong_id += sum(1 for w in ident if owner_id[w["label"]] != procs[w["pid"]][2])
+        checks += len(ws)
+
+    print(f"instances: {args.instances}, restarts: {args.restarts} (launcher restarted every 50)")
+    print(f"labels pointing at the wrong account: positional {wrong_pos}/{checks}, identity {wrong_id}/{checks}")
+
+    snap = idx.number(sorted((dict(w) for w in windows), key=window_sort_key))
+    targets = [{"identity": w["identity"], "label": w["label"], "hwnd": w["hwnd"]} for w in snap]
+    rounds = 20000
+
+    def scan(t):
+        for w in snap:
+            if w["hwnd"] == t["hwnd"]:
+                return w["hwnd"]
+        for w in snap:
+            if w["label"] == t["label"]:
+                return w["hwnd"]
+        return None
+
+    t0 = time.perf_counter()
+    for i in range(rounds):
+        scan(targets[i % len(targets)])
+    t_scan = (time.perf_counter() - t0) / rounds
+    t0 = time.perf_counter()
+    for i in range(rounds):
+        idx.resolve(targets[i % len(targets)])
+    t_idx = (time.perf_counter() - t0) / rounds
+    print(f"resolve a job target: list scan {t_scan * 1e6:.2f} us, identity index {t_idx * 1e6:.2f} us")
+    return 0 if check_background_probe(args.instances) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
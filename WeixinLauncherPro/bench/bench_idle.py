@@ -0,0 +1,153 @@
+"""Idle-instance policy simulation on the simulated process backend.
+
+Usage:
+  python bench/bench_idle.py [--instances 30] [--rss-mb 300] [--minutes 30]
+
+N fake WeChat instances of ~rss MB each; the user switches to a random one
+every 20-120 s (simulated clock, 5 s ticks). Runs the policy once in dry-run
+mode (must not touch any process) and once for real, then reports the
+before/after memory totals, native call counts and how long a foreground
+switch takes to restore priority/affinity. Also checks an "elevated"
+instance whose priority/affinity calls are denied: it still gets trimmed,
+is not marked idle, and is retried (with backoff) until the calls succeed.
+Finally checks restores: a failed priority undo doesn't skip the affinity
+undo (and is retried later), and switching the policy to dry-run first
+restores the instances idled under the real one.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.idle import (IdleManager, IdlePolicy, PRIORITY_BELOW_NORMAL, PRIORITY_NORMAL, RETRY_S,  # noqa: E402
+                       SimProcessBackend)
+
+MB = 1024 * 1024
+
+
+def simulate(n: int, rss_mb: int, minutes: float, dry_run: bool):
+    rnd = random.Random(7)
+    be = SimProcessBackend(cpus=8)
+    windows = []
+    for i in range(n):
+        pid = 1000 + i
+        be.add(pid, int(rss_mb * MB * rnd.uniform(0.7, 1.3)))
+        windows.append({"hwnd": 5000 + i, "pid": pid, "label": f"微信{i + 1}"})
+    now = [0.0]
+    fg = [windows[0]["hwnd"]]
+    mgr = IdleManager(be, lambda: windows, IdlePolicy(idle_after_s=120, spread_affinity=True, dry_run=dry_run),
+                      foreground=lambda: fg[0], clock=lambda: now[0])
+    total_before = sum(p.rss for p in be.procs.values())
+    restore_lat = []
+    next_switch = rnd.uniform(20, 120)
+    while now[0] < minutes * 60:
+        if now[0] >= next_switch:
+            w = rnd.choice(windows)
+            fg[0] = w["hwnd"]
+            be.touch(w["pid"])
+            t0 = time.perf_counter()
+            mgr.note_foreground(w["hwnd"])  # what the registry's foreground event does
+            restore_lat.append(time.perf_counter() - t0)
+            p = be.procs[w["pid"]]
+            assert dry_run or (p.priority == PRIORITY_NORMAL and len(p.affinity) == be.cpus), "not restored"
+            next_switch = now[0] + rnd.uniform(20, 120)
+        mgr.tick()
+        now[0] += 5.0
+    rep = mgr.memory_report()
+    return be, rep, total_before, restore_lat, mgr
+
+
+def check_denied() -> bool:
+    be = SimProcessBackend(cpus=8)
+    be.add(1000, 300 * MB)
+    be.denied.add(1000)
+    now = [0.0]
+    logs = []
+    mgr = IdleManager(be, lambda: [{"hwnd": 5000, "pid": 1000, "label": "微信1"}],
+                      IdlePolicy(idle_after_s=120, spread_affinity=True), foreground=lambda: 0,
+                      clock=lambda: now[0], on_log=logs.append)
+    mgr.tick()
+    now[0] = 120.0
+    mgr.tick()
+    trimmed = 1000 in mgr.reports
+    not_idle = not mgr.snapshot()[0]["idle"]
+    now[0] += 5.0
+    calls = be.calls["set_priority"]
+    mgr.tick()  # inside the backoff: no new attempt
+    waited = be.calls["set_priority"] == calls
+    be.denied.clear()  # e.g. the launcher now runs elevated too
+    now[0] = 120.0 + RETRY_S
+    mgr.tick()
+    p = be.procs[1000]
+    applied = mgr.snapshot()[0]["idle"] and p.priority == PRIORITY_BELOW_NORMAL and len(p.affinity) == 1
+    ok = trimmed and not_idle and waited and applied and be.calls["trim"] == 1
+    print(f"denied instance: trimmed anyway {trimmed}, not marked idle {not_idle}, waits for retry {waited}, "
+          f"applied on retry {applied}, trims {be.calls['trim']} -> {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def check_restore() -> bool:
+    be = SimProcessBackend(cpus=8)
+    be.add(1000, 300 * MB)
+    now = [0.0]
+    fg = [0]
+    mgr = IdleManager(be, lambda: [{"hwnd": 5000, "pid": 1000, "label": "微信1"}],
+                      IdlePolicy(idle_after_s=120, spread_affinity=True), foreground=lambda: fg[0],
+                      clock=lambda: now[0])
+    p = be.procs[1000]
+    mgr.tick()
+    now[0] = 120.0
+    mgr.tick()
+    real_set_priority = be.set_priority
+
+    def refuse(pid, level):
+        raise PermissionError("denied")
+
+    be.set_priority = refuse
+    mgr.note_activity(1000)
+    affinity_back = len(p.affinity) == be.cpus
+    be.set_priority = real_set_priority
+    fg[0] = 5000
+    now[0] += 5.0
+    mgr.tick()  # focused again: the priority undo is retried
+    priority_back = p.priority == PRIORITY_NORMAL
+
+    fg[0] = 0
+    now[0] += 120.0
+    mgr.tick()
+    was_idle = p.priority == PRIORITY_BELOW_NORMAL and len(p.affinity) == 1
+    mgr.set_policy(IdlePolicy(idle_after_s=120, spread_affinity=True, dry_run=True))
+    dry_restored = p.priority == PRIORITY_NORMAL and len(p.affinity) == be.cpus
+    ok = affinity_back and priority_back and was_idle and dry_restored
+    print(f"restore: affinity undone despite a failed priority undo {affinity_back}, priority retried "
+          f"{priority_back}; switch to dry-run restores idled instances {dry_restored} -> {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--instances", type=int, default=30)
+    ap.add_argument("--rss-mb", type=int, default=300)
+    ap.add_argument("--minutes", type=float, default=30.0)
+    args = ap.parse_args()
+
+    for dry in (True, False):
+        be, rep, before, lat, mgr = simulate(args.instances, args.rss_mb, args.minutes, dry)
+        mode = "dry-run" if dry else "apply  "
+        lat.sort()
+        p99 = lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1e6 if lat else 0.0
+        print(f"{mode}: start {before // MB} MB -> now {rep['current_rss'] // MB} MB; "
+              f"last trims {rep['before_rss'] // MB} -> {rep['after_rss'] // MB} MB ({rep['trimmed']} instances); "
+              f"calls {be.calls}; actions {len(mgr.actions)}; "
+              f"{len(lat)} switches, restore p99 {p99:.0f} us")
+    ok = check_denied()
+    ok &= check_restore()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Plugin workers: in-process vs isolated (child process) cost and main-loop stalls.
+
+Usage:
+  python bench/bench_isolation.py [--notify 20000] [--calls 2000] [--heavy-n 1000000] [--stall-s 3]
+
+Writes a synthetic worker to a temporary directory and runs it headless
+(fake AppContext: counting logger, real Scheduler, 20 fake window rows),
+once through InProcessWorker and once through IsolatedWorker. Reports:
+
+- per-call overhead of fire-and-forget service calls (log lines: cost
+  inside the worker, and until the host has handled all of them) and of
+  round trips (worker -> windows.list, host -> worker handle());
+- main-loop stall: a 10 ms tick loop on the main thread (standing in for
+  the Tk loop) measures its lateness while the worker runs a scheduled job
+  that sorts a large list every second, i.e. one long C call that holds
+  the GIL, as blocking extension calls do;
+- recovery: time until an isolated worker that crashed (os._exit) or hung
+  (sleeps in a task past hang_s) answers again, and that the crashed
+  worker's scheduler jobs were dropped with it.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import AppConfig  # noqa: E402
+from core.isolation import InProcessWorker, IsolatedWorker, STATE_RUNNING, WorkerError  # noqa: E402
+from core.scheduler import Scheduler  # noqa: E402
+
+WORKER_SRC = '''import os
+import random
+import time
+
+
+class BenchWorker:
+    def start(self, services):
+        self.svc = services
+        self.data = []
+        self.runs = 0
+
+    def _heavy(self):
+        sorted(self.data)  # one C call; holds the GIL throughout
+        self.runs += 1
+
+    def handle(self, method, args):
+        if method == "ping":
+            return args.get("x")
+        if method == "notify":
+            t0 = time.perf_counter()
+            for i in range(args["n"]):
+                self.svc.log.info("tick")
+            return time.perf_counter() - t0
+        if method == "calls":
+            t0 = time.perf_counter()
+            for i in range(args["n"]):
+                self.svc.windows.list()
+            return time.perf_counter() - t0
+        if method == "heavy":
+            self.data = [random.random() for _ in range(args["n"])]
+            self.svc.scheduler.every("heavy", 1, self._heavy)
+            return True
+        if method == "runs":
+            return self.runs
+        if method == "crash":
+            os._exit(3)
+        if method == "hang":
+            time.sleep(3600)
+        raise ValueError(method)
+
+    def stop(self):
+        self.svc.scheduler.remove("heavy")
+
+
+def create_worker():
+    return BenchWorker()
+'''
+
+
+class CountingLog:
+    def __init__(self):
+        self.n = 0
+        self.warnings = []
+
+    def info(self, msg):
+        self.n += 1
+
+    def warn(self, msg):
+        self.warnings.append(msg)
+
+    error = warn
+
+
+def make_ctx():
+    rows = [{"hwnd": 1000 + i, "label": f"微信{i + 1}", "pid": 2000 + i, "title": "微信",
+             "identity": f"inst-{i + 1}"} for i in range(20)]
+    scheduler = Scheduler(lambda m: None, workers=2)
+    scheduler.start()
+    return SimpleNamespace(cfg=AppConfig(), log=CountingLog(), scheduler=scheduler, focus=None,
+                           windows=None, wechat_windows=lambda: rows)
+
+
+def wait_for(cond, timeout: float) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if cond():
+            return True
+        time.sleep(0.001)
+    return cond()
+
+
+def tick_lateness(seconds: float, period: float = 0.010):
+    """Run a fixed-period loop on this thread; lateness of each tick in ms."""
+    late = []
+    nxt = time.perf_counter() + period
+    end = time.perf_counter() + seconds
+    while nxt < end:
+        delay = nxt - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        now = time.perf_counter()
+        late.append(max(0.0, now - nxt) * 1000)
+        nxt = max(nxt + period, now)
+    return late
+
+
+def pct(xs, q):
+    s = sorted(xs)
+    return s[min(len(s) - 1, int(q * len(s)))]
+
+
+def measure(worker, ctx, args) -> dict:
+    out = {}
+    worker.start()
+    worker.call("ping", {"x": 1}, timeout=10.0)  # the child is up
+
+    ctx.log.n = 0
+    t0 = time.perf_counter()
+    inside = worker.call("notify", {"n": args.notify}, timeout=60.0)
+    delivered = wait_for(lambda: ctx.log.n >= args.notify, 30.0)
+    out["notify_us"] = inside / args.notify * 1e6
+    out["notify_done_us"] = (time.perf_counter() - t0) / args.notify * 1e6 if delivered else float("nan")
+
+    el = worker.call("calls", {"n": args.calls}, timeout=60.0)
+    out["svc_rtt_us"] = el / args.calls * 1e6
+    t0 = time.perf_counter()
+    for i in range(args.calls):
+        worker.call("ping", {"x": i})
+    out["host_rtt_us"] = (time.perf_counter() - t0) / args.calls * 1e6
+
+    idle = tick_lateness(1.0)
+    worker.call("heavy", {"n": args.heavy_n}, timeout=60.0)
+    late = tick_lateness(args.stall_s)
+    out["idle"] = idle
+    out["late"] = late
+    out["heavy_runs"] = worker.call("runs", timeout=60.0)
+    return out
+
+
+def show(name: str, r: dict):
+    print(f"  {name}")
+    print(f"    log notify      : {r['notify_us']:7.2f} us/call in the worker, "
+          f"{r['notify_done_us']:7.2f} us/call until handled by the host")
+    print(f"    windows.list()  : {r['svc_rtt_us']:7.1f} us round trip (worker -> host)")
+    print(f"    handle() call   : {r['host_rtt_us']:7.1f} us round trip (host -> worker)")
+    for key, label in (("idle", "idle ticks     "), ("late", "heavy job ticks")):
+        xs = r[key]
+        print(f"    {label} : lateness p50 {statistics.median(xs):6.2f} ms, p99 {pct(xs, 0.99):7.2f} ms, "
+              f"max {max(xs):7.2f} ms  ({len(xs)} ticks)")
+    print(f"    heavy job runs  : {r['heavy_runs']}")
+
+
+def recover(worker, method: str, timeout: float) -> float:
+    t0 = time.perf_counter()
+    try:
+        worker.call(method, timeout=timeout)
+    except WorkerError:
+        pass
+
+    def answers():
+        if worker.state != STATE_RUNNING:
+            return False
+        try:
+            return worker.call("ping", {"x": 1}, timeout=0.5) == 1
+        except WorkerError:
+            return False
+    return time.perf_counter() - t0 if wait_for(answers, 15.0) else float("nan")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--notify", type=int, default=20000)
+    ap.add_argument("--calls", type=int, default=2000)
+    ap.add_argument("--heavy-n", type=int, default=1000000)
+    ap.add_argument("--stall-s", type=float, default=3.0)
+    args = ap.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        d = os.path.join(tmp, "bench")
+        os.makedirs(d)
+        path = os.path.join(d, "worker.py")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(WORKER_SRC)
+        cfg = {"idle_enabled": False}
+        print(f"{args.notify} log notifies, {args.calls} round trips, job sorts {args.heavy_n} floats every second")
+
+        ctx = make_ctx()
+        w = InProcessWorker("bench", path, ctx, cfg)
+        local = measure(w, ctx, args)
+        w.stop()
+        ctx.scheduler.stop()
+        show("in-process", local)
+
+        ctx = make_ctx()
+        w = IsolatedWorker("bench", path, ctx, cfg, heartbeat_s=0.2, timeout_s=1.0, hang_s=1.0,
+                           backoff_initial_s=0.1, on_log=ctx.log.warn)
+        iso = measure(w, ctx, args)
+        show("isolated", iso)
+        m = w.metrics()
+        print(f"    batching        : {m['messages_in']} messages in {m['batches_in']} batches "
+              f"(avg {m['avg_batch']}/batch)")
+
+        dt = recover(w, "crash", 2.0)
+        dropped = ctx.scheduler.next_fire("bench:heavy") is None
+        print(f"  crash (os._exit)  : answering again after {dt * 1000:6.0f} ms, scheduler job dropped: {dropped}")
+        ok &= dropped and dt == dt
+        dt = recover(w, "hang", 0.5)
+        print(f"  hang (hang_s=1s)  : answering again after {dt * 1000:6.0f} ms, restarts {w.restarts}")
+        ok &= dt == dt and w.restarts == 2
+        for msg in ctx.log.warnings:
+            print(f"    {msg}")
+        w.stop()
+        ctx.scheduler.stop()
+
+    stall_local, stall_iso = max(local["late"]), max(iso["late"])
+    print(f"  worst main-loop stall: {stall_local:.1f} ms in-process vs {stall_iso:.1f} ms isolated")
+    ok &= stall_iso < stall_local
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
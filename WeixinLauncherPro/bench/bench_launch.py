@@ -0,0 +1,104 @@
+"""Launch pacing benchmark on a simulated startup curve (virtual clock, nothing is started).
+
+Usage:
+  python bench/bench_launch.py [--n 20] [--delay-ms 800] [--inflight 1]
+
+Each simulated instance shows its window after a random startup latency that
+grows with the number of instances already running. The fixed-delay column is
+what the old launch loop (sleep between launches) + one scan cost: N x delay,
+and any instance slower than that is missed by the scan. The last two lines compare time-to-placed
+for the phased arrange (everything moved after the last launch) and the
+streaming arrange (each window moved in the next frame after it appears).
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.arrange import StreamingArranger  # noqa: E402
+from core.config import Rect  # noqa: E402
+from core.weixin_launcher import LaunchPipeline  # noqa: E402
+
+
+class SimDesktop:
+    def __init__(self, seed: int, base_ms: float, per_instance_ms: float, jitter_ms: float):
+        self.now = 0.0
+        self.rnd = random.Random(seed)
+        self.base = base_ms / 1000.0
+        self.per_instance = per_instance_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.procs = []  # (pid, ready_at)
+        self.polls = 0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, s):
+        self.now += s
+
+    def startup_latency(self):
+        return self.base + self.per_instance * len(self.procs) + self.rnd.uniform(0, self.jitter)
+
+    def spawn(self):
+        pid = 5000 + 4 * len(self.procs)
+        self.procs.append((pid, self.now + self.startup_latency()))
+        return pid
+
+    def list_windows(self):
+        self.polls += 1
+        return [{"hwnd": pid * 16, "pid": pid} for pid, ready_at in self.procs if ready_at <= self.now]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=20)
+    ap.add_argument("--delay-ms", type=int, default=800)
+    ap.add_argument("--inflight", type=int, default=1)
+    ap.add_argument("--base-ms", type=float, default=350)
+    ap.add_argument("--per-instance-ms", type=float, default=15)
+    ap.add_argument("--jitter-ms", type=float, default=300)
+    args = ap.parse_args()
+
+    # fixed delay: N sleeps, then one scan
+    sim = SimDesktop(1, args.base_ms, args.per_instance_ms, args.jitter_ms)
+    for _ in range(args.n):
+        sim.spawn()
+        sim.sleep(args.delay_ms / 1000.0)
+    fixed_total = sim.now
+    fixed_found = len(sim.list_windows())
+
+    sim = SimDesktop(1, args.base_ms, args.per_instance_ms, args.jitter_ms)
+    pipe = LaunchPipeline(
+        spawn=sim.spawn, list_windows=sim.list_windows,
+        max_inflight=args.inflight, max_gap_ms=args.delay_ms,
+        is_alive=lambda pid: True, clock=sim.clock, sleep=sim.sleep,
+    )
+    batches = []
+    arranger = StreamingArranger([Rect(i, i, 800, 600) for i in range(args.n)], batches.append, clock=sim.clock)
+
+    def on_result(r):
+        if r.ok:
+            arranger.submit(r.index - 1, r.hwnd)
+
+    results = pipe.run(args.n, on_result=on_result, on_tick=arranger.tick)
+    arranger.flush()
+    placed = sorted(p["placed_at"] for p in arranger.report() if p["placed_at"] is not None)
+    ok = [r for r in results if r.ok]
+    ttw = sorted(r.time_to_window for r in ok)
+
+    print(f"instances: {args.n}")
+    print(f"fixed delay  : {fixed_total:6.2f}s total, {fixed_found}/{args.n} windows found by the scan")
+    print(f"pipeline     : {sim.now:6.2f}s total, {len(ok)}/{args.n} ready, {sim.polls} polls")
+    if ttw:
+        print(f"time-to-window: min {ttw[0]:.2f}s  median {ttw[len(ttw) // 2]:.2f}s  max {ttw[-1]:.2f}s")
+    print(f"phased placed   : all {args.n} at +{fixed_total:.2f}s")
+    if placed:
+        print(f"streaming placed: first +{placed[0]:.2f}s  median +{placed[len(placed) // 2]:.2f}s  "
+              f"last +{placed[-1]:.2f}s in {len(batches)} batch(es)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Layout engine: correctness checks and timing on synthetic monitor setups.
+
+Usage:
+  python bench/bench_layout.py [--repeat 20]
+
+For every monitor setup (single 1080p, dual, mixed resolution, portrait
+secondary, monitor left of / above the primary, i.e. negative coordinates)
+and window count it checks that each strategy returns one rect per window,
+every rect lies inside a monitor's work area, tile rects never overlap,
+tile keeps the base aspect ratio when told to at any cost
+(max_aspect_loss=1) and by default never covers less than 1 - MAX_ASPECT_LOSS
+of what the fill grid would, and cascade doesn't stack two windows on the
+same spot while it still has free start positions. Then it times each
+strategy for 10/100/1000 windows and compares tile against the old
+single-monitor sqrt grid: share of all work areas covered, and how far the
+old grid stretches windows away from the base aspect ratio.
+Exits non-zero if any check fails.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import Rect  # noqa: E402
+from core.layout import (MAX_ASPECT_LOSS, LayoutRequest, Monitor, compute_layout, fill_grid,  # noqa: E402
+                         naive_tile, split_by_area)
+
+BASE = Rect(120, 80, 900, 700)
+
+SETUPS = {
+    "single-1080p": [Monitor(0, 0, 1920, 1040, True)],
+    "dual-1080p": [Monitor(0, 0, 1920, 1040, True), Monitor(1920, 0, 1920, 1080)],
+    "mixed-res": [Monitor(0, 0, 1920, 1040, True), Monitor(1920, -360, 3840, 2120)],
+    "portrait-2nd": [Monitor(0, 0, 2560, 1400, True), Monitor(2560, -400, 1080, 1920)],
+    "left-of-primary": [Monitor(0, 0, 1920, 1040, True), Monitor(-1280, 0, 1280, 984)],
+    "above-primary": [Monitor(0, 0, 1920, 1040, True), Monitor(0, -1080, 1920, 1080)],
+    "triple-small": [Monitor(0, 0, 1366, 728, True), Monitor(1366, 0, 1366, 768), Monitor(-1366, 0, 1366, 768)],
+}
+COUNTS = (1, 2, 3, 5, 8, 13, 20, 40, 100)
+
+
+def inside(r: Rect, mons) -> bool:
+    return any(m.x <= r.x and m.y <= r.y and r.x + r.w <= m.x + m.w and r.y + r.h <= m.y + m.h for m in mons)
+
+
+def overlaps(rects) -> bool:
+    # sweep by x; fine for a few hundred rects
+    rs = sorted(rects, key=lambda r: r.x)
+    for i, a in enumerate(rs):
+        for b in rs[i + 1:]:
+            if b.x >= a.x + a.w:
+                break
+            if b.y < a.y + a.h and a.y < b.y + b.h:
+                return True
+    return False
+
+
+def check(name: str, mons, n: int) -> list:
+    errs = []
+    req = LayoutRequest(BASE, n, mons)
+    for strat in ("cascade", "tile"):
+        rects = compute_layout(strat, req)
+        tag = f"{name} n={n} {strat}"
+        if len(rects) != n:
+            errs.append(f"{tag}: {len(rects)} rects")
+        out = [r for r in rects if not inside(r, mons)]
+        if out:
+            errs.append(f"{tag}: {len(out)} rect(s) outside the work areas, e.g. {out[0]}")
+        if strat == "tile":
+            if overlaps(rects):
+                errs.append(f"{tag}: overlapping rects")
+            off = skew(compute_layout(strat, LayoutRequest(BASE, n, mons, options={"max_aspect_loss": 1.0})))
+            if off > 0.02:
+                errs.append(f"{tag}: aspect off by {off:.1%} with max_aspect_loss=1")
+            om = req.ordered_monitors()
+            fill = [r for m, k in zip(om, split_by_area(n, om)) if k for r in fill_grid(k, m, BASE.w, BASE.h)]
+            if covered(rects, mons) < (1 - MAX_ASPECT_LOSS) * covered(fill, mons) - 1e-9:
+                errs.append(f"{tag}: covers {covered(rects, mons):.1%}, fill grid {covered(fill, mons):.1%}")
+        else:
+            # positions may only repeat once every start column on every monitor is full
+            room = len({(r.x, r.y) for r in compute_layout(strat, LayoutRequest(BASE, 5000, mons))})
+            if len({(r.x, r.y) for r in rects}) != min(n, room):
+                errs.append(f"{tag}: windows stacked on the same spot")
+    return errs
+
+
+def covered(rects, mons) -> float:
+    return sum(r.w * r.h for r in rects) / sum(m.area for m in mons)
+
+
+def skew(rects) -> float:
+    return max(abs(r.w / r.h - BASE.w / BASE.h) / (BASE.w / BASE.h) for r in rects)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    errs = []
+    for name, mons in SETUPS.items():
+        for n in COUNTS:
+            errs.extend(check(name, mons, n))
+    print(f"checks: {len(SETUPS)} setups x {len(COUNTS)} counts x 2 strategies, {len(errs)} failure(s)")
+    for e in errs[:20]:
+        print("  FAIL", e)
+
+    print("\ntiming (dual-1080p, best of --repeat):")
+    mons = SETUPS["dual-1080p"]
+    for n in (10, 100, 1000):
+        for strat in ("cascade", "tile"):
+            best = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                compute_layout(strat, LayoutRequest(BASE, n, mons))
+                best = min(best, time.perf_counter() - t0)
+            print(f"  {strat:8s} n={n:5d}: {best * 1000:7.3f} ms  ({best / n * 1e6:.2f} us/window)")
+
+    print("\ntile coverage of all work areas, old sqrt grid on the primary only (aspect skew) -> "
+          "aspect-only -> default (fill-grid fallback):")
+    for name, mons in SETUPS.items():
+        cols = []
+        for n in (4, 8, 20):
+            primary = next(m for m in mons if m.primary)
+            old = naive_tile(BASE, n, primary)
+            pure = covered(compute_layout("tile", LayoutRequest(BASE, n, mons, options={"max_aspect_loss": 1.0})),
+                           mons)
+            new = covered(compute_layout("tile", LayoutRequest(BASE, n, mons)), mons)
+            cols.append(f"n={n}: {covered(old, mons):5.1%} ({skew(old):4.0%}) -> {pure:5.1%} -> {new:5.1%}")
+        print(f"  {name:16s} " + "   ".join(cols))
+    return 1 if errs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
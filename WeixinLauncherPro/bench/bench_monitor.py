@@ -0,0 +1,118 @@
+"""Resource monitor benchmark: per-process psutil calls vs cached oneshot() reads.
+
+Usage:
+  python bench/bench_monitor.py [--instances 30] [--others 0] [--seconds 10]
+
+Spawns N idle child processes as stand-ins for WeChat instances (plus
+``--others`` unrelated idle processes, to bring the process table up to a
+typical desktop's few hundred entries), then
+  1) compares the CPU cost of one sampling pass done the naive way (a new
+     psutil.Process per pid, every counter a separate query), as a walk
+     over the whole process table with oneshot() per match, and through
+     ProcessSampler (cached Process objects, oneshot() per pid),
+  2) checks that the sampler reports every instance and drops one that
+     exited, and
+  3) runs ResourceMonitor for a while and reports its own CPU overhead and
+     the interval it settled on.
+
+Exits non-zero if the check in 2) fails.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil  # noqa: E402
+
+from core.monitor import ProcessSampler, ResourceMonitor  # noqa: E402
+
+
+def naive_pass(pids):
+    for pid in pids:
+        try:
+            p = psutil.Process(pid)
+            p.cpu_percent(None)
+            p.memory_info()
+            (getattr(p, "num_handles", None) or p.num_fds)()
+            p.num_threads()
+        except psutil.Error:
+            pass
+
+
+def scan_pass(pids):
+    wanted = set(pids)
+    for p in psutil.process_iter():
+        if p.pid not in wanted:
+            continue
+        try:
+            with p.oneshot():
+                p.create_time()
+                p.cpu_times()
+                p.memory_info()
+                (getattr(p, "num_handles", None) or p.num_fds)()
+                p.num_threads()
+        except psutil.Error:
+            pass
+
+
+def cpu_per_pass(fn, rounds: int = 50) -> float:
+    c0 = time.process_time()
+    for _ in range(rounds):
+        fn()
+    return (time.process_time() - c0) / rounds
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--instances", type=int, default=30)
+    ap.add_argument("--others", type=int, default=0)
+    ap.add_argument("--seconds", type=float, default=10.0)
+    args = ap.parse_args()
+
+    procs = [subprocess.Popen([sys.executable, "-c", "import time; time.sleep(3600)"])
+             for _ in range(args.instances)]
+    others = [subprocess.Popen([sys.executable, "-S", "-c", "import time; time.sleep(3600)"])
+              for _ in range(args.others)]
+    try:
+        time.sleep(0.5)
+        pids = [p.pid for p in procs]
+        targets = {pid: f"微信{i}" for i, pid in enumerate(pids, start=1)}
+        sampler = ProcessSampler()
+        naive = cpu_per_pass(lambda: naive_pass(pids))
+        scan = cpu_per_pass(lambda: scan_pass(pids))
+        cached = cpu_per_pass(lambda: sampler.sample(pids))
+        print(f"instances: {args.instances}, processes on system: {len(psutil.pids())}")
+        print(f"one pass, per-process calls       : {naive * 1000:7.2f} ms CPU")
+        print(f"one pass, process table + oneshot : {scan * 1000:7.2f} ms CPU")
+        print(f"one pass, ProcessSampler (cached)  : {cached * 1000:7.2f} ms CPU")
+
+        gone = procs[0]
+        gone.kill()
+        gone.wait()
+        got = sampler.sample(pids)
+        ok = set(got) == set(pids[1:])
+        print(f"every live instance sampled, the exited one dropped: {ok}")
+
+        mon = ResourceMonitor(lambda: targets)
+        t0 = time.monotonic()
+        mon.start()
+        time.sleep(args.seconds)
+        mon.stop()
+        wall = time.monotonic() - t0
+        rows = mon.latest()
+        print(f"monitor: {mon.samples_taken} passes in {wall:.1f}s, interval {mon.current_interval:.2f}s, "
+              f"own CPU {mon.total_cost / wall * 100:.3f}% of one core, {len(rows)} instance(s) tracked")
+    finally:
+        for p in procs + others:
+            p.kill()
+        for p in procs + others:
+            p.wait()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Window placement: per-window restore+move vs batched apply with no-op elimination.
+
+Usage:
+  python bench/bench_placement.py [--windows 20]
+
+Runs on the call-counting fake desktop (core.placement.FakeNative). For each
+scenario it reports native calls and repaint passes for the old per-window
+path (ShowWindow(SW_RESTORE) + SetWindowPos for every window) and for
+WindowPlacer.apply. Also checks the group minimize/restore/raise ops skip
+windows that are already in the requested state.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import Rect  # noqa: E402
+from core.placement import FakeNative, STATE_MINIMIZED, STATE_NORMAL, WindowPlacer  # noqa: E402
+
+
+def desktop(n: int, rects, minimized=()):
+    nat = FakeNative()
+    for i in range(n):
+        nat.add(100 + i, rects[i], STATE_MINIMIZED if i in minimized else STATE_NORMAL)
+    return nat
+
+
+def legacy(nat: FakeNative, pairs):
+    for hwnd, rect in pairs:
+        nat.show(hwnd, STATE_NORMAL)
+        nat.move(hwnd, rect)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--windows", type=int, default=20)
+    args = ap.parse_args()
+    n = args.windows
+
+    start = [Rect(0, 0, 800, 600)] * n
+    layout = [Rect(30 * i, 30 * i, 800, 600) for i in range(n)]
+    half = [layout[i] if i % 2 else start[i] for i in range(n)]
+    scenarios = [
+        ("fresh layout (all move)", start, ()),
+        ("re-apply same layout", layout, ()),
+        ("half already in place", half, ()),
+        ("same layout, 3 minimized", layout, (1, 5, 9)),
+    ]
+    print(f"windows: {n}")
+    print(f"{'scenario':<28}{'legacy calls':>14}{'repaints':>10}{'batched calls':>15}{'repaints':>10}")
+    for name, initial, mini in scenarios:
+        pairs = [(100 + i, layout[i]) for i in range(n)]
+        old = desktop(n, initial, mini)
+        legacy(old, pairs)
+        new = desktop(n, initial, mini)
+        res = WindowPlacer(new).apply(pairs)
+        assert all(new.windows[h].rect == r for h, r in pairs), "layout not applied"
+        print(f"{name:<28}{sum(old.calls.values()):>14}{old.repaints:>10}"
+              f"{sum(new.calls.values()):>15}{new.repaints:>10}   "
+              f"(moved {res.moved}, unchanged {res.unchanged}, restored {res.restored})")
+
+    nat = desktop(n, layout, (0, 1))
+    placer = WindowPlacer(nat)
+    hwnds = [100 + i for i in range(n)]
+    print(f"minimize all: {placer.minimize(hwnds)} show calls (2 were already minimized); "
+          f"restore all: {placer.restore(hwnds)}; again: {placer.restore(hwnds)}")
+    nat.calls.clear()
+    placer.raise_(list(reversed(hwnds)))
+    print(f"raise {n} in one transaction: {dict(nat.calls)}; top now {nat.z[:3]}")
+
+
+if __name__ == "__main__":
+    main()
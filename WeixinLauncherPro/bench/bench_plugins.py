@@ -0,0 +1,161 @@
+"""Plugin startup: eager load of every plugin vs manifest-driven lazy loading.
+
+Usage:
+  python bench/bench_plugins.py [--plugins 8] [--import-ms 40] [--build-ms 60]
+
+Writes N synthetic plugins to a temporary plugins/ directory. Each one sleeps
+--import-ms when its module is imported (heavy imports) and --build-ms in
+get_tab() (e.g. a tab that enumerates windows on construction). One of them
+provides a job action and declares ``onAction:<type>``, another one
+``onConfig:idle_enabled``. Reports startup cost of the old path (import,
+init and build every tab) against the lazy host (read manifests, activate
+only what startup needs), the cost of first opening a tab, and checks that a
+persisted job for the lazy plugin's action is parked and then scheduled once
+the plugin activates. Runs headless: tabs are stand-ins, not Tk widgets.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import AppConfig  # noqa: E402
+from core.jobstore import JobManager, JobSpec, JobStore  # noqa: E402
+from core.logger import Logger  # noqa: E402
+from core.plugin_api import ON_ACTION, ON_CONFIG, PluginHost  # noqa: E402
+from core.scheduler import Scheduler  # noqa: E402
+
+ACTION = "bench_action"
+
+PLUGIN_SRC = '''import time
+time.sleep({import_s})
+
+
+class _Tab:
+    def pack(self, **kw):
+        pass
+
+
+class BenchPlugin:
+    id = "{pid}"
+    name = "{pid}"
+    version = "0.1.0"
+
+    def init(self, ctx):
+        self.ctx = ctx
+        if {provides!r} and ctx.jobs is not None:
+            ctx.jobs.register_action({provides!r}, lambda spec: (lambda: None))
+
+    def get_tab(self, parent):
+        time.sleep({build_s})
+        return _Tab()
+
+    def on_start(self):
+        pass
+
+    def on_stop(self):
+        pass
+
+
+def create_plugin():
+    return BenchPlugin()
+'''
+
+
+def write_plugins(root: str, n: int, import_ms: float, build_ms: float):
+    for i in range(n):
+        pid = f"p{i}"
+        d = os.path.join(root, pid)
+        os.makedirs(d)
+        activation, provides = [], ""
+        if i == 0:
+            activation, provides = [ON_ACTION + ACTION], ACTION
+        elif i == 1:
+            activation = [ON_CONFIG + "idle_enabled"]
+        with open(os.path.join(d, "plugin.json"), "w", encoding="utf-8") as f:
+            json.dump({"id": pid, "name": pid, "version": "0.1.0", "entry": "plugin.py",
+                       "activation": activation}, f)
+        with open(os.path.join(d, "plugin.py"), "w", encoding="utf-8") as f:
+            f.write(PLUGIN_SRC.format(import_s=import_ms / 1000, build_s=build_ms / 1000, pid=pid,
+                                      provides=provides))
+
+
+def make_ctx(tmp: str, tag: str, with_job: bool):
+    log = Logger(capacity=1000)
+    scheduler = Scheduler(lambda m: None, workers=1)
+    store = JobStore(os.path.join(tmp, f"jobs-{tag}.sqlite3"))
+    if with_job:
+        store.put(JobSpec(job_id="j1", action_type=ACTION, trigger={"type": "interval", "interval": 3600}))
+        store.flush()
+    jobs = JobManager(scheduler, store, lambda m: None)
+    cfg = AppConfig()
+    cfg.idle_enabled = False
+    return SimpleNamespace(cfg=cfg, log=log, scheduler=scheduler, jobs=jobs, tasks=None), store
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plugins", type=int, default=8)
+    ap.add_argument("--import-ms", type=float, default=40.0)
+    ap.add_argument("--build-ms", type=float, default=60.0)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdir = os.path.join(tmp, "plugins")
+        write_plugins(pdir, args.plugins, args.import_ms, args.build_ms)
+        print(f"{args.plugins} plugins, {args.import_ms:g} ms import + {args.build_ms:g} ms tab build each")
+
+        # eager: what load_all() used to do for every plugin
+        ctx, store = make_ctx(tmp, "eager", with_job=False)
+        host = PluginHost(ctx, pdir)
+        t0 = time.perf_counter()
+        for rec in host.discover():
+            host.build(rec)
+        eager = time.perf_counter() - t0
+        print(f"  eager startup    : {eager * 1000:7.1f} ms")
+        host.stop_all()
+        store.close()
+
+        # lazy: manifests, startup activations, then a persisted job for the onAction plugin
+        ctx, store = make_ctx(tmp, "lazy", with_job=True)
+        host = PluginHost(ctx, pdir)
+        t0 = time.perf_counter()
+        host.discover()
+        host.expect_actions()
+        host.start_all()
+        lazy = time.perf_counter() - t0
+        print(f"  lazy startup     : {lazy * 1000:7.1f} ms  (manifests read in {host.discover_ms:.2f} ms, "
+              f"{sum(r.state == 'active' for r in host.loaded)} plugin(s) active)")
+
+        t0 = time.perf_counter()
+        ctx.jobs.restore()
+        restored = time.perf_counter() - t0
+        p0 = host.loaded[0]
+        scheduled = ctx.scheduler.next_fire("j1") is not None
+        print(f"  job restore      : {restored * 1000:7.1f} ms  -> {p0.manifest.id} {p0.state} "
+              f"by {p0.activated_by!r}, job scheduled: {scheduled}")
+
+        rec = host.loaded[-1]
+        t0 = time.perf_counter()
+        host.build(rec)
+        print(f"  first tab open   : {(time.perf_counter() - t0) * 1000:7.1f} ms  "
+              f"(load {rec.load_ms:.1f} ms + build {rec.build_ms:.1f} ms)")
+        t0 = time.perf_counter()
+        host.build(rec)
+        print(f"  reopen same tab  : {(time.perf_counter() - t0) * 1000:7.3f} ms")
+
+        active = [r.manifest.id for r in host.loaded if r.state == "active"]
+        print(f"  active after that: {active}; startup {eager / max(lazy, 1e-9):.0f}x faster")
+        host.stop_all()
+        store.close()
+        ctx.scheduler.stop()
+    return 0 if scheduled else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
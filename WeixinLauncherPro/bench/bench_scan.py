@@ -0,0 +1,179 @@
+"""Window scan benchmark against a simulated window/process table.
+
+Usage:
+  python bench/bench_scan.py [--open-cost-us 40] [--wechat 20] [--repeat 5]
+
+Compares the old scan (one process open + exe() per visible window) with
+ProcessIndex (one process-table snapshot per scan, exe cached by
+(pid, create_time)). Process opens are simulated with a fixed busy-wait cost.
+Also checks that a probe between scans (the WinEvent path) of a PID that
+was reused by another program gets the new program's exe, not the cached
+one. Then checks WindowRegistry: an event applied while a reconcile scan is
+running survives the scan's result, and a registry without a live event
+source rescans on its own.
+"""
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.procindex import ProcessIndex, norm_path  # noqa: E402
+from core.registry import WINDOW_CREATE, WINDOW_DESTROY, FakeEventSource, WindowRegistry  # noqa: E402
+
+WECHAT_EXE = r"C:\Program Files\Tencent\Weixin\WeiXin.exe"
+
+
+def _spin(us: float):
+    end = time.perf_counter() + us / 1e6
+    while time.perf_counter() < end:
+        pass
+
+
+class SimTable:
+    def __init__(self, n_windows: int, n_wechat: int, open_cost_us: float, snapshot_cost_us: float):
+        rnd = random.Random(n_windows)
+        self.open_cost_us = open_cost_us
+        self.snapshot_cost_us = snapshot_cost_us
+        self.opens = 0
+        n_procs = max(n_wechat + 1, n_windows // 3)
+        self.procs = {}
+        for i in range(n_procs):
+            pid = 1000 + i * 4
+            exe = WECHAT_EXE if i < n_wechat else rf"C:\Apps\app{i}.exe"
+            self.procs[pid] = (1.7e9 + i, exe)
+        pids = list(self.procs)
+        # every WeChat process owns at least one window, the rest are spread randomly
+        self.windows = [(0x10000 + i, pids[i] if i < n_wechat else rnd.choice(pids)) for i in range(n_windows)]
+
+    def iter_processes(self):
+        _spin(self.snapshot_cost_us * len(self.procs))
+        for pid, (ct, _) in self.procs.items():
+            yield pid, ct
+
+    def create_time(self, pid: int) -> float:
+        return self.procs[pid][0]
+
+    def resolve_exe(self, pid: int) -> str:
+        self.opens += 1
+        _spin(self.open_cost_us)
+        return self.procs[pid][1]
+
+
+def scan_per_window(table: SimTable, exe_norm: str):
+    out = []
+    for hwnd, pid in table.windows:
+        try:
+            if norm_path(table.resolve_exe(pid)) != exe_norm:
+                continue
+        except Exception:
+            continue
+        out.append(hwnd)
+    return out
+
+
+def scan_indexed(table: SimTable, index: ProcessIndex, exe_norm: str):
+    index.begin_scan()
+    out = []
+    for hwnd, pid in table.windows:
+        exe = index.exe_of(pid)
+        if exe is None or exe != exe_norm:
+            continue
+        out.append(hwnd)
+    return out
+
+
+def check_registry() -> bool:
+    desktop = {1: {"hwnd": 1, "pid": 10, "title": "a", "class": "W"},
+               2: {"hwnd": 2, "pid": 11, "title": "b", "class": "W"}}
+    entered, release = threading.Event(), threading.Event()
+    slow = [False]
+
+    def scan(_exe, _cls):
+        ws = [dict(w) for w in desktop.values()]  # read before the events below
+        if slow[0]:
+            entered.set()
+            release.wait(5)
+        return ws
+
+    src = FakeEventSource()
+    reg = WindowRegistry(scan, lambda h, _e, _c: dict(desktop[h]) if h in desktop else None, src, exe_path="w.exe")
+    reg.start()
+    slow[0] = True
+    t = threading.Thread(target=reg.reconcile)
+    t.start()
+    entered.wait(5)
+    del desktop[2]
+    src.emit(WINDOW_DESTROY, 2)
+    desktop[3] = {"hwnd": 3, "pid": 12, "title": "c", "class": "W"}
+    src.emit(WINDOW_CREATE, 3)
+    release.set()
+    t.join(5)
+    merged = sorted(w["hwnd"] for w in reg.snapshot()) == [1, 3]
+    print(f"events during a reconcile scan: snapshot {sorted(w['hwnd'] for w in reg.snapshot())} "
+          f"(want [1, 3]) -> {'ok' if merged else 'FAILED'}")
+
+    slow[0] = False
+    polled = WindowRegistry(scan, lambda h, _e, _c: None, exe_path="w.exe", rescan_s=0.02)
+    polled.start()
+    desktop[4] = {"hwnd": 4, "pid": 13, "title": "d", "class": "W"}
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline and len(polled.snapshot()) != len(desktop):
+        time.sleep(0.01)
+    polled.stop()
+    rescanned = len(polled.snapshot()) == len(desktop)
+    print(f"registry without an event source picks up new windows: {rescanned}")
+    return merged and rescanned
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--open-cost-us", type=float, default=40.0, help="simulated cost of one process open + exe()")
+    ap.add_argument("--snapshot-cost-us", type=float, default=0.5, help="simulated per-process cost of the snapshot")
+    ap.add_argument("--wechat", type=int, default=20)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    exe_norm = norm_path(WECHAT_EXE)
+    print(f"{'windows':>8} {'per-window ms':>14} {'cold ms':>9} {'warm ms':>9} {'opens/scan':>11} {'hits':>6} {'misses':>7}")
+    for n in (50, 200, 500, 1000, 2000):
+        table = SimTable(n, args.wechat, args.open_cost_us, args.snapshot_cost_us)
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            base = scan_per_window(table, exe_norm)
+        t_base = (time.perf_counter() - t0) * 1000 / args.repeat
+        opens_base = table.opens / args.repeat
+
+        index = ProcessIndex(table.iter_processes, table.resolve_exe)
+        t0 = time.perf_counter()
+        cold = scan_indexed(table, index, exe_norm)
+        t_cold = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            warm = scan_indexed(table, index, exe_norm)
+        t_warm = (time.perf_counter() - t0) * 1000 / args.repeat
+
+        assert base == cold == warm
+        st = index.stats()
+        print(f"{n:>8} {t_base:>14.2f} {t_cold:>9.2f} {t_warm:>9.2f} {opens_base:>11.0f} {st['hits']:>6} {st['misses']:>7}")
+
+    # a WeChat process exits and its PID goes to another program before the next scan
+    table = SimTable(50, args.wechat, 0.0, 0.0)
+    index = ProcessIndex(table.iter_processes, table.resolve_exe, table.create_time)
+    scan_indexed(table, index, exe_norm)
+    pid = next(iter(table.procs))
+    table.procs[pid] = (table.procs[pid][0] + 60.0, r"C:\Apps\other.exe")
+    stale = index.exe_of(pid) == exe_norm
+    fresh = index.exe_of(pid, verify=True) == norm_path(r"C:\Apps\other.exe")
+    print(f"reused PID between scans: unverified lookup stale: {stale}, verified probe sees the new exe: {fresh}")
+    return 0 if check_registry() and fresh else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
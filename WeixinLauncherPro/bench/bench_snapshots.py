@@ -0,0 +1,147 @@
+"""Layout snapshots: switching between two saved arrangements of N windows.
+
+Usage:
+  python bench/bench_snapshots.py [--windows 20] [--switches 50]
+
+Runs on the call-counting fake desktop (core.placement.FakeNative). Saves a
+"work" arrangement (tile across two monitors) and a "monitoring" one
+(cascade, different z-order, two windows minimized, one maximized), then
+switches back and forth and reports time, native calls and repaint passes
+per switch next to the per-window restore+move path. Also checks that a
+repeated restore writes nothing, that z-order comes back exactly, that
+minimized and maximized windows keep their restored rect (not the screen
+rect) through a capture, a switch and back, that
+snapshots survive a save/load round trip, and that windows on a monitor
+that has been unplugged land on the primary one.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import Rect  # noqa: E402
+from core.layout import LayoutRequest, Monitor, compute_layout  # noqa: E402
+from core.placement import FakeNative, STATE_MAXIMIZED, STATE_MINIMIZED, STATE_NORMAL, WindowPlacer  # noqa: E402
+from core.snapshots import SnapshotStore  # noqa: E402
+
+MONITORS = [Monitor(0, 0, 1920, 1040, True, "DISPLAY1"), Monitor(1920, 0, 1920, 1080, False, "DISPLAY2")]
+BASE = Rect(100, 80, 900, 700)
+
+
+def arrange(nat: FakeNative, hwnds, rects, z):
+    for h, r in zip(hwnds, rects):
+        nat.windows[h].rect = r
+        nat.windows[h].state = STATE_NORMAL
+    nat.z = list(z)
+
+
+def observed(placer: WindowPlacer, hwnds):
+    """What the user sees: state and rect of every window, stacking order of the visible ones."""
+    states = placer.read(hwnds)
+    visible = [h for h in placer.z_order(hwnds) if states[h].state != STATE_MINIMIZED]
+    return {h: (st.state, st.rect) for h, st in states.items()}, visible
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--windows", type=int, default=20)
+    ap.add_argument("--switches", type=int, default=50)
+    args = ap.parse_args()
+    n = args.windows
+
+    nat = FakeNative()
+    hwnds = [100 + i for i in range(n)]
+    for h in hwnds:
+        nat.add(h, BASE)
+    rows = [{"hwnd": h, "identity": f"inst-{i + 1}", "label": f"微信{i + 1}"} for i, h in enumerate(hwnds)]
+    hwnd_of = {r["identity"]: r["hwnd"] for r in rows}.get
+    placer = WindowPlacer(nat)
+    store = SnapshotStore()
+
+    work = compute_layout("tile", LayoutRequest(BASE, n, MONITORS))
+    arrange(nat, hwnds, work, hwnds)
+    store.capture("work", rows, placer, MONITORS)
+    mon = compute_layout("cascade", LayoutRequest(BASE, n, MONITORS[:1]))
+    arrange(nat, hwnds, mon, reversed(hwnds))
+    nat.windows[hwnds[0]].state = STATE_MINIMIZED
+    nat.windows[hwnds[1]].state = STATE_MINIMIZED
+    nat.windows[hwnds[2]].state = STATE_MAXIMIZED
+    store.capture("monitoring", rows, placer, MONITORS)
+    want = observed(placer, hwnds)
+
+    print(f"{n} windows, {args.switches} switches work <-> monitoring")
+    nat.calls.clear()
+    nat.repaints = 0
+    t0 = time.perf_counter()
+    for i in range(args.switches):
+        store.restore("work" if i % 2 == 0 else "monitoring", hwnd_of, placer, MONITORS)
+    el = time.perf_counter() - t0
+    calls = sum(nat.calls.values())
+    print(f"  snapshot restore : {el / args.switches * 1e6:8.1f} us/switch, {calls / args.switches:5.1f} native "
+          f"calls/switch ({dict(nat.calls)}), {nat.repaints / args.switches:4.1f} repaints/switch")
+
+    # the per-window path: restore + move every window, once per switch
+    legacy = FakeNative()
+    for h in hwnds:
+        legacy.add(h, BASE)
+    t0 = time.perf_counter()
+    for i in range(args.switches):
+        for h, r in zip(hwnds, work if i % 2 == 0 else mon):
+            legacy.show(h, STATE_NORMAL)
+            legacy.move(h, r)
+    el = time.perf_counter() - t0
+    print(f"  per-window path  : {el / args.switches * 1e6:8.1f} us/switch, "
+          f"{sum(legacy.calls.values()) / args.switches:5.1f} native calls/switch, "
+          f"{legacy.repaints / args.switches:4.1f} repaints/switch (no z-order, no min/max states)")
+
+    ok = True
+    store.restore("monitoring", hwnd_of, placer, MONITORS)
+    same = observed(placer, hwnds) == want
+    ok &= same
+    print(f"  monitoring restored exactly (rects, states, z-order of visible windows): {same}")
+    nat.calls.clear()
+    nat.repaints = 0
+    res = store.restore("monitoring", hwnd_of, placer, MONITORS)
+    print(f"  restore again: moved {res.applied.moved}, transactions {res.applied.transactions}, "
+          f"repaints {nat.repaints}, calls {dict(nat.calls)}")
+    ok &= nat.repaints == 0
+
+    # the minimized and maximized windows come back to their cascade slots when the user restores them
+    saved = {e.identity: e.rect for e in store.get("monitoring").entries}
+    store.restore("work", hwnd_of, placer, MONITORS)
+    store.restore("monitoring", hwnd_of, placer, MONITORS)
+    kept = all(saved[f"inst-{i + 1}"] == mon[i] and placer.read([hwnds[i]])[hwnds[i]].normal == mon[i]
+               for i in range(3))
+    placer.restore(hwnds[:3])
+    kept &= all(nat.windows[hwnds[i]].rect == mon[i] for i in range(3))
+    print(f"  minimized/maximized windows keep their restored rect: {kept}")
+    ok &= kept
+    store.restore("monitoring", hwnd_of, placer, MONITORS)
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "layouts.json")
+        store.path = path
+        store.save()
+        t0 = time.perf_counter()
+        loaded = SnapshotStore(path)
+        el = time.perf_counter() - t0
+        same = all(loaded.get(name) == store.get(name) for name in store.names())
+        print(f"  save/load round trip: {same} ({os.path.getsize(path)} bytes, load {el * 1000:.2f} ms)")
+        ok &= same
+
+    # second monitor unplugged: its windows move to the primary
+    res = store.restore("work", hwnd_of, placer, MONITORS[:1])
+    prim = MONITORS[0]
+    inside = all(prim.x <= w.rect.x and w.rect.x + w.rect.w <= prim.x + prim.w
+                 and prim.y <= w.rect.y and w.rect.y + w.rect.h <= prim.y + prim.h for w in nat.windows.values())
+    print(f"  DISPLAY2 unplugged: {res.remapped} window(s) remapped, all on the primary: {inside}")
+    ok &= inside
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
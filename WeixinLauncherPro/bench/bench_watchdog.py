@@ -0,0 +1,183 @@
+"""Crash watchdog simulation: kill instances, measure time to recovery.
+
+Usage:
+  python bench/bench_watchdog.py [--instances 8] [--kills 20] [--startup-ms 300]
+
+Fake processes (a set of live PIDs) stand in for WeChat; relaunching one takes
+``startup-ms`` before its window appears. Random instances are killed one
+after another and the watchdog (real thread, 50 ms poll) must bring each back
+into the same layout slot, with the jobs that targeted the dead hwnd remapped
+to the new one. One extra instance crashes right after every start and must
+be given up on as a crash loop. Then checks, on a manual clock: a second
+launch adds slots instead of dropping the first launch's, a crash whose PID
+was immediately reused is still noticed, and an instance that exits with
+code 0 (closed by the user) is untracked rather than relaunched.
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.config import Rect  # noqa: E402
+from core.jobstore import JobManager, JobSpec, JobStore  # noqa: E402
+from core.scheduler import Scheduler  # noqa: E402
+from core.watchdog import STATE_GAVE_UP, Watchdog  # noqa: E402
+from core.weixin_launcher import LaunchResult  # noqa: E402
+
+
+class FakeDesktop:
+    def __init__(self, startup_s: float):
+        self.startup_s = startup_s
+        self.alive = set()
+        self.rects = {}
+        self.crashy = set()  # hwnds whose next incarnation dies right away
+        self.created = {}     # pid -> create time
+        self.codes = {}       # pid -> exit code, once it exited
+        self._ids = itertools.count(100)
+        self._lock = threading.Lock()
+
+    def spawn(self):
+        n = next(self._ids)
+        with self._lock:
+            self.alive.add(n)
+            self.created[n] = time.time()
+        return n, 0x10000 + n
+
+    def launch_one(self) -> LaunchResult:
+        time.sleep(self.startup_s)
+        pid, hwnd = self.spawn()
+        return LaunchResult(index=1, pid=pid, hwnd=hwnd, time_to_window=self.startup_s)
+
+    def kill(self, pid: int, code: int = 1):
+        with self._lock:
+            self.alive.discard(pid)
+            self.codes[pid] = code
+
+    def create_time(self, pid: int):
+        with self._lock:
+            return self.created.get(pid) if pid in self.alive else None
+
+    def exit_code(self, pid: int):
+        with self._lock:
+            return self.codes.get(pid)
+
+    def is_alive(self, pid: int) -> bool:
+        with self._lock:
+            return pid in self.alive
+
+    def place(self, hwnd: int, rect: Rect):
+        self.rects[hwnd] = rect
+
+
+def check_tracking() -> bool:
+    desk = FakeDesktop(0.0)
+    now = [0.0]
+    wd = Watchdog(desk.launch_one, desk.place, is_alive=desk.is_alive, create_time=desk.create_time,
+                  exit_code=desk.exit_code, backoff_initial_s=1.0, clock=lambda: now[0])
+    rects = [Rect(0, 0, 800, 600), Rect(800, 0, 800, 600)]
+
+    def launch(k):
+        results = [desk.launch_one() for _ in range(k)]
+        wd.track_launch(results, {r.hwnd: i for i, r in enumerate(results)}, rects[:k])
+        return results
+
+    first, second = launch(2), launch(2)
+    pids = {t.pid for t in wd.tracked()}
+    merged = pids == {r.pid for r in first + second}
+
+    # crash, and the PID is handed to another process before the next poll
+    victim = wd.tracked()[0].pid
+    desk.kill(victim)
+    with desk._lock:
+        desk.alive.add(victim)
+        desk.created[victim] += 30.0
+    wd.poll()
+    now[0] += 5.0
+    wd.poll()
+    reuse_seen = bool(wd.recoveries) and wd.recoveries[0].old_pid == victim
+
+    quitter = wd.tracked()[1]
+    desk.kill(quitter.pid, code=0)
+    before = len(wd.recoveries)
+    wd.poll()
+    now[0] += 5.0
+    wd.poll()
+    untracked = quitter.slot not in {t.slot for t in wd.tracked()} and len(wd.recoveries) == before
+    ok = merged and reuse_seen and untracked
+    print(f"second launch keeps the first one tracked: {merged} ({len(pids)} tracked); "
+          f"reused PID noticed as a crash: {reuse_seen}; clean exit untracked: {untracked} "
+          f"-> {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--instances", type=int, default=8)
+    ap.add_argument("--kills", type=int, default=20)
+    ap.add_argument("--startup-ms", type=float, default=300.0)
+    args = ap.parse_args()
+
+    desk = FakeDesktop(args.startup_ms / 1000.0)
+    sched = Scheduler(lambda m: None)
+    sched.start()
+    store = JobStore(os.path.join(tempfile.mkdtemp(), "jobs.sqlite3"))
+    jobs = JobManager(sched, store, lambda m: None)
+    jobs.register_action("noop", lambda spec: (lambda: None))
+
+    def on_recovered(rec):
+        jobs.remap_target(rec.old_hwnd, rec.new_hwnd)
+        if rec.slot == args.instances:  # the crash-looping one dies again at once
+            desk.kill(rec.new_pid)
+
+    wd = Watchdog(desk.launch_one, desk.place, is_alive=desk.is_alive, create_time=desk.create_time,
+                  exit_code=desk.exit_code, on_recovered=on_recovered,
+                  backoff_initial_s=0.05, backoff_max_s=0.4, loop_window_s=60.0, loop_max=5)
+    rects = [Rect(40 * i, 40 * i, 800, 600) for i in range(args.instances + 1)]
+    for slot in range(args.instances + 1):
+        pid, hwnd = desk.spawn()
+        desk.place(hwnd, rects[slot])
+        wd.track(slot, pid, hwnd, rects[slot])
+        jobs.add(JobSpec(f"job{slot}", "noop", {"type": "interval", "interval": 3600},
+                         target={"label": f"微信{slot + 1}", "hwnd": hwnd}))
+    wd.start(interval=0.05)
+
+    rnd = random.Random(3)
+    desk.kill(wd.tracked()[args.instances].pid)  # start the crash loop
+    for _ in range(args.kills):
+        t = wd.tracked()[rnd.randrange(args.instances)]
+        desk.kill(t.pid)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline and not desk.is_alive(wd.tracked()[t.slot].pid):
+            time.sleep(0.01)
+    time.sleep(1.5)
+    wd.stop()
+
+    ttr = [r.time_to_recovery for r in wd.recoveries if r.slot < args.instances]
+    in_slot = all(desk.rects.get(t.hwnd) == rects[t.slot] for t in wd.tracked()[:args.instances])
+    live_hwnds = {t.hwnd for t in wd.tracked()}
+    stale = [s.job_id for s in jobs.specs() if s.target["hwnd"] not in live_hwnds]
+    looper = wd.tracked()[args.instances]
+    print(f"instances: {args.instances}, kills: {args.kills}, startup {args.startup_ms:g} ms")
+    print(f"recovered {len(ttr)}/{args.kills}: time to recovery median {statistics.median(ttr) * 1000:.0f} ms, "
+          f"max {max(ttr) * 1000:.0f} ms")
+    print(f"all windows back in their slot: {in_slot}; jobs still pointing at dead hwnds: {len(stale)}")
+    print(f"crash-looping instance: {looper.state} after {len(looper.deaths)} exits "
+          f"({'ok' if looper.state == STATE_GAVE_UP else 'NOT given up'})")
+    print(f"metrics: {wd.metrics()}")
+    sched.stop()
+    store.close()
+    ok = in_slot and not stale and looper.state == STATE_GAVE_UP
+    ok &= check_tracking()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
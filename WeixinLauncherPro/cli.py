@@ -0,0 +1,272 @@
+"""Headless command line for scripts and automation.
+
+Usage:
+  python -m WeixinLauncherPro list [--json]
+  python -m WeixinLauncherPro launch --n 10 [--layout tile] [--json]
+  python -m WeixinLauncherPro arrange [--n 4] [--layout cascade]
+  python -m WeixinLauncherPro agent --bind 0.0.0.0 --token SECRET
+  python -m WeixinLauncherPro fleet fleet.json status|launch --n 5|arrange|push-profiles
+
+Settings default to the GUI's config.json; --exe / --class override them for
+one call. list/launch/arrange import only core modules (never tkinter or
+plugins), and the win32 bindings are loaded by the subcommands that need
+them, so `--help` and argument errors return without touching them. Finding
+windows needs psutil and pywin32, which make up most of a launch's import
+time (see bench/bench_cli.py); that floor can't be deferred further.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+LAYOUTS = ("cascade", "tile", "none")
+
+
+def _fail(msg: str, code: int = 2) -> int:
+    print(f"error: {msg}", file=sys.stderr)
+    return code
+
+
+def _window_row(w) -> dict:
+    return {"label": w["label"], "hwnd": w["hwnd"], "pid": w.get("pid"), "title": w.get("title") or "",
+            "class": w.get("class") or "", "identity": w.get("identity")}
+
+
+def _arrange(cfg, ws, layout: str, use_json: bool) -> int:
+    from core import windows
+    if layout == "none" or not ws:
+        return 0
+    if cfg.base_rect is None:
+        return _fail("no base rect saved; run the GUI setup wizard once or pass --layout none")
+    rects = windows.layout_rects(cfg, len(ws), layout)
+    windows.set_rects([(w["hwnd"], r) for w, r in zip(ws, rects)])
+    if not use_json:
+        for w, r in zip(ws, rects):
+            print(f"{w['label']}\thwnd={w['hwnd']}\t-> {r.x},{r.y} {r.w}x{r.h}")
+    return 0
+
+
+def _numbered_windows(cfg):
+    """Current windows with the same persistent labels the GUI shows."""
+    from core import windows
+    from core.config import identities_path
+    from core.identity import IdentityIndex
+    idx = IdentityIndex(identities_path(), background=False)  # one pass, no registry lock to hold up
+    ws = windows.list_numbered_wechat_windows(cfg.exe_path, cfg.class_name, idx.number)
+    try:
+        idx.save()
+    except OSError:
+        pass
+    return ws
+
+
+def cmd_list(cfg, args) -> int:
+    ws = _numbered_windows(cfg)
+    if args.json:
+        print(json.dumps([_window_row(w) for w in ws], ensure_ascii=False))
+    else:
+        for w in ws:
+            print(f"{w['label']}\thwnd={w['hwnd']}\tpid={w.get('pid')}\t{w.get('title') or ''}")
+    return 0
+
+
+def cmd_arrange(cfg, args) -> int:
+    ws = _numbered_windows(cfg)
+    if args.n:
+        ws = ws[:args.n]
+    if not ws:
+        return _fail("no WeChat windows found", 1)
+    return _arrange(cfg, ws, args.layout or cfg.layout, args.json)
+
+
+def cmd_launch(cfg, args) -> int:
+    from core import windows
+    from core.weixin_launcher import launch_tracked
+
+    layout = args.layout or cfg.layout
+    if layout != "none" and cfg.base_rect is None:
+        return _fail("no base rect saved; run the GUI setup wizard once or pass --layout none")
+
+    t0 = time.monotonic()
+    results = launch_tracked(
+        cfg.exe_path, args.n,
+        lambda: windows.list_windows_by_exe(cfg.exe_path, cfg.class_name),
+        timeout_ms=args.timeout if args.timeout is not None else cfg.launch_timeout_ms,
+        max_inflight=args.concurrency or cfg.launch_concurrency,
+        max_gap_ms=args.delay if args.delay is not None else cfg.launch_delay_ms,
+        poll_ms=250,  # every poll is a full window + process-table scan (no event hook here)
+        on_result=None if args.json else (
+            lambda r: print(f"[launch {r.index}] pid={r.pid} " +
+                            (f"hwnd={r.hwnd} ready in {r.time_to_window:.2f}s" if r.ok else f"failed: {r.error}"))),
+    )
+    # the windows this launch produced, in launch order (not the first n by label)
+    by_hwnd = {w["hwnd"]: w for w in _numbered_windows(cfg)}
+    ws = [by_hwnd[r.hwnd] for r in results if r.ok and r.hwnd in by_hwnd]
+    code = _arrange(cfg, ws, layout, args.json)
+    ok = sum(1 for r in results if r.ok)
+    if args.json:
+        print(json.dumps({
+            "launched": [vars(r) for r in results],
+            "windows": [_window_row(w) for w in ws],
+            "elapsed": round(time.monotonic() - t0, 3),
+        }, ensure_ascii=False))
+    else:
+        print(f"{ok}/{args.n} instance(s) ready in {time.monotonic() - t0:.2f}s")
+    if code:
+        return code
+    return 0 if ok == args.n else 1
+
+
+def _agent_save(args):
+    """The agent's save_config (pushed changes, a generated token) that keeps --exe / --class out of config.json.
+
+    An overridden field is written with its value from the file, unless a
+    push has since changed it away from the override.
+    """
+    from dataclasses import replace
+    from core.config import load_config, save_config
+    overrides = {k: v for k, v in (("exe_path", args.exe or None), ("class_name", args.class_name)) if v is not None}
+    on_disk = load_config()
+    kept = {k: getattr(on_disk, k) for k in overrides}
+
+    def save(cfg):
+        save_config(replace(cfg, **{k: v for k, v in kept.items() if getattr(cfg, k) == overrides[k]}))
+    return save
+
+
+def cmd_agent(cfg, args) -> int:
+    """Headless long-running agent: registry, scheduler and persisted jobs behind the control API."""
+    from core import windows
+    from core.clipboard import create_clipboard
+    from core.config import ensure_control_token, identities_path, jobs_db_path
+    from core.context import AppContext
+    from core.control import AppBackend, ControlServer
+    from core.fleet import make_agent_handlers
+    from core.focus import FocusDispatcher
+    from core.identity import IdentityIndex
+    from core.jobstore import JobManager, JobStore
+    from core.logger import Logger
+    from core.scheduler import Scheduler
+    from plugins.scheduler.actions import ACTION_FOCUS_AND_COPY, make_focus_and_copy
+
+    if args.bind not in ("127.0.0.1", "localhost") and not args.token:
+        return _fail("--token is required when binding to a non-loopback address")
+    log = Logger(lambda m: print(m, flush=True))
+    scheduler = Scheduler(log.info, workers=cfg.scheduler_workers)
+    scheduler.start()
+    store = JobStore(jobs_db_path())
+    jobs = JobManager(scheduler, store, log.info)
+    identities = IdentityIndex(identities_path())
+    registry = windows.create_registry(cfg.exe_path, cfg.class_name, identities.number)
+    identities.on_account = registry.republish
+    registry.start()
+    focus = FocusDispatcher(windows.focus, min_dwell_ms=cfg.focus_dwell_ms, on_log=log.info)
+    focus.start()
+    ctx = AppContext(cfg=cfg, log=log, scheduler=scheduler, windows=windows, registry=registry, jobs=jobs,
+                     focus=focus, clipboard=create_clipboard(), identities=identities)
+    jobs.register_action(ACTION_FOCUS_AND_COPY, make_focus_and_copy(ctx))
+    jobs.restore()
+
+    save = _agent_save(args)
+    srv = ControlServer(make_agent_handlers(AppBackend(ctx), cfg, save=save), host=args.bind,
+                        port=args.port or cfg.control_port, token=args.token or ensure_control_token(cfg, save),
+                        on_log=log.info)
+    srv.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.stop()
+        jobs.checkpoint()
+        store.close()
+        scheduler.stop()
+        focus.stop()
+        registry.stop()
+        identities.save()
+    return 0
+
+
+def cmd_fleet(cfg, args) -> int:
+    from core.fleet import Coordinator, load_fleet
+    fleet = load_fleet(args.file)
+    coord = Coordinator(fleet.agents, concurrency=args.concurrency, timeout=args.timeout)
+    if args.action == "status":
+        print(json.dumps(coord.status(), ensure_ascii=False, indent=2))
+        return 0
+    if args.action == "launch":
+        replies = coord.launch(args.n or 1, args.layout)
+    elif args.action == "arrange":
+        replies = coord.arrange(args.layout, args.n)
+    else:
+        replies = coord.push_profiles(fleet.profiles)
+    for r in replies:
+        detail = json.dumps(r.result, ensure_ascii=False) if r.ok else r.error
+        print(f"{r.agent}\t{'ok' if r.ok else 'FAIL'}\t{r.elapsed:.2f}s\t{detail}")
+    return 0 if all(r.ok for r in replies) else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="WeixinLauncherPro", description="微信多开启动器（命令行）")
+    ap.add_argument("--exe", help="WeiXin.exe path (default: from config.json)")
+    ap.add_argument("--class", dest="class_name", help="window class filter (default: from config.json)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("list", help="list numbered WeChat windows")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("launch", help="launch N instances and arrange them")
+    p.add_argument("--n", type=int, required=True)
+    p.add_argument("--layout", choices=LAYOUTS)
+    p.add_argument("--delay", type=int, help="max gap between launches in ms")
+    p.add_argument("--timeout", type=int, help="per-instance window timeout in ms")
+    p.add_argument("--concurrency", type=int, help="instances waiting for their window at once")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_launch)
+
+    p = sub.add_parser("arrange", help="arrange already running windows")
+    p.add_argument("--n", type=int, help="only the first N windows")
+    p.add_argument("--layout", choices=LAYOUTS)
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(func=cmd_arrange)
+
+    p = sub.add_parser("agent", help="serve the control API for a fleet coordinator")
+    p.add_argument("--bind", default="127.0.0.1")
+    p.add_argument("--port", type=int, help="default: control_port from config.json")
+    p.add_argument("--token", default="", help="default: control_token from config.json (generated if unset)")
+    p.set_defaults(func=cmd_agent)
+
+    p = sub.add_parser("fleet", help="drive several agents from a fleet file")
+    p.add_argument("file", help="fleet JSON: agents + layout profiles")
+    p.add_argument("action", choices=("status", "launch", "arrange", "push-profiles"))
+    p.add_argument("--n", type=int)
+    p.add_argument("--layout", choices=LAYOUTS)
+    p.add_argument("--concurrency", type=int, default=16)
+    p.add_argument("--timeout", type=float, default=5.0)
+    p.set_defaults(func=cmd_fleet)
+    return ap
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    from core.config import load_config
+    cfg = load_config()
+    if args.exe:
+        cfg.exe_path = args.exe
+    if args.class_name is not None:
+        cfg.class_name = args.class_name
+    if getattr(args, "n", None) is not None and args.n < 1:
+        return _fail("--n must be at least 1")
+    try:
+        return args.func(cfg, args)
+    except ImportError as e:
+        return _fail(f"{e} (this command needs Windows with pywin32 and psutil installed)")
+    except KeyboardInterrupt:
+        return 130
+
+
+if __name__ == "__main__":
+    sys.exit(main())
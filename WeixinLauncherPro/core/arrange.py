@@ -0,0 +1,87 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.config import Rect
+
+
+@dataclass
+class Placement:
+    slot: int
+    rect: Rect
+    hwnd: Optional[int] = None
+    detected_at: Optional[float] = None  # seconds since the arranger started
+    placed_at: Optional[float] = None
+
+    @property
+    def placed(self) -> bool:
+        return self.placed_at is not None
+
+
+class StreamingArranger:
+    """Reserve layout slots up front and move windows into them as they appear.
+
+    submit() only queues a move; tick() applies everything queued since the
+    last frame in one ``apply_batch([(hwnd, rect), ...])`` call, at most once
+    per ``frame_ms``. flush() applies the remainder immediately.
+    """
+
+    def __init__(self, rects: Sequence[Rect],
+                 apply_batch: Callable[[List[Tuple[int, Rect]]], None],
+                 frame_ms: int = 16,
+                 clock: Callable[[], float] = time.monotonic):
+        self.slots: List[Placement] = [Placement(i, r) for i, r in enumerate(rects)]
+        self._apply = apply_batch
+        self._frame_s = max(0, frame_ms) / 1000.0
+        self._clock = clock
+        self._t0 = clock()
+        self._last_flush = float("-inf")
+        self._queue: List[Placement] = []
+        self._lock = threading.Lock()
+        self.batches = 0
+
+    def elapsed(self) -> float:
+        return self._clock() - self._t0
+
+    def submit(self, slot: int, hwnd: int) -> bool:
+        """Queue ``hwnd`` for ``slot``; False if the slot doesn't exist or is already taken."""
+        with self._lock:
+            if not 0 <= slot < len(self.slots) or self.slots[slot].hwnd is not None:
+                return False
+            p = self.slots[slot]
+            p.hwnd = int(hwnd)
+            p.detected_at = self.elapsed()
+            self._queue.append(p)
+            return True
+
+    def tick(self) -> int:
+        """Apply queued moves if a frame has passed since the last batch; returns windows moved."""
+        if self._clock() - self._last_flush < self._frame_s:
+            return 0
+        return self.flush()
+
+    def flush(self) -> int:
+        with self._lock:
+            batch, self._queue = self._queue, []
+        if not batch:
+            return 0
+        self._last_flush = self._clock()
+        self._apply([(p.hwnd, p.rect) for p in batch])
+        now = self.elapsed()
+        for p in batch:
+            p.placed_at = now
+        self.batches += 1
+        return len(batch)
+
+    def report(self) -> List[Dict]:
+        return [
+            {
+                "slot": p.slot + 1,
+                "hwnd": p.hwnd,
+                "rect": p.rect,
+                "detected_at": p.detected_at,
+                "placed_at": p.placed_at,
+            }
+            for p in self.slots
+        ]
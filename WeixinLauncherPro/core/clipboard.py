@@ -0,0 +1,132 @@
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional, Protocol
+
+
+class ClipboardBackend(Protocol):
+    def set_text(self, text: str) -> None: ...
+
+
+class Win32ClipboardBackend:
+    """Native clipboard via pywin32; safe to call from any thread."""
+
+    def __init__(self, retries: int = 5, retry_ms: int = 20):
+        import win32clipboard
+        import win32con
+        self._cb = win32clipboard
+        self._fmt = win32con.CF_UNICODETEXT
+        self.retries = retries
+        self.retry_s = retry_ms / 1000.0
+
+    def set_text(self, text: str) -> None:
+        # another process may be holding the clipboard for a moment
+        for attempt in range(self.retries):
+            try:
+                self._cb.OpenClipboard()
+                break
+            except Exception:
+                if attempt == self.retries - 1:
+                    raise
+                time.sleep(self.retry_s)
+        try:
+            self._cb.EmptyClipboard()
+            self._cb.SetClipboardData(self._fmt, text)
+        finally:
+            self._cb.CloseClipboard()
+
+
+class TkClipboardBackend:
+    """Clipboard through the app's existing Tk root; must run on the Tk thread."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def set_text(self, text: str) -> None:
+        self.root.clipboard_clear()
+        self.root.clipboard_append(text)
+        self.root.update_idletasks()
+
+
+class FakeClipboardBackend:
+    """Headless backend for tests and benchmarks: records every write."""
+
+    def __init__(self):
+        self.text = ""
+        self.writes: List[str] = []
+
+    def set_text(self, text: str) -> None:
+        self.text = text
+        self.writes.append(text)
+
+
+class ClipboardService:
+    """One clipboard owner for the whole app.
+
+    copy() returns a Future that resolves once the text is on the clipboard:
+    True if it landed, False if a newer copy() superseded it before the write
+    happened (requests pending at the same time are coalesced into one write).
+    With ``post`` (e.g. ``lambda fn: root.after(0, fn)``) writes are marshalled
+    onto the owning loop; calls made on that loop's own thread write inline.
+    """
+
+    def __init__(self, backend: ClipboardBackend, post: Optional[Callable[[Callable[[], None]], None]] = None):
+        self.backend = backend
+        self._post = post
+        self._owner = threading.get_ident()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._text: Optional[str] = None
+        self._waiters: List[Future] = []
+        self.requests = 0
+        self.writes = 0
+        self.coalesced = 0
+
+    def copy(self, text: str) -> Future:
+        fut: Future = Future()
+        with self._lock:
+            self.requests += 1
+            queued = self._text is not None
+            if queued:
+                self.coalesced += 1
+            self._text = text
+            self._waiters.append(fut)
+        if not queued:
+            if self._post is None or threading.get_ident() == self._owner:
+                self._drain()
+            else:
+                self._post(self._drain)
+        return fut
+
+    def copy_sync(self, text: str, timeout: Optional[float] = 5.0) -> bool:
+        return self.copy(text).result(timeout)
+
+    def stats(self):
+        return {"requests": self.requests, "writes": self.writes, "coalesced": self.coalesced}
+
+    def _drain(self):
+        with self._lock:
+            text, waiters = self._text, self._waiters
+            self._text, self._waiters = None, []
+        if text is None:
+            return
+        try:
+            with self._write_lock:
+                self.backend.set_text(text)
+                self.writes += 1
+        except Exception as e:
+            for f in waiters:
+                f.set_exception(e)
+            return
+        for i, f in enumerate(waiters):
+            f.set_result(i == len(waiters) - 1)
+
+
+def create_clipboard(root=None) -> ClipboardService:
+    """Native backend when pywin32 is available, else the Tk root marshalled through after()."""
+    try:
+        return ClipboardService(Win32ClipboardBackend())
+    except ImportError:
+        if root is None:
+            raise
+        return ClipboardService(TkClipboardBackend(root), post=lambda fn: root.after(0, fn))
@@ -1,10 +1,14 @@
 import os
 import json
 from dataclasses import dataclass, asdict
-from typing import Optional
+from typing import Callable, Optional
 
 APP_NAME = "WeixinMultiLauncher"
 CONFIG_FILE = "config.json"
+JOBS_DB_FILE = "jobs.sqlite3"
+IDENTITIES_FILE = "identities.json"
+SNAPSHOTS_FILE = "layouts.json"
+LOG_FILE = os.path.join("logs", "launcher.jsonl")
 DEFAULT_WEIXIN_PATH = r"C:\Program Files\Tencent\Weixin\WeiXin.exe"
 
 
@@ -21,10 +25,34 @@ class AppConfig:
     exe_path: str = DEFAULT_WEIXIN_PATH
     class_name: str = ""
     base_rect: Optional[Rect] = None
-    layout: str = "cascade"   # cascade / tile
+    layout: str = "cascade"   # cascade / tile / any strategy registered in core.layout
+    layout_all_monitors: bool = True  # False = keep every window on the base rect's monitor
     cascade_dx: int = 30
     cascade_dy: int = 30
     launch_delay_ms: int = 800
+    launch_timeout_ms: int = 30000
+    launch_concurrency: int = 1
+    stream_arrange: bool = False
+    scheduler_workers: int = 4
+    focus_dwell_ms: int = 300
+    log_to_file: bool = False
+    log_max_lines: int = 2000
+    auto_refresh_ms: int = 1000  # 0 = manual refresh only
+    control_enabled: bool = False
+    control_port: int = 47653
+    control_token: str = ""
+    idle_enabled: bool = False
+    idle_after_s: int = 300
+    idle_trim: bool = True
+    idle_priority: str = "below_normal"  # "" / below_normal / idle
+    idle_spread_affinity: bool = False
+    idle_dry_run: bool = False
+    watchdog_enabled: bool = False
+    watchdog_max_restarts: int = 5  # per instance within 5 minutes, then treat it as a crash loop
+    snapshot_autosave: bool = True  # save the current arrangement as "上次退出" on exit
+    snapshot_on_start: str = ""     # name of a layout snapshot to restore at startup ("" = none)
+    plugin_isolation: bool = False  # run plugin workers (manifest "worker") in child processes
+    plugin_hang_s: int = 30         # isolated worker stuck in one task this long gets restarted
 
 
 def _config_dir() -> str:
@@ -38,6 +66,22 @@ def config_path() -> str:
     return os.path.join(_config_dir(), CONFIG_FILE)
 
 
+def jobs_db_path() -> str:
+    return os.path.join(_config_dir(), JOBS_DB_FILE)
+
+
+def identities_path() -> str:
+    return os.path.join(_config_dir(), IDENTITIES_FILE)
+
+
+def snapshots_path() -> str:
+    return os.path.join(_config_dir(), SNAPSHOTS_FILE)
+
+
+def log_path() -> str:
+    return os.path.join(_config_dir(), LOG_FILE)
+
+
 def load_config() -> AppConfig:
     path = config_path()
     if not os.path.exists(path):
@@ -53,6 +97,64 @@ def load_config() -> AppConfig:
         return AppConfig()
 
 
+def _check_field(name: str, value):
+    """The value to store for config field ``name``; ValueError if its type doesn't match the field default's."""
+    if name == "base_rect":
+        if value is None or isinstance(value, Rect):
+            return value
+        if (isinstance(value, dict) and set(value) == {"x", "y", "w", "h"}
+                and all(isinstance(v, int) and not isinstance(v, bool) for v in value.values())):
+            return Rect(**value)
+        raise ValueError("base_rect: expected null or {x, y, w, h} integers")
+    want = type(AppConfig.__dataclass_fields__[name].default)
+    if want is bool:
+        ok = isinstance(value, bool)
+    elif want is int:
+        ok = isinstance(value, int) and not isinstance(value, bool)
+    elif want is float:
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+    else:
+        ok = isinstance(value, want)
+    if not ok:
+        raise ValueError(f"{name}: expected {want.__name__}, got {type(value).__name__}")
+    return value
+
+
+def update_config(cfg: AppConfig, fields: dict) -> list:
+    """Apply a partial config (e.g. pushed by a fleet coordinator) in place; returns the changed keys.
+
+    Every value must have the type of its field's default (an int field takes
+    an int, not a bool or a string). Any unknown key or mismatch rejects the
+    whole batch before anything is changed.
+    """
+    unknown = sorted(k for k in fields if k not in AppConfig.__dataclass_fields__)
+    if unknown:
+        raise KeyError(f"unknown config field(s): {', '.join(unknown)}")
+    errors, checked = [], {}
+    for k, v in fields.items():
+        try:
+            checked[k] = _check_field(k, v)
+        except ValueError as e:
+            errors.append(str(e))
+    if errors:
+        raise ValueError("invalid config: " + "; ".join(errors))
+    changed = []
+    for k, v in checked.items():
+        if getattr(cfg, k) != v:
+            setattr(cfg, k, v)
+            changed.append(k)
+    return changed
+
+
+def ensure_control_token(cfg: AppConfig, save: Optional[Callable[[AppConfig], None]] = None) -> str:
+    """The control API token; a random one is generated and saved (``save``, default save_config) if none is set."""
+    if not cfg.control_token:
+        import secrets  # kept off the CLI import path; only used here
+        cfg.control_token = secrets.token_urlsafe(24)
+        (save or save_config)(cfg)
+    return cfg.control_token
+
+
 def save_config(cfg: AppConfig) -> None:
     raw = asdict(cfg)
     if cfg.base_rect is not None:
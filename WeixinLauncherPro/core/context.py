@@ -1,7 +1,16 @@
 from dataclasses import dataclass
+from typing import Optional
 from core.config import AppConfig
 from core.logger import Logger
 from core.scheduler import Scheduler
+from core.registry import WindowRegistry
+from core.jobstore import JobManager
+from core.focus import FocusDispatcher
+from core.clipboard import ClipboardService
+from core.tasks import TaskRunner
+from core.watchdog import Watchdog
+from core.identity import IdentityIndex
+from core.snapshots import SnapshotStore
 from core import windows
 
 
@@ -11,3 +20,20 @@ class AppContext:
     log: Logger
     scheduler: Scheduler
     windows: windows
+    registry: Optional[WindowRegistry] = None
+    jobs: Optional[JobManager] = None
+    focus: Optional[FocusDispatcher] = None
+    clipboard: Optional[ClipboardService] = None
+    tasks: Optional[TaskRunner] = None
+    watchdog: Optional[Watchdog] = None
+    identities: Optional[IdentityIndex] = None
+    snapshots: Optional[SnapshotStore] = None
+
+    def wechat_windows(self):
+        """Numbered WeChat windows, from the registry when available (no rescan)."""
+        if self.registry is not None:
+            return self.registry.snapshot()
+        if self.identities is not None:
+            return self.windows.list_numbered_wechat_windows(self.cfg.exe_path, self.cfg.class_name,
+                                                             self.identities.number)
+        return self.windows.list_numbered_wechat_windows(self.cfg.exe_path, self.cfg.class_name)
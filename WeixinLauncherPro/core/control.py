@@ -0,0 +1,438 @@
+"""Local control API for a running launcher.
+
+Wire format: one compact JSON object per line, UTF-8.
+  request : {"id": 7, "op": "windows.focus", "args": {"label": "微信3"}}
+  response: {"id": 7, "ok": true, "result": ...} / {"id": 7, "ok": false, "error": "..."}
+
+Clients may pipeline: send any number of requests without waiting. Each
+connection is served by its own thread, requests are handled in order and
+every response for a received chunk goes out in a single write. The server
+always requires a token: the first request on a connection must be
+{"op": "hello", "args": {"token": ...}}. A line that is not a JSON object
+(e.g. an HTTP request line from a browser's cross-protocol POST) closes the
+connection without running anything.
+"""
+
+import hmac
+import json
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Sequence
+
+Handler = Callable[[Dict], object]
+
+MAX_LINE = 1 << 20
+
+
+class ControlError(Exception):
+    """Raised by handlers for a request-level failure (reported back, connection stays open)."""
+
+
+class RemoteError(Exception):
+    """Raised by ControlClient.call when the server answered ok=false."""
+
+
+class _ConnHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        srv: "ControlServer" = self.server.owner  # type: ignore[attr-defined]
+        sock: socket.socket = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        authed = False
+        buf = b""
+        while True:
+            try:
+                chunk = sock.recv(65536)
+            except OSError:
+                return
+            if not chunk:
+                return
+            buf += chunk
+            if b"\n" not in buf:
+                if len(buf) > MAX_LINE:
+                    return
+                continue
+            *lines, buf = buf.split(b"\n")
+            out = []
+            for line in lines:
+                if not line.strip():
+                    continue
+                resp, authed, close = srv._handle_line(line, authed)
+                out.append(resp)
+                if close:
+                    break
+            try:
+                sock.sendall(b"".join(out))
+            except OSError:
+                return
+            if not authed:
+                return
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ControlServer:
+    """Serves ``handlers`` (op name -> fn(args) -> JSON-able result) on localhost."""
+
+    def __init__(self, handlers: Dict[str, Handler], host: str = "127.0.0.1", port: int = 0,
+                 token: str = "", on_log: Optional[Callable[[str], None]] = None):
+        if not token:
+            raise ValueError("control server needs a token (see config.ensure_control_token)")
+        self.handlers = dict(handlers)
+        self.handlers.setdefault("ping", lambda a: "pong")
+        self.handlers.setdefault("ops", lambda a: sorted(self.handlers))
+        self.token = token
+        self._log = on_log or (lambda m: None)
+        self._srv = _TCPServer((host, port), _ConnHandler)
+        self._srv.owner = self  # type: ignore[attr-defined]
+        self._thread: Optional[threading.Thread] = None
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def address(self):
+        return self._srv.server_address
+
+    def start(self):
+        self._thread = threading.Thread(target=self._srv.serve_forever, name="ControlServer", daemon=True)
+        self._thread.start()
+        host, port = self.address[:2]
+        self._log(f"[Control] listening on {host}:{port}")
+
+    def stop(self):
+        self._srv.shutdown()
+        self._srv.server_close()
+
+    def _handle_line(self, line: bytes, authed: bool):
+        """Returns (response bytes, authed, close)."""
+        rid = None
+        try:
+            req = json.loads(line)
+        except ValueError:
+            req = None
+        if not isinstance(req, dict):
+            # not our protocol (an HTTP request, garbage): answer once and hang up
+            self.errors += 1
+            return self._encode(None, False, "bad request"), False, True
+        try:
+            rid = req.get("id")
+            op = req.get("op")
+            args = req.get("args") or {}
+            if op == "hello":
+                token = args.get("token")
+                ok = isinstance(token, str) and hmac.compare_digest(token.encode("utf-8"),
+                                                                    self.token.encode("utf-8"))
+                if not ok:
+                    return self._encode(rid, False, "bad token"), False, True
+                return self._encode(rid, True, {"ops": sorted(self.handlers)}), True, False
+            if not authed:
+                return self._encode(rid, False, "hello with token required"), False, True
+            fn = self.handlers.get(op)
+            if fn is None:
+                raise ControlError(f"unknown op: {op!r}")
+            self.requests += 1
+            return self._encode(rid, True, fn(args)), authed, False
+        except (ControlError, ValueError, KeyError, TypeError) as e:
+            self.errors += 1
+            return self._encode(rid, False, str(e)), authed, False
+        except Exception as e:
+            self.errors += 1
+            self._log(f"[Control] request failed: {e}")
+            return self._encode(rid, False, f"internal error: {e}"), authed, False
+
+    @staticmethod
+    def _encode(rid, ok: bool, payload) -> bytes:
+        msg = {"id": rid, "ok": ok, "result" if ok else "error": payload}
+        return json.dumps(msg, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class ControlClient:
+    """Blocking client; call() for one request, pipeline() to send a batch before reading replies."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, token: str = "", timeout: float = 10.0):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._buf = b""
+        self._seq = 0
+        if token:
+            self.call("hello", token=token)
+
+    def close(self):
+        self._sock.close()
+
+    def settimeout(self, timeout: Optional[float]):
+        """Timeout for each read from here on (``timeout`` in the constructor covers connecting and hello)."""
+        self._sock.settimeout(timeout)
+
+    def call(self, op: str, **args):
+        return self._unwrap(self.pipeline([(op, args)])[0])
+
+    def pipeline(self, requests: Sequence, on_reply: Optional[Callable[[int, Dict], None]] = None) -> List[Dict]:
+        """Send (op, args) pairs in one write, then read one reply per request (raw dicts, in order)."""
+        first = self._seq + 1
+        lines = []
+        for op, args in requests:
+            self._seq += 1
+            lines.append(json.dumps({"id": self._seq, "op": op, "args": args}, ensure_ascii=False,
+                                    separators=(",", ":")))
+        self._sock.sendall(("\n".join(lines) + "\n").encode("utf-8"))
+        out: List[Dict] = []
+        while len(out) < len(lines):
+            while b"\n" not in self._buf:
+                chunk = self._sock.recv(65536)
+                if not chunk:
+                    raise ConnectionError("control server closed the connection")
+                self._buf += chunk
+            line, self._buf = self._buf.split(b"\n", 1)
+            reply = json.loads(line)
+            out.append(reply)
+            if on_reply:
+                on_reply(reply.get("id", first) - first, reply)
+        return out
+
+    @staticmethod
+    def _unwrap(reply: Dict):
+        if not reply.get("ok"):
+            raise RemoteError(reply.get("error", "unknown error"))
+        return reply.get("result")
+
+
+def _window_row(w: Dict) -> Dict:
+    return {"label": w["label"], "hwnd": w["hwnd"], "pid": w.get("pid"), "title": w.get("title") or "",
+            "identity": w.get("identity")}
+
+
+def _resolve(ws: Sequence[Dict], args: Dict) -> Dict:
+    hwnd, label, identity = args.get("hwnd"), args.get("label"), args.get("identity")
+    for w in ws:
+        if ((hwnd is not None and w["hwnd"] == hwnd) or (label is not None and w["label"] == label)
+                or (identity is not None and w.get("identity") == identity)):
+            return w
+    raise ControlError(f"window not found: {identity or label or hwnd}")
+
+
+class AppBackend:
+    """Control operations against a live AppContext (windows, launch pipeline, jobs)."""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self._launch_lock = threading.Lock()
+
+    def list_windows(self) -> List[Dict]:
+        return [_window_row(w) for w in self.ctx.wechat_windows()]
+
+    def focus(self, args: Dict) -> Dict:
+        w = _resolve(self.ctx.wechat_windows(), args)
+        if self.ctx.focus is not None:
+            self.ctx.focus.run(w["hwnd"], timeout=10.0)
+        else:
+            self.ctx.windows.focus(w["hwnd"])
+        return _window_row(w)
+
+    def arrange(self, n: Optional[int], layout: Optional[str]) -> int:
+        ws = list(self.ctx.wechat_windows())[:n] if n else list(self.ctx.wechat_windows())
+        return len(self._place([w["hwnd"] for w in ws], layout))
+
+    def _place(self, hwnds: List[int], layout: Optional[str]) -> List:
+        """Lay out ``hwnds`` in order; returns the rects used."""
+        cfg = self.ctx.cfg
+        if cfg.base_rect is None:
+            raise ControlError("no base rect saved")
+        rects = self.ctx.windows.layout_rects(cfg, len(hwnds), layout)
+        self.ctx.windows.set_rects(list(zip(hwnds, rects)))
+        return rects
+
+    def launch(self, n: int, layout: Optional[str]) -> Dict:
+        from core.weixin_launcher import launch_tracked
+        cfg = self.ctx.cfg
+        if not self._launch_lock.acquire(blocking=False):
+            raise ControlError("a launch is already running")
+        try:
+            t0 = time.monotonic()
+            registry = self.ctx.registry
+            list_windows = (registry.snapshot if registry is not None and registry.is_live()
+                            else lambda: self.ctx.windows.list_windows_by_exe(cfg.exe_path, cfg.class_name))
+            results = launch_tracked(cfg.exe_path, n, list_windows, timeout_ms=cfg.launch_timeout_ms,
+                                     max_inflight=cfg.launch_concurrency, max_gap_ms=cfg.launch_delay_ms)
+            if registry is not None:
+                registry.reconcile()
+            # the windows this launch produced, in launch order (not the first n by label)
+            hwnds = [r.hwnd for r in results if r.ok]
+            rects = self._place(hwnds, layout) if layout != "none" and cfg.base_rect and hwnds else []
+            if self.ctx.watchdog is not None and cfg.watchdog_enabled:
+                self.ctx.watchdog.track_launch(results, {h: i for i, h in enumerate(hwnds)}, rects)
+            return {"ready": len(hwnds), "placed": len(rects),
+                    "elapsed": round(time.monotonic() - t0, 3)}
+        finally:
+            self._launch_lock.release()
+
+    def reconfigure(self, changed: Sequence[str]):
+        """Apply changed config fields to the running services (registry window filters)."""
+        if self.ctx.registry is not None and {"exe_path", "class_name"} & set(changed):
+            self.ctx.registry.configure(self.ctx.cfg.exe_path, self.ctx.cfg.class_name)
+
+    def _snapshots(self):
+        if self.ctx.snapshots is None or self.ctx.identities is None:
+            raise ControlError("layout snapshots are not available")
+        return self.ctx.snapshots
+
+    def list_snapshots(self) -> List[Dict]:
+        store = self._snapshots()
+        return [{"name": s.name, "saved_at": s.saved_at, "windows": len(s.entries)}
+                for s in (store.get(n) for n in store.names()) if s is not None]
+
+    def save_snapshot(self, name: str) -> int:
+        store = self._snapshots()
+        snap = self.ctx.windows.save_snapshot(store, name, list(self.ctx.wechat_windows()))
+        store.save()
+        return len(snap.entries)
+
+    def restore_snapshot(self, name: str) -> Dict:
+        store = self._snapshots()
+        if store.get(name) is None:
+            raise ControlError(f"unknown snapshot: {name}")
+        res = self.ctx.windows.restore_snapshot(store, name, self.ctx.identities.hwnd_of)
+        return {"moved": res.applied.moved, "unchanged": res.applied.unchanged, "missing": res.missing,
+                "elapsed": round(res.elapsed, 4)}
+
+    def list_jobs(self) -> List[Dict]:
+        jobs = self.ctx.jobs
+        out = []
+        for j in self.ctx.scheduler.list_jobs():
+            spec = jobs.get(j.job_id) if jobs else None
+            out.append({"job_id": j.job_id, "trigger": j.describe(), "enabled": j.enabled,
+                        "next_fire": self.ctx.scheduler.next_fire(j.job_id),
+                        "target": spec.target if spec else None, "payload": spec.payload if spec else None})
+        return out
+
+    def add_job(self, args: Dict) -> str:
+        from core.jobstore import JobSpec
+        if self.ctx.jobs is None:
+            raise ControlError("job persistence is not available")
+        spec = JobSpec(
+            job_id=args.get("job_id") or str(uuid.uuid4())[:8],
+            action_type=args["action_type"], trigger=args["trigger"],
+            target=args.get("target") or {}, payload=args.get("payload") or {},
+            overlap=args.get("overlap", "skip"), timeout_sec=float(args.get("timeout_sec", 0.0)),
+        )
+        if not self.ctx.jobs.add(spec):
+            raise ControlError(f"job {spec.job_id} rejected (unknown action or bad trigger)")
+        return spec.job_id
+
+    def remove_job(self, job_id: str) -> bool:
+        if self.ctx.jobs is not None:
+            self.ctx.jobs.remove(job_id)
+        else:
+            self.ctx.scheduler.remove(job_id)
+        return True
+
+    def stats(self) -> Dict:
+        out = {"scheduler": self.ctx.scheduler.metrics()}
+        if self.ctx.registry is not None:
+            out["registry"] = self.ctx.registry.stats()
+        if self.ctx.focus is not None:
+            out["focus"] = self.ctx.focus.metrics()
+        if self.ctx.watchdog is not None:
+            out["watchdog"] = self.ctx.watchdog.metrics()
+        return out
+
+
+class SimBackend:
+    """In-memory stand-in for AppBackend: fake windows, instant launch/arrange, a dict of jobs."""
+
+    def __init__(self, windows: int = 20):
+        self._lock = threading.Lock()
+        self._windows = [{"label": f"微信{i}", "hwnd": 0x10000 + i, "pid": 1000 + i, "title": "微信"}
+                         for i in range(1, windows + 1)]
+        self._jobs: Dict[str, Dict] = {}
+        self.focused: Optional[int] = None
+        self.arranged = 0
+        self.reconfigured: List[str] = []
+        self._snaps: Dict[str, int] = {}
+
+    def list_windows(self) -> List[Dict]:
+        with self._lock:
+            return list(self._windows)
+
+    def focus(self, args: Dict) -> Dict:
+        w = _resolve(self.list_windows(), args)
+        self.focused = w["hwnd"]
+        return w
+
+    def arrange(self, n: Optional[int], layout: Optional[str]) -> int:
+        with self._lock:
+            count = min(n or len(self._windows), len(self._windows))
+        self.arranged += count
+        return count
+
+    def launch(self, n: int, layout: Optional[str]) -> Dict:
+        with self._lock:
+            base = len(self._windows)
+            for i in range(base + 1, base + n + 1):
+                self._windows.append({"label": f"微信{i}", "hwnd": 0x10000 + i, "pid": 1000 + i, "title": "微信"})
+        return {"ready": n, "placed": self.arrange(n, layout) if layout != "none" else 0, "elapsed": 0.0}
+
+    def reconfigure(self, changed: Sequence[str]):
+        with self._lock:
+            self.reconfigured.extend(changed)
+
+    def list_snapshots(self) -> List[Dict]:
+        with self._lock:
+            return [{"name": n, "saved_at": 0.0, "windows": c} for n, c in sorted(self._snaps.items())]
+
+    def save_snapshot(self, name: str) -> int:
+        with self._lock:
+            self._snaps[name] = len(self._windows)
+            return self._snaps[name]
+
+    def restore_snapshot(self, name: str) -> Dict:
+        with self._lock:
+            if name not in self._snaps:
+                raise ControlError(f"unknown snapshot: {name}")
+            return {"moved": self._snaps[name], "unchanged": 0, "missing": [], "elapsed": 0.0}
+
+    def list_jobs(self) -> List[Dict]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def add_job(self, args: Dict) -> str:
+        job_id = args.get("job_id") or str(uuid.uuid4())[:8]
+        with self._lock:
+            self._jobs[job_id] = {"job_id": job_id, "trigger": args["trigger"], "target": args.get("target"),
+                                  "payload": args.get("payload")}
+        return job_id
+
+    def remove_job(self, job_id: str) -> bool:
+        with self._lock:
+            return self._jobs.pop(job_id, None) is not None
+
+    def stats(self) -> Dict:
+        return {"windows": len(self._windows), "jobs": len(self._jobs), "reconfigured": list(self.reconfigured)}
+
+
+def make_handlers(backend) -> Dict[str, Handler]:
+    """The control protocol's ops, bound to an AppBackend or SimBackend."""
+    def n_arg(a):
+        n = a.get("n")
+        if n is not None and (not isinstance(n, int) or n < 1):
+            raise ControlError("n must be a positive integer")
+        return n
+
+    return {
+        "windows.list": lambda a: backend.list_windows(),
+        "windows.focus": backend.focus,
+        "arrange": lambda a: backend.arrange(n_arg(a), a.get("layout")),
+        "launch": lambda a: backend.launch(n_arg(a) or 1, a.get("layout")),
+        "snapshots.list": lambda a: backend.list_snapshots(),
+        "snapshots.save": lambda a: backend.save_snapshot(a["name"]),
+        "snapshots.restore": lambda a: backend.restore_snapshot(a["name"]),
+        "jobs.list": lambda a: backend.list_jobs(),
+        "jobs.add": backend.add_job,
+        "jobs.remove": lambda a: backend.remove_job(a["job_id"]),
+        "stats": lambda a: backend.stats(),
+    }
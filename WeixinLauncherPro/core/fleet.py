@@ -0,0 +1,178 @@
+"""Fleet mode: one agent per desktop, one coordinator driving them all.
+
+An agent is a ControlServer (see core.control) bound to a LAN address with a
+token, serving the usual window/launch/job ops plus ``config.get``,
+``config.apply`` and ``status``. The coordinator fans a request out to every
+agent with bounded concurrency and a per-call deadline, and aggregates the
+replies; agents that are down or slow show up as failed replies instead of
+stalling the rest.
+"""
+
+import json
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from core.config import AppConfig, update_config
+from core.control import ControlClient, ControlError, Handler, SimBackend, make_handlers
+
+
+@dataclass
+class AgentAddr:
+    name: str
+    host: str
+    port: int
+    token: str = ""
+    profile: str = ""  # layout profile pushed by push_profiles()
+
+
+@dataclass
+class AgentReply:
+    agent: str
+    ok: bool
+    result: object = None
+    error: str = ""
+    elapsed: float = 0.0
+
+
+@dataclass
+class Fleet:
+    agents: List[AgentAddr]
+    profiles: Dict[str, Dict] = field(default_factory=dict)
+
+
+def load_fleet(path: str) -> Fleet:
+    """Read {"agents": [{name, host, port, token, profile}], "profiles": {name: {config fields}}}."""
+    with open(path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+    agents = [AgentAddr(**a) for a in raw.get("agents", [])]
+    return Fleet(agents=agents, profiles=raw.get("profiles", {}))
+
+
+def make_agent_handlers(backend, cfg: AppConfig, save: Optional[Callable[[AppConfig], None]] = None,
+                        name: str = "") -> Dict[str, Handler]:
+    """Control ops plus the config/status ops an agent answers to."""
+    started = time.time()
+    name = name or socket.gethostname()
+
+    def config_apply(a):
+        changed = update_config(cfg, a.get("fields") or {})
+        if changed:
+            if save is not None:
+                save(cfg)
+            backend.reconfigure(changed)  # same as the settings dialog: live services pick up the new filters
+        return {"changed": changed}
+
+    def status(a):
+        return {"name": name, "uptime": round(time.time() - started, 1),
+                "windows": len(backend.list_windows()), "jobs": len(backend.list_jobs()),
+                "layout": cfg.layout}
+
+    h = make_handlers(backend)
+    h.update({
+        "config.get": lambda a: asdict(cfg),
+        "config.apply": config_apply,
+        "status": status,
+    })
+    return h
+
+
+def sim_agent_handlers(name: str, windows: int = 20, latency_ms: float = 0.0) -> Dict[str, Handler]:
+    """Agent ops over SimBackend and an in-memory config, each call delayed by ``latency_ms``."""
+    handlers = make_agent_handlers(SimBackend(windows=windows), AppConfig(), name=name)
+    if latency_ms <= 0:
+        return handlers
+    delay = latency_ms / 1000.0
+
+    def slow(fn):
+        def wrapped(a):
+            time.sleep(delay)
+            return fn(a)
+        return wrapped
+    return {op: slow(fn) for op, fn in handlers.items()}
+
+
+class Coordinator:
+    """Fans control requests out to agents with at most ``concurrency`` in flight.
+
+    ``timeout`` bounds connecting (and the token handshake) per agent and,
+    unless a call passes its own, waiting for the reply. A long call such as
+    launch keeps the short connect timeout, so an agent that is down still
+    fails fast. Replies come back in agent order.
+    """
+
+    def __init__(self, agents: List[AgentAddr], concurrency: int = 16, timeout: float = 5.0):
+        self.agents = list(agents)
+        self.concurrency = max(1, int(concurrency))
+        self.timeout = timeout
+
+    def call_all(self, op: str, args: Optional[Dict] = None, timeout: Optional[float] = None,
+                 per_agent: Optional[Callable[[AgentAddr], Optional[Dict]]] = None) -> List[AgentReply]:
+        """Run ``op`` on every agent; ``per_agent`` can supply agent-specific args (None skips it).
+
+        ``timeout`` is how long to wait for each reply once connected.
+        """
+        connect_s = self.timeout if timeout is None else min(self.timeout, timeout)
+        deadline_s = self.timeout if timeout is None else timeout
+        jobs = []
+        for a in self.agents:
+            a_args = per_agent(a) if per_agent else (args or {})
+            if a_args is not None:
+                jobs.append((a, a_args))
+
+        # every call is bounded by its socket timeout, so the fan-out as a whole is too
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, max(1, len(jobs)))) as pool:
+            replies = list(pool.map(lambda job: self._call_one(job[0], op, job[1], connect_s, deadline_s), jobs))
+        return replies
+
+    @staticmethod
+    def _call_one(a: AgentAddr, op: str, args: Dict, connect_s: float, timeout: float) -> AgentReply:
+        t0 = time.monotonic()
+        try:
+            c = ControlClient(a.host, a.port, token=a.token, timeout=connect_s)
+        except socket.timeout:
+            return AgentReply(a.name, False, error=f"connect timed out after {connect_s:g}s",
+                              elapsed=time.monotonic() - t0)
+        except Exception as e:
+            return AgentReply(a.name, False, error=str(e) or e.__class__.__name__, elapsed=time.monotonic() - t0)
+        try:
+            c.settimeout(timeout)
+            result = c.call(op, **args)
+            return AgentReply(a.name, True, result, elapsed=time.monotonic() - t0)
+        except socket.timeout:
+            return AgentReply(a.name, False, error=f"timed out after {timeout:g}s", elapsed=time.monotonic() - t0)
+        except Exception as e:
+            return AgentReply(a.name, False, error=str(e) or e.__class__.__name__, elapsed=time.monotonic() - t0)
+        finally:
+            c.close()
+
+    def status(self) -> Dict:
+        replies = self.call_all("status")
+        up = [r for r in replies if r.ok]
+        return {
+            "agents": len(replies),
+            "up": len(up),
+            "windows": sum(r.result.get("windows", 0) for r in up),
+            "jobs": sum(r.result.get("jobs", 0) for r in up),
+            "down": {r.agent: r.error for r in replies if not r.ok},
+            "slowest": max((r.elapsed for r in replies), default=0.0),
+        }
+
+    def push_config(self, fields: Dict) -> List[AgentReply]:
+        return self.call_all("config.apply", {"fields": fields})
+
+    def push_profiles(self, profiles: Dict[str, Dict]) -> List[AgentReply]:
+        """Send each agent the config fields of its own profile; agents without one are skipped."""
+        missing = sorted({a.profile for a in self.agents if a.profile and a.profile not in profiles})
+        if missing:
+            raise ControlError(f"unknown profile(s): {', '.join(missing)}")
+        return self.call_all("config.apply", per_agent=lambda a: {"fields": profiles[a.profile]} if a.profile else None)
+
+    def launch(self, n: int, layout: Optional[str] = None, timeout: float = 120.0) -> List[AgentReply]:
+        """Launch on every agent; ``timeout`` is the wait for each agent's launch to finish."""
+        return self.call_all("launch", {"n": n, "layout": layout}, timeout=timeout)
+
+    def arrange(self, layout: Optional[str] = None, n: Optional[int] = None) -> List[AgentReply]:
+        return self.call_all("arrange", {"n": n, "layout": layout})
@@ -0,0 +1,166 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Optional
+
+
+@dataclass
+class _Op:
+    hwnd: int
+    fn: Optional[Callable[[], object]]
+    label: str
+    future: Future = field(default_factory=Future)
+    submitted_at: float = 0.0
+
+
+class FocusDispatcher:
+    """Serializes everything that needs the foreground window.
+
+    Operations are queued per hwnd. The dispatcher thread focuses one window,
+    runs every queued operation for it (including ones that arrive meanwhile,
+    up to ``max_group`` in a row), stays at least ``min_dwell_ms`` on it, and
+    then moves to the window whose oldest operation has waited longest. So N
+    operations on K windows cost K focus switches instead of N, in a
+    deterministic order. Once the dwell is over (or the queue has drained)
+    the window is no longer assumed to be foreground; the next operation
+    for it focuses it again.
+    """
+
+    def __init__(self, focus: Callable[[int], None], min_dwell_ms: int = 300, max_group: int = 32,
+                 on_log: Optional[Callable[[str], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self._focus = focus
+        self.min_dwell_s = max(0, min_dwell_ms) / 1000.0
+        self.max_group = max(1, int(max_group))
+        self._log = on_log or (lambda m: None)
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._pending: "OrderedDict[int, Deque[_Op]]" = OrderedDict()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self.switches = 0
+        self.ops_done = 0
+        self._latencies: Deque[float] = deque(maxlen=1000)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="FocusDispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        with self._cond:
+            for q in self._pending.values():
+                for op in q:
+                    op.future.cancel()
+            self._pending.clear()
+
+    def submit(self, hwnd: int, fn: Optional[Callable[[], object]] = None, label: str = "") -> Future:
+        """Queue ``fn`` to run while ``hwnd`` is foreground (fn=None just focuses it)."""
+        op = _Op(int(hwnd), fn, label, submitted_at=self._clock())
+        with self._cond:
+            if self._stopping:
+                op.future.cancel()
+                return op.future
+            self._pending.setdefault(op.hwnd, deque()).append(op)
+            self._cond.notify()
+        return op.future
+
+    def run(self, hwnd: int, fn: Optional[Callable[[], object]] = None, timeout: Optional[float] = None):
+        """Blocking submit(); re-raises the operation's exception. A timed-out op is withdrawn if not started."""
+        fut = self.submit(hwnd, fn)
+        try:
+            return fut.result(timeout)
+        except FutureTimeout:
+            fut.cancel()
+            raise
+
+    def metrics(self) -> Dict[str, float]:
+        with self._cond:
+            pending = sum(len(q) for q in self._pending.values())
+            lat = sorted(self._latencies)
+        return {
+            "pending": pending,
+            "windows_pending": len(self._pending),
+            "ops": self.ops_done,
+            "switches": self.switches,
+            "avg_queue_ms": (sum(lat) / len(lat) * 1000.0) if lat else 0.0,
+            "p99_queue_ms": (lat[min(len(lat) - 1, int(len(lat) * 0.99))] * 1000.0) if lat else 0.0,
+        }
+
+    def _take_group(self):
+        """Pick the window whose oldest op has waited longest and pop up to max_group of its ops.
+
+        Caller holds the lock.
+        """
+        hwnd = next(iter(self._pending))
+        q = self._pending[hwnd]
+        ops = [q.popleft() for _ in range(min(len(q), self.max_group))]
+        if not q:
+            del self._pending[hwnd]
+        else:
+            # group cap reached: let the other windows go first
+            self._pending.move_to_end(hwnd)
+        return hwnd, ops
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                hwnd, ops = self._take_group()
+
+            # every group starts with a focus: after the previous dwell the user may have moved on
+            try:
+                self._focus(hwnd)
+            except Exception as e:
+                self._log(f"[Focus] focus {hwnd} failed: {e}")
+                for op in ops:
+                    if op.future.set_running_or_notify_cancel():
+                        op.future.set_exception(e)
+                continue
+            self.switches += 1
+            arrived = self._clock()
+
+            for op in ops:
+                self._execute(op)
+
+            # hold the window for the dwell; ops for it that arrive meanwhile run without a new switch
+            while True:
+                left = self.min_dwell_s - (self._clock() - arrived)
+                with self._cond:
+                    if self._stopping:
+                        return
+                    q = self._pending.get(hwnd)
+                    if q:
+                        op = q.popleft()
+                        if not q:
+                            del self._pending[hwnd]
+                    elif left > 0:
+                        self._cond.wait(left)
+                        continue
+                    else:
+                        break
+                self._execute(op)
+
+    def _execute(self, op: _Op):
+        if not op.future.set_running_or_notify_cancel():
+            return
+        self._latencies.append(self._clock() - op.submitted_at)
+        try:
+            res = op.fn() if op.fn else None
+        except Exception as e:
+            op.future.set_exception(e)
+        else:
+            op.future.set_result(res)
+        self.ops_done += 1
@@ -0,0 +1,350 @@
+"""Stable instance identity for WeChat windows.
+
+Positional numbering (sort by title/pid/hwnd) hands "微信2" to whichever
+window sorts second, so a restart can silently move a label, and every job
+that targets it, to another account. Here each window is bound to a
+persistent Identity that keeps its label. A window inherits an identity in
+this order of preference:
+
+1. same hwnd as last time (still the same window);
+2. same process (pid + create_time), e.g. after the launcher restarts;
+3. best fingerprint match among identities with no live window: account
+   (from the instance's data directory), parent-process lineage, title;
+4. the oldest free identity (launch / first-seen order);
+5. a new identity with the lowest free label.
+
+hwnd -> identity and identity -> hwnd are plain dicts rebuilt on every
+registry publish, so resolving a label or a job target is O(1).
+"""
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+import psutil
+
+from core.registry import window_sort_key
+
+LABEL_PREFIX = "微信"
+SAVE_EVERY_S = 5.0
+ACCOUNT_RETRY_S = 30.0
+_ACCOUNT_RE = re.compile(r"[\\/](?:WeChat Files|xwechat_files)[\\/]([^\\/]+)[\\/]", re.IGNORECASE)
+_NOT_ACCOUNTS = {"all users", "applet", "wmpf"}
+
+
+@dataclass
+class Identity:
+    id: str
+    label: str
+    order: int                 # first-seen order; launch order for instances we started
+    account: str = ""
+    title: str = ""
+    pid: int = 0               # last process seen behind this identity
+    create_time: float = 0.0
+    ppid: int = 0
+    last_seen: float = 0.0
+
+
+def probe_process(pid: int) -> Tuple[float, int]:
+    """(create_time, ppid) of a live process, or (0.0, 0)."""
+    try:
+        p = psutil.Process(pid)
+        with p.oneshot():
+            return p.create_time(), p.ppid()
+    except psutil.Error:
+        return 0.0, 0
+
+
+def probe_account(pid: int) -> str:
+    """Account directory name from the files the instance holds open (e.g. "wxid_abc"), or ""."""
+    try:
+        for f in psutil.Process(pid).open_files():
+            m = _ACCOUNT_RE.search(f.path)
+            if m and m.group(1).lower() not in _NOT_ACCOUNTS:
+                return m.group(1)
+    except psutil.Error:
+        pass
+    return ""
+
+
+def _label_number(label: str) -> int:
+    tail = label[len(LABEL_PREFIX):]
+    return int(tail) if label.startswith(LABEL_PREFIX) and tail.isdigit() else 0
+
+
+class IdentityIndex:
+    """Binds live windows to persistent identities; use ``number`` as the registry's numbering step.
+
+    ``probe_process(pid) -> (create_time, ppid)`` runs once per new process;
+    ``probe_account(pid)`` too, then every ACCOUNT_RETRY_S until an account
+    shows up (not before login). Account probes enumerate open handles (slow
+    on Windows) and number() runs under the registry lock, so by default they
+    run on a background thread: the account is used from the next number()
+    pass, and ``on_account()`` is called when one is found so the owner can
+    trigger that pass (e.g. WindowRegistry.republish).
+    """
+
+    def __init__(self, path: Optional[str] = None,
+                 probe_process: Callable[[int], Tuple[float, int]] = probe_process,
+                 probe_account: Optional[Callable[[int], str]] = probe_account,
+                 clock: Callable[[], float] = time.time,
+                 max_identities: int = 200,
+                 background: bool = True):
+        self.path = path
+        self._probe_process = probe_process
+        self._probe_account = probe_account
+        self._background = background
+        self.on_account: Optional[Callable[[], None]] = None
+        self._account_queue: "queue.Queue[int]" = queue.Queue()
+        self._account_thread: Optional[threading.Thread] = None
+        self._probing: set = set()
+        self._found: Dict[int, str] = {}  # pid -> account from a finished background probe
+        self._clock = clock
+        self.max_identities = max_identities
+        self._lock = threading.RLock()
+        self._ids: Dict[str, Identity] = {}
+        self._by_label: Dict[str, str] = {}
+        self._id_of_hwnd: Dict[int, str] = {}
+        self._hwnd_of_id: Dict[str, int] = {}
+        self._procs: Dict[int, Tuple[float, int, str]] = {}  # pid -> (create_time, ppid, account)
+        self._account_probed: Dict[int, float] = {}
+        self._next = 1
+        self._dirty = False
+        self._saved_at = 0.0
+        if path:
+            self.load()
+
+    # persistence
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for d in raw.get("identities", []):
+                ident = Identity(**{k: v for k, v in d.items() if k in Identity.__dataclass_fields__})
+                self._ids[ident.id] = ident
+                self._by_label[ident.label] = ident.id
+            self._next = max([int(raw.get("next", 1))] + [ident.order + 1 for ident in self._ids.values()])
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            raw = {"next": self._next, "identities": [asdict(i) for i in self._ids.values()]}
+            self._dirty = False
+            self._saved_at = self._clock()
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(raw, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    # lookups (O(1))
+
+    def identity_of(self, hwnd: int) -> Optional[Identity]:
+        iid = self._id_of_hwnd.get(int(hwnd))
+        return self._ids.get(iid) if iid else None
+
+    def hwnd_of(self, identity_id: str) -> Optional[int]:
+        return self._hwnd_of_id.get(identity_id)
+
+    def id_of_label(self, label: str) -> Optional[str]:
+        return self._by_label.get(label)
+
+    def resolve(self, target: Dict) -> Optional[int]:
+        """Live hwnd for a job/control target ({identity, label, hwnd}), or None."""
+        iid = target.get("identity") or (self._by_label.get(target["label"]) if target.get("label") else None)
+        if iid:
+            return self._hwnd_of_id.get(iid)
+        hwnd = target.get("hwnd")
+        return hwnd if hwnd in self._id_of_hwnd else None
+
+    def identities(self) -> List[Identity]:
+        with self._lock:
+            return sorted(self._ids.values(), key=lambda i: i.order)
+
+    # binding
+
+    def number(self, ws: List[Dict]) -> List[Dict]:
+        """Bind each window to an identity; sets identity/label/index in place and returns them in label order."""
+        with self._lock:
+            now = self._clock()
+            procs = self._proc_facts(ws, now)
+            bound: Dict[int, str] = {}
+            taken = set()
+
+            def bind(w: Dict, iid: str):
+                bound[int(w["hwnd"])] = iid
+                taken.add(iid)
+
+            # 1) same window, 2) same process
+            by_proc: Dict[Tuple[int, float], List[str]] = {}
+            for ident in sorted(self._ids.values(), key=lambda i: i.order):
+                by_proc.setdefault((ident.pid, ident.create_time), []).append(ident.id)
+            rest = []
+            for w in ws:
+                hwnd, pid = int(w["hwnd"]), int(w["pid"])
+                ct = procs[pid][0]
+                account = procs[pid][2]
+
+                def fits(iid: str) -> bool:
+                    # an account that turns up after login may contradict an earlier binding
+                    other = self._ids[iid].account
+                    return iid not in taken and not (account and other and account != other)
+
+                iid = self._id_of_hwnd.get(hwnd)
+                if iid in self._ids and self._ids[iid].pid == pid and fits(iid):
+                    bind(w, iid)
+                    continue
+                same = [i for i in by_proc.get((pid, ct), ()) if fits(i)] if ct else []
+                if same:
+                    bind(w, same[0])
+                else:
+                    rest.append(w)
+
+            # 3) fingerprint, best pairs first; 4) oldest free identity
+            rest.sort(key=window_sort_key)
+            free = [i for i in sorted(self._ids.values(), key=lambda i: i.order) if i.id not in taken]
+            pairs = []
+            for rank, w in enumerate(rest):
+                for ident in free:
+                    s = self._score(ident, w, procs[int(w["pid"])], free)
+                    if s is not None:
+                        pairs.append((-s, ident.order, rank, ident.id, w))
+            pairs.sort(key=lambda p: p[:3])
+            for _neg, _order, _rank, iid, w in pairs:
+                if int(w["hwnd"]) not in bound and iid not in taken:
+                    bind(w, iid)
+
+            # 5) new identities
+            for w in rest:
+                if int(w["hwnd"]) not in bound:
+                    bind(w, self._new_identity().id)
+
+            out = []
+            for w in ws:
+                ident = self._ids[bound[int(w["hwnd"])]]
+                ct, ppid, account = procs[int(w["pid"])]
+                changed = (ident.pid, ident.create_time, ident.title) != (int(w["pid"]), ct, w.get("title") or "")
+                ident.pid, ident.create_time, ident.ppid = int(w["pid"]), ct, ppid
+                ident.title = w.get("title") or ""
+                if account and ident.account != account:
+                    ident.account = account
+                    changed = True
+                ident.last_seen = now
+                self._dirty = self._dirty or changed
+                w["identity"] = ident.id
+                w["label"] = ident.label
+                out.append(w)
+            out.sort(key=lambda w: (_label_number(w["label"]), w["label"]))
+            for i, w in enumerate(out, start=1):
+                w["index"] = i
+            self._id_of_hwnd = dict(bound)
+            self._hwnd_of_id = {iid: hwnd for hwnd, iid in bound.items()}
+            self._procs = procs
+            self._account_probed = {pid: t for pid, t in self._account_probed.items() if pid in procs}
+            self._found = {pid: a for pid, a in self._found.items() if pid in procs}
+            self._prune(taken)
+            save_due = self._dirty and now - self._saved_at >= SAVE_EVERY_S
+        if save_due:
+            try:
+                self.save()
+            except OSError:
+                pass
+        return out
+
+    def _proc_facts(self, ws: List[Dict], now: float) -> Dict[int, Tuple[float, int, str]]:
+        out = {}
+        for w in ws:
+            pid = int(w["pid"])
+            if pid in out:
+                continue
+            facts = self._procs.get(pid)
+            if facts is None:
+                facts = self._probe_process(pid) + ("",)
+            if not facts[2] and self._probe_account:
+                account = self._found.pop(pid, "")
+                probed = self._account_probed.get(pid)
+                # accounts show up once the user has logged in
+                if not account and (probed is None or now - probed >= ACCOUNT_RETRY_S):
+                    self._account_probed[pid] = now
+                    account = self._request_account(pid)
+                if account:
+                    facts = (facts[0], facts[1], account)
+            out[pid] = facts
+        return out
+
+    def _request_account(self, pid: int) -> str:
+        """Probe now (background=False), or queue a background probe and return "" for this pass."""
+        if not self._background:
+            return self._probe_account(pid)
+        if pid not in self._probing:
+            self._probing.add(pid)
+            self._account_queue.put(pid)
+            if self._account_thread is None:
+                self._account_thread = threading.Thread(target=self._account_loop, name="AccountProbe",
+                                                        daemon=True)
+                self._account_thread.start()
+        return ""
+
+    def _account_loop(self):
+        while True:
+            pid = self._account_queue.get()
+            try:
+                account = self._probe_account(pid)
+            except Exception:
+                account = ""
+            with self._lock:
+                self._probing.discard(pid)
+                if account:
+                    self._found[pid] = account
+            cb = self.on_account
+            if account and cb is not None:
+                try:
+                    cb()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _score(ident: Identity, w: Dict, facts: Tuple[float, int, str], free: List[Identity]) -> Optional[int]:
+        _ct, ppid, account = facts
+        if account and ident.account and account != ident.account:
+            return None  # another account's identity is never a match
+        score = 0
+        if account and account == ident.account:
+            score += 8
+        if ppid and ident.pid and ppid == ident.pid:
+            score += 4  # restarted by its predecessor
+        title = w.get("title") or ""
+        if title and title == ident.title and sum(1 for i in free if i.title == title) == 1:
+            score += 2
+        return score
+
+    def _new_identity(self) -> Identity:
+        used = {_label_number(i.label) for i in self._ids.values()}
+        n = 1
+        while n in used:
+            n += 1
+        ident = Identity(id=f"inst-{self._next}", label=f"{LABEL_PREFIX}{n}", order=self._next)
+        self._next += 1
+        self._ids[ident.id] = ident
+        self._by_label[ident.label] = ident.id
+        self._dirty = True
+        return ident
+
+    def _prune(self, live: set):
+        extra = len(self._ids) - self.max_identities
+        if extra <= 0:
+            return
+        stale = sorted((i for i in self._ids.values() if i.id not in live), key=lambda i: i.last_seen)[:extra]
+        for ident in stale:
+            del self._ids[ident.id]
+            self._by_label.pop(ident.label, None)
+        self._dirty = True
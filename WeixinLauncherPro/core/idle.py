@@ -0,0 +1,447 @@
+"""Idle-instance policy: trim memory / lower priority / pin background WeChat instances.
+
+An instance (PID) is idle when none of its windows has been in the
+foreground, or reported as used, for ``idle_after_s``. Idle instances get the
+policy's actions; the moment one of their windows comes to the foreground the
+priority and affinity are put back. A trimmed working set needs no undo:
+Windows faults the pages back in as the instance touches them.
+
+Each action is applied on its own; one that fails (e.g. AccessDenied on an
+elevated WeChat) doesn't stop the others. An instance only counts as idle
+once every action has succeeded; until then the failed ones are retried on
+later ticks, backing off from RETRY_S up to idle_after_s.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Protocol, Sequence, Tuple
+
+import psutil
+
+PRIORITY_NORMAL = "normal"
+PRIORITY_BELOW_NORMAL = "below_normal"
+PRIORITY_IDLE = "idle"
+PRIORITIES = (PRIORITY_NORMAL, PRIORITY_BELOW_NORMAL, PRIORITY_IDLE)
+
+RETRY_S = 30.0
+
+
+@dataclass
+class IdlePolicy:
+    idle_after_s: float = 300.0
+    trim: bool = True
+    priority: str = PRIORITY_BELOW_NORMAL  # "" = leave priority alone
+    spread_affinity: bool = False          # pin each idle instance to one core, round-robin
+    dry_run: bool = False                  # log what would happen, touch nothing
+
+
+@dataclass
+class MemReport:
+    pid: int
+    label: str
+    ts: float
+    before_rss: int
+    before_private: int
+    after_rss: int
+    after_private: int
+
+    @property
+    def saved(self) -> int:
+        return max(0, self.before_rss - self.after_rss)
+
+
+@dataclass
+class PolicyAction:
+    ts: float
+    pid: int
+    label: str
+    action: str   # trim / priority / affinity / restore
+    detail: str
+    dry_run: bool = False
+
+
+class ProcessBackend(Protocol):
+    def memory(self, pid: int) -> Tuple[int, int]: ...          # (rss, private) bytes
+    def trim(self, pid: int) -> None: ...
+    def get_priority(self, pid: int) -> str: ...
+    def set_priority(self, pid: int, level: str) -> None: ...
+    def get_affinity(self, pid: int) -> List[int]: ...
+    def set_affinity(self, pid: int, cpus: List[int]) -> None: ...
+    def cpu_count(self) -> int: ...
+
+
+class PsutilProcessBackend:
+    """Real processes: psutil for memory/priority/affinity, SetProcessWorkingSetSize(-1, -1) to trim."""
+
+    if sys.platform == "win32":
+        _LEVELS = {
+            PRIORITY_NORMAL: psutil.NORMAL_PRIORITY_CLASS,
+            PRIORITY_BELOW_NORMAL: psutil.BELOW_NORMAL_PRIORITY_CLASS,
+            PRIORITY_IDLE: psutil.IDLE_PRIORITY_CLASS,
+        }
+    else:
+        _LEVELS = {PRIORITY_NORMAL: 0, PRIORITY_BELOW_NORMAL: 10, PRIORITY_IDLE: 19}
+
+    def memory(self, pid: int) -> Tuple[int, int]:
+        mem = psutil.Process(pid).memory_info()
+        return mem.rss, getattr(mem, "private", mem.vms)
+
+    def trim(self, pid: int) -> None:
+        if sys.platform != "win32":
+            raise NotImplementedError("working set trimming is Windows-only")
+        import win32api
+        import win32con
+        import win32process
+        h = win32api.OpenProcess(win32con.PROCESS_SET_QUOTA | win32con.PROCESS_QUERY_INFORMATION, False, pid)
+        try:
+            win32process.SetProcessWorkingSetSize(h, -1, -1)
+        finally:
+            win32api.CloseHandle(h)
+
+    def get_priority(self, pid: int) -> str:
+        value = psutil.Process(pid).nice()
+        for level, v in self._LEVELS.items():
+            if v == value:
+                return level
+        return PRIORITY_NORMAL
+
+    def set_priority(self, pid: int, level: str) -> None:
+        psutil.Process(pid).nice(self._LEVELS[level])
+
+    def get_affinity(self, pid: int) -> List[int]:
+        return list(psutil.Process(pid).cpu_affinity())
+
+    def set_affinity(self, pid: int, cpus: List[int]) -> None:
+        psutil.Process(pid).cpu_affinity(list(cpus))
+
+    def cpu_count(self) -> int:
+        return psutil.cpu_count() or 1
+
+
+@dataclass
+class SimProcess:
+    rss: int
+    private: int
+    priority: str = PRIORITY_NORMAL
+    affinity: List[int] = field(default_factory=list)
+
+
+class SimProcessBackend:
+    """In-memory processes for tests and benchmarks.
+
+    Trimming drops rss to ``trim_ratio`` of itself; touch() brings it back the
+    way page faults would. ``calls`` counts every mutating call. Setting the
+    priority or affinity of a PID in ``denied`` raises AccessDenied, like an
+    elevated process would.
+    """
+
+    def __init__(self, cpus: int = 8, trim_ratio: float = 0.2):
+        self.procs: Dict[int, SimProcess] = {}
+        self.cpus = cpus
+        self.trim_ratio = trim_ratio
+        self.denied: set = set()
+        self.calls: Dict[str, int] = {"trim": 0, "set_priority": 0, "set_affinity": 0}
+
+    def add(self, pid: int, rss: int, private: Optional[int] = None):
+        self.procs[pid] = SimProcess(rss, private if private is not None else rss, affinity=list(range(self.cpus)))
+
+    def touch(self, pid: int):
+        p = self.procs[pid]
+        p.rss = max(p.rss, int(p.private * 0.9))
+
+    def _get(self, pid: int) -> SimProcess:
+        p = self.procs.get(pid)
+        if p is None:
+            raise psutil.NoSuchProcess(pid)
+        return p
+
+    def memory(self, pid: int) -> Tuple[int, int]:
+        p = self._get(pid)
+        return p.rss, p.private
+
+    def trim(self, pid: int) -> None:
+        p = self._get(pid)
+        self.calls["trim"] += 1
+        p.rss = int(p.rss * self.trim_ratio)
+
+    def get_priority(self, pid: int) -> str:
+        return self._get(pid).priority
+
+    def set_priority(self, pid: int, level: str) -> None:
+        self.calls["set_priority"] += 1
+        if pid in self.denied:
+            raise psutil.AccessDenied(pid)
+        self._get(pid).priority = level
+
+    def get_affinity(self, pid: int) -> List[int]:
+        return list(self._get(pid).affinity)
+
+    def set_affinity(self, pid: int, cpus: List[int]) -> None:
+        self.calls["set_affinity"] += 1
+        if pid in self.denied:
+            raise psutil.AccessDenied(pid)
+        self._get(pid).affinity = list(cpus)
+
+    def cpu_count(self) -> int:
+        return self.cpus
+
+
+@dataclass
+class _Instance:
+    pid: int
+    label: str
+    last_active: float
+    idle: bool = False                     # every policy action applied
+    saved_priority: Optional[str] = None   # set once the priority action succeeded
+    saved_affinity: Optional[List[int]] = None
+    trimmed: bool = False
+    failures: int = 0                      # consecutive attempts with a failed action
+    retry_at: float = 0.0
+
+    @property
+    def touched(self) -> bool:
+        """Some action was applied and needs undoing when the instance comes back."""
+        return self.idle or self.saved_priority is not None or self.saved_affinity is not None
+
+
+class IdleManager:
+    """Applies an IdlePolicy to the WeChat instances behind ``windows()``.
+
+    ``windows()`` returns the numbered window dicts (hwnd/pid/label), e.g.
+    ctx.wechat_windows. Call note_foreground(hwnd) from the registry's
+    foreground events so restores don't wait for the next tick; ``foreground()``
+    is polled on each tick as a fallback.
+    """
+
+    def __init__(self, backend: ProcessBackend, windows: Callable[[], Sequence[Dict]],
+                 policy: Optional[IdlePolicy] = None, foreground: Optional[Callable[[], int]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_log: Optional[Callable[[str], None]] = None, history: int = 500):
+        self.backend = backend
+        self.policy = policy or IdlePolicy()
+        self._windows = windows
+        self._foreground = foreground
+        self._clock = clock
+        self._log = on_log or (lambda m: None)
+        self._lock = threading.RLock()
+        self._inst: Dict[int, _Instance] = {}
+        self._pid_of: Dict[int, int] = {}  # hwnd -> pid
+        self._next_core = 0
+        self.reports: Dict[int, MemReport] = {}
+        self.actions: Deque[PolicyAction] = deque(maxlen=history)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # lifecycle
+
+    def start(self, interval: float = 5.0):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="IdleManager", daemon=True)
+        self._thread.start()
+
+    def stop(self, restore: bool = True):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if restore:
+            self.restore_all()
+
+    def set_policy(self, policy: IdlePolicy):
+        """Swap the policy. Instances idled under the old one are restored under it first,
+        since _restore follows the current policy (a switch to dry-run would skip the undo)."""
+        with self._lock:
+            if policy == self.policy:
+                return
+            self.restore_all()
+            self.policy = policy
+
+    def _run(self, interval: float):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                self._log(f"[Idle] tick failed: {e}")
+            self._stop.wait(interval)
+
+    # activity
+
+    def note_foreground(self, hwnd: int):
+        pid = self._pid_of.get(int(hwnd))
+        if pid is not None:
+            self.note_activity(pid)
+
+    def note_activity(self, pid: int):
+        with self._lock:
+            inst = self._inst.get(pid)
+            if inst is None:
+                return
+            inst.last_active = self._clock()
+            if inst.touched or inst.failures:
+                self._restore(inst)
+
+    # policy
+
+    def tick(self) -> List[PolicyAction]:
+        """Refresh the instance list, restore the foreground one, idle the rest as due."""
+        ws = list(self._windows())
+        now = self._clock()
+        fg = self._foreground() if self._foreground else 0
+        labels: Dict[int, str] = {}
+        pid_of: Dict[int, int] = {}
+        for w in ws:
+            pid = int(w["pid"])
+            pid_of[int(w["hwnd"])] = pid
+            labels.setdefault(pid, w.get("label", ""))
+        fg_pid = pid_of.get(int(fg)) if fg else None
+        start = len(self.actions)
+        with self._lock:
+            self._pid_of = pid_of
+            for pid in [p for p in self._inst if p not in labels]:
+                del self._inst[pid]
+                self.reports.pop(pid, None)
+            for pid, label in labels.items():
+                inst = self._inst.get(pid)
+                if inst is None:
+                    inst = self._inst[pid] = _Instance(pid, label, now)
+                inst.label = label
+                if pid == fg_pid:
+                    inst.last_active = now
+                    if inst.touched or inst.failures:
+                        self._restore(inst)
+                elif (not inst.idle and now - inst.last_active >= self.policy.idle_after_s
+                      and now >= inst.retry_at):
+                    self._make_idle(inst, now)
+            return list(self.actions)[start:]
+
+    def restore_all(self):
+        with self._lock:
+            for inst in self._inst.values():
+                if inst.touched:
+                    self._restore(inst)
+
+    def _record(self, inst: _Instance, action: str, detail: str):
+        a = PolicyAction(time.time(), inst.pid, inst.label, action, detail, self.policy.dry_run)
+        self.actions.append(a)
+        prefix = "[Idle][dry-run]" if a.dry_run else "[Idle]"
+        self._log(f"{prefix} {inst.label} (pid={inst.pid}) {action}: {detail}")
+
+    def _make_idle(self, inst: _Instance, now: float):
+        """Apply the policy actions not applied yet; idle only once all of them succeeded."""
+        pol, be, dry = self.policy, self.backend, self.policy.dry_run
+        errors = []
+        if pol.priority and pol.priority != PRIORITY_NORMAL and inst.saved_priority is None:
+            try:
+                current = be.get_priority(inst.pid)
+                if current != pol.priority:
+                    if not dry:
+                        be.set_priority(inst.pid, pol.priority)
+                    self._record(inst, "priority", f"{current} -> {pol.priority}")
+                inst.saved_priority = current
+            except Exception as e:
+                errors.append(f"priority: {e}")
+        if pol.spread_affinity and inst.saved_affinity is None:
+            try:
+                current = be.get_affinity(inst.pid)
+                core = self._next_core % max(1, be.cpu_count())
+                if current != [core]:
+                    if not dry:
+                        be.set_affinity(inst.pid, [core])
+                    self._record(inst, "affinity", f"cpu {core}")
+                self._next_core += 1
+                inst.saved_affinity = current
+            except Exception as e:
+                errors.append(f"affinity: {e}")
+        if pol.trim and not inst.trimmed:
+            try:
+                rss, private = be.memory(inst.pid)
+                after = (rss, private)
+                if not dry:
+                    be.trim(inst.pid)
+                    after = be.memory(inst.pid)
+                self.reports[inst.pid] = MemReport(inst.pid, inst.label, time.time(), rss, private, *after)
+                self._record(inst, "trim", f"rss {rss // (1024 * 1024)}MB -> {after[0] // (1024 * 1024)}MB")
+                inst.trimmed = True
+            except Exception as e:
+                errors.append(f"trim: {e}")
+        if errors:
+            inst.failures += 1
+            delay = min(max(RETRY_S, pol.idle_after_s), RETRY_S * 2 ** (inst.failures - 1))
+            inst.retry_at = now + delay
+            self._log(f"[Idle] {inst.label} (pid={inst.pid}) policy failed ({'; '.join(errors)}); "
+                      f"retrying in {delay:.0f}s")
+            return
+        inst.idle = True
+        inst.failures = 0
+
+    def _restore(self, inst: _Instance):
+        """Undo each applied action on its own; a failed undo keeps its saved state for the next try."""
+        be, dry = self.backend, self.policy.dry_run
+        inst.idle = False
+        parts, errors = [], []
+        if inst.saved_priority is not None:
+            try:
+                if not dry:
+                    be.set_priority(inst.pid, inst.saved_priority)
+                parts.append(f"priority {inst.saved_priority}")
+                inst.saved_priority = None
+            except Exception as e:
+                errors.append(f"priority: {e}")
+        if inst.saved_affinity is not None:
+            try:
+                if not dry:
+                    be.set_affinity(inst.pid, inst.saved_affinity)
+                parts.append(f"{len(inst.saved_affinity)} cpu(s)")
+                inst.saved_affinity = None
+            except Exception as e:
+                errors.append(f"affinity: {e}")
+        inst.trimmed = False
+        inst.failures = 0
+        inst.retry_at = 0.0
+        if errors:
+            self._log(f"[Idle] {inst.label} (pid={inst.pid}) restore failed ({'; '.join(errors)})")
+        if parts:
+            self._record(inst, "restore", ", ".join(parts))
+
+    # reports
+
+    def snapshot(self) -> List[Dict]:
+        """Per-instance state for display, in label order."""
+        now = self._clock()
+        with self._lock:
+            rows = []
+            for inst in self._inst.values():
+                rep = self.reports.get(inst.pid)
+                rows.append({
+                    "pid": inst.pid, "label": inst.label, "idle": inst.idle,
+                    "idle_for": max(0.0, now - inst.last_active),
+                    "before_rss": rep.before_rss if rep else None,
+                    "after_rss": rep.after_rss if rep else None,
+                })
+        rows.sort(key=lambda r: (len(r["label"]), r["label"]))
+        return rows
+
+    def memory_report(self) -> Dict:
+        """Totals over the latest trim of every live instance, plus current rss."""
+        with self._lock:
+            reps = list(self.reports.values())
+            pids = list(self._inst)
+        now_rss = 0
+        for pid in pids:
+            try:
+                now_rss += self.backend.memory(pid)[0]
+            except Exception:
+                pass
+        return {
+            "instances": len(pids),
+            "trimmed": len(reps),
+            "before_rss": sum(r.before_rss for r in reps),
+            "after_rss": sum(r.after_rss for r in reps),
+            "saved": sum(r.saved for r in reps),
+            "current_rss": now_rss,
+        }
@@ -0,0 +1,623 @@
+"""Plugin workers: a plugin's non-UI logic behind a small service API, in-process or in a child process.
+
+A plugin whose manifest names a ``worker`` module gets a worker handle. The
+object returned by the module's create_worker() has start(services),
+stop() and optionally handle(method, args) for requests from the plugin's
+UI, and only sees WorkerServices: log.info/warn/error,
+windows.list()/focus(hwnd), scheduler.every(job_id, interval_s, fn)/
+remove(job_id) and a read-only cfg snapshot.
+
+InProcessWorker calls the host's services directly. IsolatedWorker runs the
+worker in a child process (multiprocessing, spawn) and carries every call
+over a Pipe as compact JSON arrays:
+
+    ["n", name, args]          service call without a reply (log lines, scheduler)
+    ["c", id, name, args]      call that wants a reply (either direction)
+    ["r", id, ok, result]      the reply; ``result`` is the error text if not ok
+    ["e", name, args]          event for the worker: fire a scheduler job, stop
+    ["h", busy_s]              heartbeat; busy_s = how long the current worker task has run
+
+Messages go out in batches, one send_bytes per flush: a batch is flushed
+FLUSH_MS after its first message, at MAX_BATCH messages, or right away
+when a call needs its reply. The host end runs on its own threads, never
+on the Tk loop. A child that exits, stops sending heartbeats, or stays in
+one task longer than ``hang_s`` is killed and restarted with backoff (and
+left alone after ``restart_max`` restarts within five minutes). Its
+scheduler jobs are dropped with it and re-registered by the new process.
+"""
+
+import importlib.util
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from core.scheduler import Job
+
+FLUSH_MS = 5
+MAX_BATCH = 256
+RESTART_WINDOW_S = 300.0
+
+STATE_STARTING = "starting"
+STATE_RUNNING = "running"
+STATE_BACKOFF = "backoff"
+STATE_GAVE_UP = "gave_up"
+STATE_STOPPED = "stopped"
+
+
+class WorkerError(RuntimeError):
+    """A call to or from a worker failed (error reply, timeout, worker not running)."""
+
+
+def _load_worker(path: str):
+    spec = importlib.util.spec_from_file_location(f"worker_{os.path.basename(os.path.dirname(path))}", path)
+    if not spec or not spec.loader:
+        raise RuntimeError(f"Cannot load spec: {path}")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)  # type: ignore[attr-defined]
+    if not hasattr(mod, "create_worker"):
+        raise RuntimeError("create_worker() not found")
+    return mod.create_worker()
+
+
+# what a worker sees
+
+class _LogProxy:
+    def __init__(self, transport):
+        self._t = transport
+
+    def info(self, msg: str):
+        self._t.notify("log", ["info", str(msg)])
+
+    def warn(self, msg: str):
+        self._t.notify("log", ["warn", str(msg)])
+
+    def error(self, msg: str):
+        self._t.notify("log", ["error", str(msg)])
+
+
+class _WindowsProxy:
+    def __init__(self, transport):
+        self._t = transport
+
+    def list(self, timeout: float = 5.0) -> List[Dict]:
+        return self._t.call("windows.list", [], timeout)
+
+    def focus(self, hwnd: int, timeout: float = 5.0) -> bool:
+        return self._t.call("windows.focus", [int(hwnd)], timeout)
+
+
+class _SchedulerProxy:
+    def __init__(self, transport):
+        self._t = transport
+        self._fns: Dict[str, Callable[[], None]] = {}
+
+    def every(self, job_id: str, interval_s: int, fn: Callable[[], None]):
+        """Run ``fn`` in the worker every ``interval_s`` seconds (the host scheduler keeps the time)."""
+        self._fns[job_id] = fn
+        self._t.notify("scheduler.every", [job_id, int(interval_s)])
+
+    def remove(self, job_id: str):
+        self._fns.pop(job_id, None)
+        self._t.notify("scheduler.remove", [job_id])
+
+    def fire(self, job_id: str):
+        fn = self._fns.get(job_id)
+        if fn is not None:
+            fn()
+
+
+class WorkerServices:
+    """The service API handed to a worker's start(); ``transport`` has notify(name, args) and call(name, args, timeout)."""
+
+    def __init__(self, transport, cfg: Dict):
+        self.cfg = SimpleNamespace(**cfg)
+        self.log = _LogProxy(transport)
+        self.windows = _WindowsProxy(transport)
+        self.scheduler = _SchedulerProxy(transport)
+
+
+def context_services(ctx, plugin_id: str, fire: Callable[[str], None]) -> Tuple[Dict[str, Callable], Callable[[], None]]:
+    """Host-side service table over an AppContext, plus a function that drops the worker's scheduler jobs."""
+    jobs = set()
+    lock = threading.Lock()
+
+    def log(level: str, msg: str):
+        getattr(ctx.log, level if level in ("info", "warn", "error") else "info")(f"[{plugin_id}] {msg}")
+
+    def list_windows():
+        return [{"hwnd": int(w["hwnd"]), "label": w.get("label"), "pid": w.get("pid"), "title": w.get("title") or "",
+                 "identity": w.get("identity")} for w in ctx.wechat_windows()]
+
+    def focus(hwnd: int):
+        if getattr(ctx, "focus", None) is not None:
+            ctx.focus.submit(hwnd)
+        else:
+            ctx.windows.focus(hwnd)
+        return True
+
+    def every(job_id: str, interval_s: int):
+        full = f"{plugin_id}:{job_id}"
+        with lock:
+            jobs.add(full)
+        ctx.scheduler.add_or_update(Job(job_id=full, interval_sec=max(1, int(interval_s)),
+                                        action=lambda: fire(job_id)))
+
+    def remove(job_id: str):
+        full = f"{plugin_id}:{job_id}"
+        with lock:
+            jobs.discard(full)
+        ctx.scheduler.remove(full)
+
+    def drop():
+        with lock:
+            stale = list(jobs)
+            jobs.clear()
+        for full in stale:
+            ctx.scheduler.remove(full)
+
+    return {"log": log, "windows.list": list_windows, "windows.focus": focus,
+            "scheduler.every": every, "scheduler.remove": remove}, drop
+
+
+# in-process
+
+class _LocalTransport:
+    def __init__(self, services: Dict[str, Callable], on_error: Callable[[str], None]):
+        self._services = services
+        self._on_error = on_error
+
+    def notify(self, name: str, args: List):
+        try:
+            self._services[name](*args)
+        except Exception as e:
+            self._on_error(f"[Worker] {name} failed: {e}")
+
+    def call(self, name: str, args: List, timeout: float = 5.0):
+        try:
+            return self._services[name](*args)
+        except Exception as e:
+            raise WorkerError(f"{name}: {e}")
+
+
+class InProcessWorker:
+    """Runs the worker on the host's own services and threads (no isolation)."""
+
+    isolated = False
+
+    def __init__(self, plugin_id: str, worker_path: str, ctx, cfg: Dict,
+                 on_log: Optional[Callable[[str], None]] = None):
+        self.plugin_id = plugin_id
+        self.worker_path = worker_path
+        self._log = on_log or (lambda m: None)
+        services, self._drop = context_services(ctx, plugin_id, self._fire)
+        self.services = WorkerServices(_LocalTransport(services, self._log), cfg)
+        self.worker = None
+        self.state = STATE_STOPPED
+        self.calls = 0
+
+    def start(self):
+        self.worker = _load_worker(self.worker_path)
+        self.worker.start(self.services)
+        self.state = STATE_RUNNING
+
+    def _fire(self, job_id: str):
+        self.services.scheduler.fire(job_id)
+
+    def call(self, method: str, args: Optional[Dict] = None, timeout: float = 10.0):
+        if self.state != STATE_RUNNING:
+            raise WorkerError(f"worker {self.plugin_id} is {self.state}")
+        self.calls += 1
+        try:
+            return self.worker.handle(method, args or {})
+        except Exception as e:
+            raise WorkerError(f"{method}: {e}")
+
+    def stop(self):
+        if self.state == STATE_STOPPED:
+            return
+        self.state = STATE_STOPPED
+        try:
+            self.worker.stop()
+        finally:
+            self._drop()
+
+    def metrics(self) -> Dict:
+        return {"mode": "in-process", "state": self.state, "calls": self.calls}
+
+
+# IPC plumbing (both ends)
+
+class _Channel:
+    """Batching writer over a multiprocessing Connection."""
+
+    def __init__(self, conn, flush_ms: float = FLUSH_MS):
+        self._conn = conn
+        self._flush_s = flush_ms / 1000.0
+        self._buf: List = []
+        self._cond = threading.Condition()
+        self.closed = False
+        self.batches = 0
+        self.messages = 0
+        threading.Thread(target=self._run, name="IpcFlush", daemon=True).start()
+
+    def put(self, msg: List, flush: bool = False):
+        with self._cond:
+            if self.closed:
+                return
+            self._buf.append(msg)
+            if flush or len(self._buf) >= MAX_BATCH:
+                self._flush_locked()
+            elif len(self._buf) == 1:
+                self._cond.notify()
+
+    def flush(self):
+        with self._cond:
+            self._flush_locked()
+
+    def close(self):
+        with self._cond:
+            self._flush_locked()
+            self.closed = True
+            self._cond.notify()
+
+    def _flush_locked(self):
+        if not self._buf or self.closed:
+            return
+        batch, self._buf = self._buf, []
+        try:
+            self._conn.send_bytes(json.dumps(batch, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        except (OSError, ValueError):
+            self.closed = True  # the other end is gone; the supervisor notices
+            return
+        self.batches += 1
+        self.messages += len(batch)
+
+    def _run(self):
+        with self._cond:
+            while not self.closed:
+                if not self._buf:
+                    self._cond.wait()
+                    continue
+                self._cond.wait(self._flush_s)  # let the batch fill up
+                self._flush_locked()
+
+
+class _Pending:
+    """Calls waiting for their ["r", ...] reply."""
+
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._slots: Dict[int, list] = {}
+
+    def new(self) -> int:
+        cid = next(self._ids)
+        with self._lock:
+            self._slots[cid] = [threading.Event(), False, None]
+        return cid
+
+    def resolve(self, cid: int, ok: bool, result: Any):
+        with self._lock:
+            slot = self._slots.get(cid)  # wait() removes it; the reply may beat the caller there
+        if slot is not None:
+            slot[1], slot[2] = ok, result
+            slot[0].set()
+
+    def wait(self, cid: int, timeout: float):
+        with self._lock:
+            slot = self._slots.get(cid)
+        try:
+            if slot is None or not slot[0].wait(timeout):
+                raise WorkerError(f"call {cid} timed out after {timeout:g}s")
+        finally:
+            with self._lock:
+                self._slots.pop(cid, None)
+        if not slot[1]:
+            raise WorkerError(str(slot[2]))
+        return slot[2]
+
+    def fail_all(self, reason: str):
+        with self._lock:
+            slots = list(self._slots.values())
+        for slot in slots:
+            slot[1], slot[2] = False, reason
+            slot[0].set()
+
+
+# child process
+
+class _RemoteTransport:
+    def __init__(self, chan: _Channel, pending: _Pending):
+        self._chan = chan
+        self._pending = pending
+
+    def notify(self, name: str, args: List):
+        self._chan.put(["n", name, args])
+
+    def call(self, name: str, args: List, timeout: float = 5.0):
+        cid = self._pending.new()
+        self._chan.put(["c", cid, name, args], flush=True)
+        return self._pending.wait(cid, timeout)
+
+
+def _worker_main(conn, worker_path: str, cfg: Dict, heartbeat_s: float, flush_ms: float):
+    """Child process entry: load the worker, run its tasks on one thread, answer the host, send heartbeats."""
+    chan = _Channel(conn, flush_ms)
+    pending = _Pending()
+    services = WorkerServices(_RemoteTransport(chan, pending), cfg)
+    tasks: "queue.Queue[Optional[Callable[[], None]]]" = queue.Queue()
+    busy_since = [0.0]
+
+    def run_tasks():
+        while True:
+            fn = tasks.get()
+            if fn is None:
+                return
+            busy_since[0] = time.monotonic()
+            try:
+                fn()
+            except Exception as e:
+                services.log.error(f"worker task failed: {e}")
+            finally:
+                busy_since[0] = 0.0
+
+    def answer(cid: int, method: str, args: Dict):
+        try:
+            chan.put(["r", cid, True, worker.handle(method, args)], flush=True)
+        except Exception as e:
+            chan.put(["r", cid, False, f"{method}: {e}"], flush=True)
+
+    try:
+        worker = _load_worker(worker_path)
+    except Exception as e:
+        services.log.error(f"worker failed to load: {e}")
+        chan.close()
+        return
+    runner = threading.Thread(target=run_tasks, name="WorkerTasks", daemon=True)
+    runner.start()
+    tasks.put(lambda: worker.start(services))
+    last_hb = 0.0
+    while True:
+        try:
+            if conn.poll(heartbeat_s):
+                batch = json.loads(conn.recv_bytes())
+            else:
+                batch = []
+        except (EOFError, OSError):
+            return  # host went away
+        for m in batch:
+            kind = m[0]
+            if kind == "r":
+                pending.resolve(m[1], m[2], m[3])
+            elif kind == "c":
+                tasks.put(lambda cid=m[1], method=m[2], args=m[3]: answer(cid, method, args))
+            elif kind == "e" and m[1] == "fire":
+                tasks.put(lambda job_id=m[2][0]: services.scheduler.fire(job_id))
+            elif kind == "e" and m[1] == "stop":
+                tasks.put(worker.stop)
+                tasks.put(None)
+                runner.join(timeout=max(1.0, heartbeat_s))
+                chan.close()
+                return
+        now = time.monotonic()
+        if now - last_hb >= heartbeat_s:
+            started = busy_since[0]
+            chan.put(["h", round(now - started, 3) if started else 0.0], flush=True)
+            last_hb = now
+
+
+# host side of an isolated worker
+
+class IsolatedWorker:
+    """Runs the worker in a supervised child process; services are served on the host's IPC threads."""
+
+    isolated = True
+
+    def __init__(self, plugin_id: str, worker_path: str, ctx, cfg: Dict,
+                 heartbeat_s: float = 1.0, timeout_s: float = 5.0, hang_s: float = 30.0,
+                 restart_max: int = 5, backoff_initial_s: float = 1.0, backoff_max_s: float = 30.0,
+                 flush_ms: float = FLUSH_MS, clock: Callable[[], float] = time.monotonic,
+                 on_log: Optional[Callable[[str], None]] = None):
+        self.plugin_id = plugin_id
+        self.worker_path = worker_path
+        self.cfg = cfg
+        self.heartbeat_s = heartbeat_s
+        self.timeout_s = timeout_s
+        self.hang_s = hang_s
+        self.restart_max = max(1, int(restart_max))
+        self.backoff_initial_s = backoff_initial_s
+        self.backoff_max_s = backoff_max_s
+        self.flush_ms = flush_ms
+        self._clock = clock
+        self._log = on_log or (lambda m: None)
+        self._services, self._drop = context_services(ctx, plugin_id, self._fire)
+        self._pending = _Pending()
+        self._lock = threading.Lock()
+        self._proc = None
+        self._conn = None
+        self._chan: Optional[_Channel] = None
+        self._stop = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+        self._restart_times: Deque[float] = deque()
+        self._next_spawn = 0.0
+        self._last_hb = 0.0
+        self._busy = 0.0
+        self.state = STATE_STOPPED
+        self.restarts = 0
+        self.served = 0
+        self.batches_in = 0
+        self.messages_in = 0
+
+    # lifecycle
+
+    def start(self):
+        if self._supervisor and self._supervisor.is_alive():
+            return
+        self._stop.clear()
+        self._spawn()
+        self._supervisor = threading.Thread(target=self._supervise, name=f"Worker-{self.plugin_id}", daemon=True)
+        self._supervisor.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        if self._supervisor:
+            self._supervisor.join(timeout=timeout)
+            self._supervisor = None
+        with self._lock:
+            proc, chan, conn = self._proc, self._chan, self._conn
+            self._proc = self._chan = self._conn = None
+            self.state = STATE_STOPPED
+        if chan is not None:
+            chan.put(["e", "stop", []], flush=True)
+        if proc is not None:
+            proc.join(timeout)
+            if proc.is_alive():
+                self._log(f"[Worker] {self.plugin_id} did not stop in {timeout:g}s; killing pid {proc.pid}")
+                proc.kill()
+                proc.join(1.0)
+        self._close(chan, conn)
+        self._pending.fail_all("worker stopped")
+        self._drop()
+
+    def _spawn(self):
+        mp = multiprocessing.get_context("spawn")
+        parent, child = mp.Pipe(duplex=True)
+        proc = mp.Process(target=_worker_main, name=f"plugin-{self.plugin_id}",
+                          args=(child, self.worker_path, self.cfg, self.heartbeat_s, self.flush_ms), daemon=True)
+        proc.start()
+        child.close()
+        chan = _Channel(parent, self.flush_ms)
+        with self._lock:
+            self._proc, self._conn, self._chan = proc, parent, chan
+            self._last_hb = self._clock()
+            self._busy = 0.0
+            self.state = STATE_RUNNING
+        threading.Thread(target=self._read, args=(parent, chan), name=f"WorkerIpc-{self.plugin_id}",
+                         daemon=True).start()
+
+    def _close(self, chan: Optional[_Channel], conn):
+        if chan is not None:
+            chan.close()
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+    # IPC
+
+    def _read(self, conn, chan: _Channel):
+        while True:
+            try:
+                batch = json.loads(conn.recv_bytes())
+            except (EOFError, OSError, ValueError):
+                return
+            self.batches_in += 1
+            self.messages_in += len(batch)
+            for m in batch:
+                kind = m[0]
+                if kind == "n":
+                    self._serve(m[1], m[2])
+                elif kind == "c":
+                    ok, result = self._serve(m[2], m[3])
+                    chan.put(["r", m[1], ok, result])
+                elif kind == "r":
+                    self._pending.resolve(m[1], m[2], m[3])
+                elif kind == "h":
+                    self._last_hb = self._clock()
+                    self._busy = float(m[1])
+            chan.flush()  # all replies to this batch in one send
+
+    def _serve(self, name: str, args: List) -> Tuple[bool, Any]:
+        fn = self._services.get(name)
+        if fn is None:
+            return False, f"unknown service: {name}"
+        self.served += 1
+        try:
+            return True, fn(*args)
+        except Exception as e:
+            return False, f"{name}: {e}"
+
+    def _fire(self, job_id: str):
+        chan = self._chan
+        if chan is not None and self.state == STATE_RUNNING:
+            chan.put(["e", "fire", [job_id]], flush=True)
+
+    def call(self, method: str, args: Optional[Dict] = None, timeout: float = 10.0):
+        """Ask the worker's handle(method, args); raises WorkerError on error, timeout or restart."""
+        chan = self._chan
+        if chan is None or self.state != STATE_RUNNING:
+            raise WorkerError(f"worker {self.plugin_id} is {self.state}")
+        cid = self._pending.new()
+        chan.put(["c", cid, method, args or {}], flush=True)
+        return self._pending.wait(cid, timeout)
+
+    # supervision
+
+    def _supervise(self):
+        while not self._stop.wait(min(0.25, self.heartbeat_s / 2)):
+            now = self._clock()
+            with self._lock:
+                state, proc = self.state, self._proc
+            if state == STATE_RUNNING:
+                reason = None
+                if proc is None or not proc.is_alive():
+                    reason = f"exited (code {proc.exitcode if proc else None})"
+                elif now - self._last_hb > self.timeout_s:
+                    reason = f"no heartbeat for {now - self._last_hb:.1f}s"
+                elif self._busy > self.hang_s:
+                    reason = f"stuck in one task for {self._busy:.1f}s"
+                if reason:
+                    self._restart(reason, now)
+            elif state == STATE_BACKOFF and now >= self._next_spawn:
+                try:
+                    self._spawn()
+                    self.restarts += 1
+                    self._log(f"[Worker] {self.plugin_id} restarted (restart #{self.restarts})")
+                except Exception as e:
+                    self._log(f"[Worker] {self.plugin_id} restart failed: {e}")
+                    self._next_spawn = now + self.backoff_max_s
+
+    def _restart(self, reason: str, now: float):
+        with self._lock:
+            proc, chan, conn = self._proc, self._chan, self._conn
+            self._proc = self._chan = self._conn = None
+        if proc is not None and proc.is_alive():
+            proc.kill()
+            proc.join(1.0)
+        self._close(chan, conn)
+        self._pending.fail_all(f"worker restarted: {reason}")
+        self._drop()  # the new process registers its jobs again
+        self._restart_times.append(now)
+        while self._restart_times and now - self._restart_times[0] > RESTART_WINDOW_S:
+            self._restart_times.popleft()
+        if len(self._restart_times) > self.restart_max:
+            self.state = STATE_GAVE_UP
+            self._log(f"[Worker] {self.plugin_id} {reason}; {len(self._restart_times)} restarts in "
+                      f"{RESTART_WINDOW_S:g}s, giving up.")
+            return
+        delay = min(self.backoff_max_s, self.backoff_initial_s * (2 ** (len(self._restart_times) - 1)))
+        self._next_spawn = now + delay
+        self.state = STATE_BACKOFF
+        self._log(f"[Worker] {self.plugin_id} {reason}; restarting in {delay:.1f}s.")
+
+    def metrics(self) -> Dict:
+        proc = self._proc
+        return {
+            "mode": "isolated",
+            "state": self.state,
+            "pid": proc.pid if proc is not None else None,
+            "restarts": self.restarts,
+            "served": self.served,
+            "messages_in": self.messages_in,
+            "batches_in": self.batches_in,
+            "avg_batch": round(self.messages_in / self.batches_in, 1) if self.batches_in else 0.0,
+            "heartbeat_age_s": round(self._clock() - self._last_hb, 2) if proc is not None else None,
+        }
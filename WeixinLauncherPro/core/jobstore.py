@@ -0,0 +1,289 @@
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from core.scheduler import Job, Scheduler, OVERLAP_SKIP, MISFIRE_FIRE_ONCE
+from core.triggers import trigger_from_dict
+
+ActionFactory = Callable[["JobSpec"], Callable[[], None]]
+
+
+@dataclass
+class JobSpec:
+    """Serializable description of a scheduled job; the action is rebuilt from action_type + payload."""
+    job_id: str
+    action_type: str
+    trigger: Dict
+    target: Dict = field(default_factory=dict)
+    payload: Dict = field(default_factory=dict)
+    overlap: str = OVERLAP_SKIP
+    timeout_sec: float = 0.0
+    misfire: str = MISFIRE_FIRE_ONCE
+    enabled: bool = True
+    next_fire: Optional[float] = None  # wall epoch, refreshed on update and on shutdown
+
+    def to_json(self) -> str:
+        # vars() rather than asdict(): fields are plain JSON values and asdict deep-copies
+        return json.dumps(vars(self), ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "JobSpec":
+        d = json.loads(raw)
+        return cls(**{k: v for k, v in d.items() if k in cls.__dataclass_fields__})
+
+
+class JobStore:
+    """SQLite-backed job store with write-behind batching.
+
+    put()/delete() only record the latest intent per job_id; a writer thread
+    commits everything pending in one transaction every ``flush_ms``, so a
+    burst of edits costs one fsync. load_all() is a single SELECT.
+    """
+
+    def __init__(self, path: str, flush_ms: int = 200):
+        self.path = path
+        self._flush_s = max(0.0, flush_ms / 1000.0)
+        self._pending: Dict[str, Optional[str]] = {}  # job_id -> spec json, None = delete
+        self._cond = threading.Condition()
+        self._closed = False
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, spec TEXT NOT NULL)")
+        self._db.commit()
+        self.commits = 0
+        self._writer = threading.Thread(target=self._write_loop, name="JobStoreWriter", daemon=True)
+        self._writer.start()
+
+    def load_all(self) -> List[JobSpec]:
+        with self._db_lock:
+            rows = self._db.execute("SELECT spec FROM jobs").fetchall()
+        out = []
+        for (raw,) in rows:
+            try:
+                out.append(JobSpec.from_json(raw))
+            except Exception:
+                continue
+        return out
+
+    def put(self, spec: JobSpec):
+        self._enqueue(spec.job_id, spec.to_json())
+
+    def put_many(self, specs: List[JobSpec]):
+        with self._cond:
+            for spec in specs:
+                self._pending[spec.job_id] = spec.to_json()
+            self._cond.notify()
+
+    def delete(self, job_id: str):
+        self._enqueue(job_id, None)
+
+    def _enqueue(self, job_id: str, raw: Optional[str]):
+        with self._cond:
+            self._pending[job_id] = raw
+            self._cond.notify()
+
+    def flush(self):
+        with self._cond:
+            batch, self._pending = self._pending, {}
+        self._commit(batch)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._writer.join(timeout=5.0)
+        self.flush()
+        with self._db_lock:
+            self._db.close()
+
+    def _commit(self, batch: Dict[str, Optional[str]]):
+        if not batch:
+            return
+        upserts = [(k, v) for k, v in batch.items() if v is not None]
+        deletes = [(k,) for k, v in batch.items() if v is None]
+        with self._db_lock:
+            with self._db:
+                if upserts:
+                    self._db.executemany("INSERT OR REPLACE INTO jobs (job_id, spec) VALUES (?, ?)", upserts)
+                if deletes:
+                    self._db.executemany("DELETE FROM jobs WHERE job_id = ?", deletes)
+            self.commits += 1
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            # let a burst accumulate before committing it
+            if self._flush_s:
+                with self._cond:
+                    if not self._closed:
+                        self._cond.wait(self._flush_s)
+            self.flush()
+
+
+class JobManager:
+    """Persistent jobs: JobSpec in the store, Job with a rebuilt action in the scheduler.
+
+    Plugins register a factory per action_type; specs whose type isn't
+    registered yet stay parked and are scheduled as soon as it is. A plugin
+    that is loaded lazily announces its action types with expect_action(),
+    so new jobs for them are parked too instead of rejected, and the host is
+    told when the first one is parked so it can load the plugin.
+
+    A job whose trigger runs out (a one-shot that fired) is deleted from the
+    store right away, so a crash before checkpoint() can't fire it again.
+    """
+
+    def __init__(self, scheduler: Scheduler, store: JobStore, log: Callable[[str], None]):
+        self.scheduler = scheduler
+        self.store = store
+        self._log = log
+        self._lock = threading.Lock()
+        self._factories: Dict[str, ActionFactory] = {}
+        self._specs: Dict[str, JobSpec] = {}
+        self._parked: Dict[str, JobSpec] = {}
+        self._expected: Dict[str, Callable[[str], None]] = {}
+        scheduler.subscribe_exhausted(self._exhausted)
+
+    def register_action(self, action_type: str, factory: ActionFactory):
+        with self._lock:
+            self._factories[action_type] = factory
+            self._expected.pop(action_type, None)
+            ready = [s for s in self._parked.values() if s.action_type == action_type]
+            for s in ready:
+                del self._parked[s.job_id]
+        for s in ready:
+            self._schedule(s, s.next_fire)
+
+    def expect_action(self, action_type: str, on_parked: Callable[[str], None]):
+        """``action_type`` will be registered later; call ``on_parked(action_type)`` once a job needs it."""
+        with self._lock:
+            if action_type in self._factories:
+                return
+            self._expected[action_type] = on_parked
+            waiting = any(s.action_type == action_type for s in self._parked.values())
+        if waiting:
+            self._notify_parked(action_type)
+
+    def _notify_parked(self, action_type: str):
+        with self._lock:
+            cb = self._expected.pop(action_type, None)
+        if cb is not None:
+            try:
+                cb(action_type)
+            except Exception as e:
+                self._log(f"[Jobs] activating {action_type!r} failed: {e}")
+
+    def restore(self) -> int:
+        """Load every persisted job; returns how many were scheduled right away."""
+        specs = self.store.load_all()
+        scheduled = 0
+        for s in specs:
+            with self._lock:
+                known = s.action_type in self._factories
+                if not known:
+                    self._parked[s.job_id] = s
+            if known and self._schedule(s, s.next_fire):
+                scheduled += 1
+        for action_type in {s.action_type for s in specs}:
+            self._notify_parked(action_type)
+        return scheduled
+
+    def add(self, spec: JobSpec) -> bool:
+        with self._lock:
+            park = spec.action_type not in self._factories and spec.action_type in self._expected
+            if park:
+                self._parked[spec.job_id] = spec
+        if park:
+            # the plugin providing this action isn't loaded yet; schedule once it registers
+            self.store.put(spec)
+            self._notify_parked(spec.action_type)
+            return True
+        if not self._schedule(spec, None):
+            return False
+        spec.next_fire = self.scheduler.next_fire(spec.job_id)
+        with self._lock:
+            live = spec.job_id in self._specs
+        if live:  # a one-shot already in the past is exhausted (and deleted) on scheduling
+            self.store.put(spec)
+        return True
+
+    def remove(self, job_id: str):
+        with self._lock:
+            self._specs.pop(job_id, None)
+            self._parked.pop(job_id, None)
+        self.scheduler.remove(job_id)
+        self.store.delete(job_id)
+
+    def remap_target(self, old_hwnd: int, new_hwnd: int) -> List[str]:
+        """Point every job targeting ``old_hwnd`` at ``new_hwnd`` (e.g. after a relaunch); returns their ids."""
+        with self._lock:
+            hits = [s for s in self._specs.values() if s.target.get("hwnd") == old_hwnd]
+            for s in self._parked.values():
+                if s.target.get("hwnd") == old_hwnd:
+                    s.target = dict(s.target, hwnd=new_hwnd)
+                    self.store.put(s)
+        for s in hits:
+            s.target = dict(s.target, hwnd=new_hwnd)
+            # actions close over their target, so rebuild the job (keeping its next fire time)
+            if self._schedule(s, self.scheduler.next_fire(s.job_id)):
+                with self._lock:
+                    live = s.job_id in self._specs
+                if live:
+                    self.store.put(s)
+        return [s.job_id for s in hits]
+
+    def get(self, job_id: str) -> Optional[JobSpec]:
+        with self._lock:
+            return self._specs.get(job_id) or self._parked.get(job_id)
+
+    def specs(self) -> List[JobSpec]:
+        with self._lock:
+            return list(self._specs.values()) + list(self._parked.values())
+
+    def checkpoint(self):
+        """Persist current next-fire times of all live jobs (call on shutdown)."""
+        with self._lock:
+            specs = list(self._specs.values())
+        live = {j.job_id for j in self.scheduler.list_jobs()}
+        for s in specs:
+            if s.job_id in live:
+                s.next_fire = self.scheduler.next_fire(s.job_id)
+        self.store.put_many([s for s in specs if s.job_id in live])
+        self.store.flush()
+
+    def _exhausted(self, job_id: str):
+        # called by the scheduler once a job's trigger has no further fire
+        with self._lock:
+            spec = self._specs.pop(job_id, None)
+        if spec is not None:
+            self.store.delete(job_id)
+
+    def _schedule(self, spec: JobSpec, next_fire: Optional[float]) -> bool:
+        with self._lock:
+            factory = self._factories.get(spec.action_type)
+        if factory is None:
+            self._log(f"[Jobs] no action registered for {spec.action_type!r}; job {spec.job_id} not scheduled.")
+            return False
+        try:
+            trigger = trigger_from_dict(spec.trigger)
+            action = factory(spec)
+        except Exception as e:
+            self._log(f"[Jobs] cannot restore job {spec.job_id}: {e}")
+            return False
+        interval = int(spec.trigger.get("interval", 0) or 0)
+        job = Job(
+            job_id=spec.job_id, interval_sec=interval, action=action, enabled=spec.enabled,
+            overlap=spec.overlap, timeout_sec=spec.timeout_sec, trigger=trigger, misfire=spec.misfire,
+        )
+        with self._lock:
+            self._specs[spec.job_id] = spec
+        self.scheduler.add_or_update(job, next_fire=next_fire)
+        return True
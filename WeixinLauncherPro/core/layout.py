@@ -0,0 +1,227 @@
+"""Layout engine: target rects for N windows across every monitor's work area.
+
+A strategy is ``fn(LayoutRequest) -> List[Rect]`` registered under a name;
+"cascade" and "tile" are built in and plugins can add their own with
+register_layout(). Everything here is plain arithmetic over the monitor list
+(no win32), so layouts can be computed for synthetic monitor setups.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.config import Rect
+
+MAX_ASPECT_LOSS = 0.15  # tile: accept at most this coverage loss (vs the fill grid) to keep the aspect ratio
+
+
+@dataclass(frozen=True)
+class Monitor:
+    """A monitor's work area (taskbar excluded), in virtual-screen coordinates."""
+    x: int
+    y: int
+    w: int
+    h: int
+    primary: bool = False
+    name: str = ""
+
+    @property
+    def area(self) -> int:
+        return self.w * self.h
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.x <= x < self.x + self.w and self.y <= y < self.y + self.h
+
+
+@dataclass
+class LayoutRequest:
+    base: Rect
+    count: int
+    monitors: Sequence[Monitor]
+    cascade_dx: int = 30
+    cascade_dy: int = 30
+    options: Dict = field(default_factory=dict)
+
+    def base_monitor(self) -> Monitor:
+        """The monitor holding the base rect's centre (nearest one if it's off-screen)."""
+        cx, cy = self.base.x + self.base.w // 2, self.base.y + self.base.h // 2
+        for m in self.monitors:
+            if m.contains(cx, cy):
+                return m
+        return min(self.monitors, key=lambda m: (max(m.x - cx, 0, cx - m.x - m.w) ** 2
+                                                 + max(m.y - cy, 0, cy - m.y - m.h) ** 2))
+
+    def ordered_monitors(self) -> List[Monitor]:
+        """Base monitor first, then the rest left to right, top to bottom."""
+        first = self.base_monitor()
+        return [first] + sorted((m for m in self.monitors if m != first), key=lambda m: (m.x, m.y))
+
+
+LayoutFn = Callable[[LayoutRequest], List[Rect]]
+
+_STRATEGIES: Dict[str, Tuple[LayoutFn, str]] = {}
+
+
+def register_layout(name: str, fn: LayoutFn, title: str = ""):
+    """Add (or replace) a layout strategy; ``title`` is what the UI shows."""
+    _STRATEGIES[name] = (fn, title or name)
+
+
+def unregister_layout(name: str):
+    _STRATEGIES.pop(name, None)
+
+
+def available_layouts() -> List[Tuple[str, str]]:
+    """(name, title) of every registered strategy, in registration order."""
+    return [(name, title) for name, (_fn, title) in _STRATEGIES.items()]
+
+
+def compute_layout(name: str, req: LayoutRequest) -> List[Rect]:
+    if req.count <= 0:
+        return []
+    if not req.monitors:
+        raise ValueError("no monitors")
+    entry = _STRATEGIES.get(name)
+    if entry is None:
+        raise KeyError(f"unknown layout: {name}")
+    rects = entry[0](req)
+    if len(rects) != req.count:
+        raise ValueError(f"layout {name!r} returned {len(rects)} rect(s) for {req.count} window(s)")
+    return rects
+
+
+def split_by_area(count: int, monitors: Sequence[Monitor]) -> List[int]:
+    """Share ``count`` windows out in proportion to monitor area (largest remainder)."""
+    total = sum(m.area for m in monitors) or 1
+    quotas = [count * m.area / total for m in monitors]
+    out = [int(q) for q in quotas]
+    for i in sorted(range(len(monitors)), key=lambda i: quotas[i] - out[i], reverse=True)[:count - sum(out)]:
+        out[i] += 1
+    return out
+
+
+# cascade
+
+def _cascade_capacity(m: Monitor, w: int, h: int, dx: int, dy: int) -> int:
+    steps = []
+    if dx > 0:
+        steps.append((m.w - w) // dx + 1)
+    if dy > 0:
+        steps.append((m.h - h) // dy + 1)
+    return max(1, min(steps)) if steps else 1 << 30
+
+
+def layout_cascade(req: LayoutRequest) -> List[Rect]:
+    """Diagonal stacks starting at the base rect; a full monitor spills onto the next one.
+
+    Once every monitor's stack is full, new stacks start half a step to the
+    right of the previous ones (all on the same rows), so windows don't pile
+    into a corner until every start column has been used.
+    """
+    base, dx, dy = req.base, max(0, req.cascade_dx), max(0, req.cascade_dy)
+    mons = req.ordered_monitors()
+    first = mons[0]
+    ox, oy = base.x - first.x, base.y - first.y
+    stagger = max(8, (dx or dy) // 2)
+    starts = []  # per monitor: (x0, y0, w, h) of the first stack
+    for m in mons:
+        w, h = min(base.w, m.w), min(base.h, m.h)
+        starts.append((m, m.x + max(0, min(ox, m.w - w)), m.y + max(0, min(oy, m.h - h)), w, h))
+    stacks = []  # (x, y, w, h, capacity); only as many start columns as the count needs
+    room, j = 0, 0
+    while room < req.count:
+        added = 0
+        for m, x0, y0, w, h in starts:
+            x = x0 + j * stagger
+            if x + w > m.x + m.w:
+                continue
+            # capacity counted from the start point, so the stack never leaves the work area
+            cap = _cascade_capacity(Monitor(x, y0, m.x + m.w - x, m.y + m.h - y0), w, h, dx, dy)
+            stacks.append((x, y0, w, h, cap))
+            room += cap
+            added += 1
+        if not added:
+            break
+        j += 1
+    rects: List[Rect] = []
+    while len(rects) < req.count:  # more than every start column holds: go round again
+        for x0, y0, w, h, cap in stacks:
+            take = min(cap, req.count - len(rects))
+            rects.extend(Rect(x0 + k * dx, y0 + k * dy, w, h) for k in range(take))
+            if len(rects) == req.count:
+                break
+    return rects
+
+
+# tile
+
+def best_grid(k: int, mw: int, mh: int, bw: int, bh: int) -> Tuple[int, int, int, int]:
+    """(cols, rows, win_w, win_h) for ``k`` windows shaped like a bw x bh base on an mw x mh area.
+
+    Windows keep the base aspect ratio and are never scaled above the base
+    size. Picks the grid whose windows cover the most area; ties go to the
+    fewest empty cells, then to the fewest columns.
+    """
+    aspect = bw / bh if bh > 0 else 1.0
+    best = None
+    for cols in range(1, k + 1):
+        rows = -(-k // cols)
+        if cols > 1 and (cols - 1) * rows >= k:
+            continue  # one column fewer fits the same rows
+        w = min(mw / cols, mh / rows * aspect, bw)
+        h = w / aspect
+        key = (int(w) * int(h), -(cols * rows - k), -cols)
+        if best is None or key > best[0]:
+            best = (key, cols, rows, int(w), int(h))
+    return best[1], best[2], best[3], best[4]
+
+
+def fill_grid(k: int, m: Monitor, bw: int, bh: int) -> List[Rect]:
+    """The old ceil(sqrt(k)) grid on ``m``: cells fill the monitor, windows capped at the base size."""
+    cols = math.ceil(math.sqrt(k))
+    rows = math.ceil(k / cols)
+    cw, ch = max(1, m.w // cols), max(1, m.h // rows)
+    w, h = min(bw, cw), min(bh, ch)
+    return [Rect(m.x + (i % cols) * cw, m.y + (i // cols) * ch, w, h) for i in range(k)]
+
+
+def layout_tile(req: LayoutRequest) -> List[Rect]:
+    """Aspect-preserving grid per monitor; windows are shared out by monitor area and centred in their cells.
+
+    Keeping the aspect ratio can leave much of a monitor empty (4 windows on
+    one 1080p screen cover ~70% instead of ~94%). Where the aspect-fit grid
+    covers less than ``1 - max_aspect_loss`` (option, default
+    MAX_ASPECT_LOSS) of what the old fill grid covers, that monitor gets the
+    fill grid instead, with windows stretched to their cells.
+    """
+    max_loss = float(req.options.get("max_aspect_loss", MAX_ASPECT_LOSS))
+    mons = req.ordered_monitors()
+    rects: List[Rect] = []
+    for m, k in zip(mons, split_by_area(req.count, mons)):
+        if k == 0:
+            continue
+        cols, rows, w, h = best_grid(k, m.w, m.h, req.base.w, req.base.h)
+        fill = fill_grid(k, m, req.base.w, req.base.h)
+        if k * w * h < (1.0 - max_loss) * sum(r.w * r.h for r in fill):
+            rects.extend(fill)
+            continue
+        cw, ch = m.w // cols, m.h // rows
+        pad_x, pad_y = (cw - w) // 2, (ch - h) // 2
+        rects.extend(Rect(m.x + (i % cols) * cw + pad_x, m.y + (i // cols) * ch + pad_y, w, h) for i in range(k))
+    return rects
+
+
+register_layout("cascade", layout_cascade, "层叠")
+register_layout("tile", layout_tile, "平铺")
+
+
+def naive_tile(base: Rect, count: int, m: Monitor) -> List[Rect]:
+    """The old single-monitor ceil(sqrt(n)) grid, kept for comparison in benchmarks."""
+    return fill_grid(count, m, base.w, base.h)
+
+
+def primary_only(monitors: Sequence[Monitor], base: Optional[Rect] = None) -> List[Monitor]:
+    """Just the monitor the base rect is on (or the primary one) — for 'single monitor' mode."""
+    if base is not None:
+        return [LayoutRequest(base, 1, monitors).base_monitor()]
+    return [next((m for m in monitors if m.primary), monitors[0])]
@@ -1,16 +1,139 @@
-from dataclasses import dataclass
-from typing import Callable
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, List, Optional
+
+INFO = "INFO"
+WARN = "WARN"
+ERROR = "ERROR"
 
 
 @dataclass
+class LogRecord:
+    ts: float
+    level: str
+    msg: str
+    thread: str = field(default_factory=lambda: threading.current_thread().name)
+
+    def line(self) -> str:
+        return self.msg if self.level == INFO else f"[{self.level}] {self.msg}"
+
+    def to_json(self) -> str:
+        return json.dumps({"ts": round(self.ts, 3), "level": self.level, "msg": self.msg, "thread": self.thread},
+                          ensure_ascii=False)
+
+
+class RotatingJsonFileSink:
+    """Writes LogRecords as JSON lines from a background thread, rotating at ``max_bytes``."""
+
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024, backups: int = 3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._q: "queue.Queue[Optional[LogRecord]]" = queue.Queue()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8")
+        self._thread = threading.Thread(target=self._write_loop, name="LogFileWriter", daemon=True)
+        self._thread.start()
+
+    def put(self, rec: LogRecord):
+        self._q.put(rec)
+
+    def close(self):
+        self._q.put(None)
+        self._thread.join(timeout=2.0)
+        self._f.close()
+
+    def _rotate(self):
+        self._f.close()
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._f = open(self.path, "a", encoding="utf-8")
+
+    def _write_loop(self):
+        while True:
+            batch = [self._q.get()]
+            # take whatever else is already queued so a burst is one write + flush
+            while True:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            lines = [r.to_json() + "\n" for r in batch if r is not None]
+            try:
+                if lines:
+                    self._f.write("".join(lines))
+                    self._f.flush()
+                    if self._f.tell() >= self.max_bytes:
+                        self._rotate()
+            except Exception:
+                pass
+            if stop:
+                return
+
+
 class Logger:
-    sink: Callable[[str], None]
+    """Thread-safe logger.
+
+    info/warn/error only append a record to a bounded deque (deque appends
+    are atomic, no lock), so they are cheap from any thread. A UI drains
+    pending records in batches with drain(); ``history`` keeps the last
+    ``capacity`` records. ``sink`` (optional) is called synchronously with
+    the formatted line instead, for headless use. When ``capacity`` is exceeded
+    before a drain, the oldest pending records are dropped and counted.
+    """
+
+    def __init__(self, sink: Optional[Callable[[str], None]] = None, capacity: int = 2000,
+                 file_sink: Optional[RotatingJsonFileSink] = None):
+        self.sink = sink
+        self.file_sink = file_sink
+        self._pending: Deque[LogRecord] = deque(maxlen=capacity)
+        self.history: Deque[LogRecord] = deque(maxlen=capacity)
+        self.dropped = 0
 
     def info(self, msg: str):
-        self.sink(msg)
+        self._emit(INFO, msg)
 
     def warn(self, msg: str):
-        self.sink("[WARN] " + msg)
+        self._emit(WARN, msg)
 
     def error(self, msg: str):
-        self.sink("[ERROR] " + msg)
+        self._emit(ERROR, msg)
+
+    def _emit(self, level: str, msg: str):
+        rec = LogRecord(time.time(), level, msg)
+        self.history.append(rec)
+        if self.file_sink is not None:
+            self.file_sink.put(rec)
+        if self.sink is not None:
+            self.sink(rec.line())
+            return
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append(rec)
+
+    def drain(self, max_items: int = 500) -> List[LogRecord]:
+        out = []
+        pop = self._pending.popleft
+        try:
+            for _ in range(max_items):
+                out.append(pop())
+        except IndexError:
+            pass
+        return out
+
+    def close(self):
+        if self.file_sink is not None:
+            self.file_sink.close()
+            self.file_sink = None
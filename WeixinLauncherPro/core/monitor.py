@@ -0,0 +1,209 @@
+"""Resource monitoring of the running WeChat instances.
+
+ProcessSampler reads CPU, memory, handle and thread counters for a set of
+PIDs; ResourceMonitor samples the registry's instances on a background
+thread, keeps a short per-instance history for the monitor tab and paces
+itself so its own CPU use stays within a budget.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import psutil
+
+
+@dataclass
+class Sample:
+    ts: float
+    cpu: float        # percent of one core
+    rss: int          # bytes
+    private: int      # bytes (private bytes on Windows, vms elsewhere)
+    handles: int      # handles on Windows, open fds elsewhere
+    threads: int
+
+
+def _handles(p) -> int:
+    fn = getattr(p, "num_handles", None) or getattr(p, "num_fds", None)
+    return fn() if fn else 0
+
+
+class ProcessSampler:
+    """Samples a set of PIDs, each through a cached psutil.Process.
+
+    The Process objects are kept between passes, so a pass costs one
+    ``oneshot()`` read per wanted PID rather than a walk over the whole
+    process table. Whether a cached PID now belongs to another process is
+    checked (``is_running()``, which re-reads the create time and costs
+    about as much as a sample) every ``verify_every`` passes, and at once
+    when its CPU time goes backwards; such an entry is replaced and its CPU
+    % starts over. CPU % is derived from cpu_times deltas between passes.
+    """
+
+    def __init__(self, process: Callable[[int], psutil.Process] = psutil.Process,
+                 clock: Callable[[], float] = time.monotonic, verify_every: int = 10):
+        self._process = process
+        self._clock = clock
+        self.verify_every = max(1, int(verify_every))
+        self._passes = 0
+        self._procs: Dict[int, psutil.Process] = {}
+        self._prev: Dict[int, Tuple[float, float]] = {}  # pid -> (cpu seconds, ts)
+
+    def _get(self, pid: int, verify: bool) -> psutil.Process:
+        p = self._procs.get(pid)
+        if p is not None and verify and not p.is_running():
+            p = None
+            self._prev.pop(pid, None)
+        if p is None:
+            p = self._procs[pid] = self._process(pid)
+        return p
+
+    def _read(self, pid: int, verify: bool):
+        p = self._get(pid, verify)
+        with p.oneshot():
+            ct = p.cpu_times()
+            mem = p.memory_info()
+            handles = _handles(p)
+            threads = p.num_threads()
+        return ct.user + ct.system, mem, handles, threads
+
+    def sample(self, pids: Iterable[int]) -> Dict[int, Sample]:
+        wanted = set(pids)
+        out: Dict[int, Sample] = {}
+        for pid in [pid for pid in self._procs if pid not in wanted]:
+            del self._procs[pid]
+        self._prev = {pid: v for pid, v in self._prev.items() if pid in wanted}
+        now = self._clock()
+        self._passes += 1
+        verify = self._passes % self.verify_every == 0
+        for pid in wanted:
+            try:
+                busy, mem, handles, threads = self._read(pid, verify)
+                prev = self._prev.get(pid)
+                if prev is not None and busy < prev[0] and not verify:
+                    # CPU time never goes backwards within one process: the PID was reused
+                    busy, mem, handles, threads = self._read(pid, True)
+                    prev = self._prev.get(pid)
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                self._procs.pop(pid, None)
+                self._prev.pop(pid, None)
+                continue
+            cpu = 0.0
+            if prev is not None and now > prev[1]:
+                cpu = max(0.0, (busy - prev[0]) / (now - prev[1]) * 100.0)
+            self._prev[pid] = (busy, now)
+            out[pid] = Sample(now, cpu, mem.rss, getattr(mem, "private", mem.vms), handles, threads)
+        return out
+
+
+class ResourceMonitor:
+    """Background sampling of every WeChat instance with per-instance ring-buffer history.
+
+    ``targets()`` returns {pid: label} (e.g. from the window registry). The
+    sampling interval adapts so the monitor's own CPU time stays under
+    ``budget`` (fraction of one core): interval >= cost / budget, clamped to
+    [min_interval, max_interval]. While nobody is looking (set_active(False))
+    it samples at max_interval.
+    """
+
+    def __init__(self, targets: Callable[[], Dict[int, str]], sampler: Optional[ProcessSampler] = None,
+                 history: int = 120, min_interval: float = 1.0, max_interval: float = 10.0,
+                 budget: float = 0.005, on_log: Optional[Callable[[str], None]] = None,
+                 cpu_clock: Callable[[], float] = time.thread_time):
+        self._targets = targets
+        self.sampler = sampler or ProcessSampler()
+        self.history_len = history
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget = budget
+        self._log = on_log or (lambda m: None)
+        self._cpu_clock = cpu_clock
+        self._lock = threading.Lock()
+        self._history: Dict[int, Deque[Sample]] = {}
+        self._labels: Dict[int, str] = {}
+        self._active = True
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.interval = min_interval
+        self.current_interval = min_interval
+        self.last_cost = 0.0
+        self.total_cost = 0.0
+        self.samples_taken = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ResourceMonitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def set_active(self, active: bool):
+        if active and not self._active:
+            self._wake.set()
+        self._active = active
+
+    def sample_once(self) -> float:
+        """One sampling pass; returns its CPU cost in seconds."""
+        c0 = self._cpu_clock()
+        targets = self._targets()
+        samples = self.sampler.sample(targets.keys())
+        with self._lock:
+            for pid, s in samples.items():
+                h = self._history.get(pid)
+                if h is None:
+                    h = self._history[pid] = deque(maxlen=self.history_len)
+                h.append(s)
+            for pid in [p for p in self._history if p not in targets]:
+                del self._history[pid]
+            self._labels = dict(targets)
+        self.samples_taken += 1
+        cost = self._cpu_clock() - c0
+        self.last_cost = cost
+        self.total_cost += cost
+        return cost
+
+    def latest(self) -> List[Dict]:
+        """Newest sample per instance, in label order."""
+        with self._lock:
+            rows = []
+            for pid, h in self._history.items():
+                if not h:
+                    continue
+                s = h[-1]
+                rows.append({"label": self._labels.get(pid, ""), "pid": pid, "cpu": s.cpu, "rss": s.rss,
+                             "private": s.private, "handles": s.handles, "threads": s.threads})
+        rows.sort(key=lambda r: (len(r["label"]), r["label"]))
+        return rows
+
+    def history(self, pid: int) -> List[Sample]:
+        with self._lock:
+            return list(self._history.get(pid, ()))
+
+    def _next_interval(self, cost: float) -> float:
+        if not self._active:
+            self.current_interval = self.max_interval
+            return self.current_interval
+        want = cost / self.budget if self.budget > 0 else self.min_interval
+        # smooth so one slow pass doesn't make the table stall
+        self.interval = 0.7 * self.interval + 0.3 * want
+        self.current_interval = max(self.min_interval, min(self.max_interval, self.interval))
+        return self.current_interval
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                cost = self.sample_once()
+            except Exception as e:
+                self._log(f"[Monitor] sampling failed: {e}")
+                cost = 0.0
+            self._wake.wait(self._next_interval(cost))
+            self._wake.clear()
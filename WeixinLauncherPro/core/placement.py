@@ -0,0 +1,345 @@
+"""Batched window placement: read once, drop no-ops, commit the rest in one transaction.
+
+WindowPlacer works against a small "native" interface so the same code runs
+on win32 (Win32Native) and on an in-memory desktop that counts every call
+(FakeNative), which is what tests and benchmarks assert minimal call counts
+against.
+"""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+from core.config import Rect
+
+STATE_NORMAL = "normal"
+STATE_MINIMIZED = "minimized"
+STATE_MAXIMIZED = "maximized"
+HWND_TOP = 0
+
+
+@dataclass
+class WinState:
+    state: str
+    rect: Optional[Rect]           # None while minimized
+    normal: Optional[Rect] = None  # where the window goes when restored (rcNormalPosition)
+
+
+@dataclass
+class ApplyResult:
+    moved: int = 0
+    unchanged: int = 0
+    restored: int = 0
+    missing: int = 0
+    transactions: int = 0
+    fallback: bool = False  # the batch failed and windows were moved one by one
+
+
+class Native(Protocol):
+    def read(self, hwnd: int) -> Optional[WinState]: ...    # None if the window is gone
+    def show(self, hwnd: int, state: str, sync: bool = True) -> None: ...
+    def begin(self, n: int): ...
+    def defer(self, batch, hwnd: int, rect: Optional[Rect], after: Optional[int]): ...
+    def end(self, batch) -> None: ...
+    def move(self, hwnd: int, rect: Rect) -> None: ...      # single SetWindowPos, for the fallback
+    def set_normal(self, hwnd: int, rect: Rect) -> None: ...  # restored rect only, show state kept
+    def stack(self) -> List[int]: ...                        # top-level windows, topmost first
+
+
+class Win32Native:
+    """Native ops over pywin32; one read = GetWindowPlacement (+ GetWindowRect when not minimized).
+
+    rcNormalPosition is in workspace coordinates (relative to the monitor's
+    work area, so a top or left taskbar shifts it); it is converted to and
+    from screen coordinates here.
+    """
+
+    def __init__(self):
+        import ctypes
+        import win32api
+        import win32con
+        import win32gui
+        self._api = win32api
+        self._gui = win32gui
+        self._con = win32con
+        self._show_async = ctypes.windll.user32.ShowWindowAsync
+        self._show = {
+            STATE_NORMAL: win32con.SW_RESTORE,
+            STATE_MINIMIZED: win32con.SW_SHOWMINNOACTIVE,
+            STATE_MAXIMIZED: win32con.SW_SHOWMAXIMIZED,
+        }
+
+    def read(self, hwnd: int) -> Optional[WinState]:
+        g, c = self._gui, self._con
+        try:
+            placement = g.GetWindowPlacement(hwnd)
+            show_cmd = placement[1]
+            normal = self._workspace_shift(placement[4], 1)
+            if show_cmd == c.SW_SHOWMINIMIZED:
+                return WinState(STATE_MINIMIZED, None, normal)
+            l, t, r, b = g.GetWindowRect(hwnd)
+        except (g.error, self._api.error):
+            return None
+        state = STATE_MAXIMIZED if show_cmd == c.SW_SHOWMAXIMIZED else STATE_NORMAL
+        return WinState(state, Rect(int(l), int(t), int(r - l), int(b - t)), normal)
+
+    def set_normal(self, hwnd: int, rect: Rect) -> None:
+        flags, show_cmd, pt_min, pt_max, _ = self._gui.GetWindowPlacement(hwnd)
+        ws = self._workspace_shift((rect.x, rect.y, rect.x + rect.w, rect.y + rect.h), -1)
+        r = (ws.x, ws.y, ws.x + ws.w, ws.y + ws.h)
+        self._gui.SetWindowPlacement(hwnd, (flags, show_cmd, pt_min, pt_max, r))
+
+    def _workspace_shift(self, ltrb, sign: int) -> Rect:
+        # sign 1: workspace -> screen, -1: screen -> workspace
+        l, t, r, b = (int(v) for v in ltrb)
+        mon = self._api.MonitorFromRect((l, t, r, b), self._con.MONITOR_DEFAULTTONEAREST)
+        info = self._api.GetMonitorInfo(mon)
+        dx = info["Work"][0] - info["Monitor"][0]
+        dy = info["Work"][1] - info["Monitor"][1]
+        return Rect(l + sign * dx, t + sign * dy, r - l, b - t)
+
+    def show(self, hwnd: int, state: str, sync: bool = True) -> None:
+        if sync:
+            self._gui.ShowWindow(hwnd, self._show[state])
+        else:
+            # group ops: one hung instance can't stall the rest
+            self._show_async(hwnd, self._show[state])
+
+    def begin(self, n: int):
+        return self._gui.BeginDeferWindowPos(n)
+
+    def defer(self, batch, hwnd: int, rect: Optional[Rect], after: Optional[int]):
+        c = self._con
+        flags = c.SWP_NOACTIVATE
+        if rect is None:
+            x = y = w = h = 0
+            flags |= c.SWP_NOMOVE | c.SWP_NOSIZE
+        else:
+            x, y, w, h = rect.x, rect.y, rect.w, rect.h
+        if after is None:
+            flags |= c.SWP_NOZORDER
+        return self._gui.DeferWindowPos(batch, hwnd, after, x, y, w, h, flags)
+
+    def end(self, batch) -> None:
+        self._gui.EndDeferWindowPos(batch)
+
+    def move(self, hwnd: int, rect: Rect) -> None:
+        c = self._con
+        self._gui.SetWindowPos(hwnd, None, rect.x, rect.y, rect.w, rect.h, c.SWP_NOZORDER | c.SWP_NOACTIVATE)
+
+    def stack(self) -> List[int]:
+        out: List[int] = []
+        # EnumWindows walks top-level windows in z-order
+        self._gui.EnumWindows(lambda hwnd, acc: acc.append(int(hwnd)) or True, out)
+        return out
+
+
+@dataclass
+class FakeWindow:
+    rect: Rect
+    state: str = STATE_NORMAL
+
+
+@dataclass
+class _FakeBatch:
+    ops: List[Tuple[int, Optional[Rect], Optional[int]]] = field(default_factory=list)
+
+
+class FakeNative:
+    """In-memory desktop. ``calls`` counts native calls by name; ``repaints`` counts repaint passes
+    (one per committed transaction, single move, or show that changes the state).
+
+    A window's ``rect`` is its restored rect; maximized windows read as ``screen``."""
+
+    def __init__(self, screen: Rect = Rect(0, 0, 1920, 1040)):
+        self.screen = screen
+        self.windows: Dict[int, FakeWindow] = {}
+        self.z: List[int] = []  # topmost first
+        self.calls: Counter = Counter()
+        self.repaints = 0
+        self.fail_batches = False
+
+    def add(self, hwnd: int, rect: Rect, state: str = STATE_NORMAL):
+        self.windows[hwnd] = FakeWindow(rect, state)
+        self.z.append(hwnd)
+
+    def read(self, hwnd: int) -> Optional[WinState]:
+        self.calls["read"] += 1
+        w = self.windows.get(hwnd)
+        if w is None:
+            return None
+        if w.state == STATE_MINIMIZED:
+            return WinState(w.state, None, w.rect)
+        return WinState(w.state, self.screen if w.state == STATE_MAXIMIZED else w.rect, w.rect)
+
+    def show(self, hwnd: int, state: str, sync: bool = True) -> None:
+        self.calls["show"] += 1
+        w = self.windows.get(hwnd)
+        if w is not None and w.state != state:
+            w.state = state
+            self.repaints += 1
+
+    def begin(self, n: int):
+        self.calls["begin"] += 1
+        return _FakeBatch()
+
+    def defer(self, batch, hwnd: int, rect: Optional[Rect], after: Optional[int]):
+        self.calls["defer"] += 1
+        batch.ops.append((hwnd, rect, after))
+        return batch
+
+    def end(self, batch) -> None:
+        self.calls["end"] += 1
+        if self.fail_batches or any(h not in self.windows for h, _, _ in batch.ops):
+            raise OSError("EndDeferWindowPos failed")
+        for hwnd, rect, after in batch.ops:
+            if rect is not None:
+                self.windows[hwnd].rect = rect
+            if after is not None:
+                self.z.remove(hwnd)
+                self.z.insert(0 if after == HWND_TOP else self.z.index(after) + 1, hwnd)
+        self.repaints += 1
+
+    def move(self, hwnd: int, rect: Rect) -> None:
+        self.calls["move"] += 1
+        if hwnd not in self.windows:
+            raise OSError("invalid window handle")
+        self.windows[hwnd].rect = rect
+        self.repaints += 1
+
+    def set_normal(self, hwnd: int, rect: Rect) -> None:
+        self.calls["set_normal"] += 1
+        w = self.windows[hwnd]
+        w.rect = rect
+        if w.state == STATE_NORMAL:
+            self.repaints += 1
+
+    def stack(self) -> List[int]:
+        self.calls["stack"] += 1
+        return list(self.z)
+
+
+class WindowPlacer:
+    """Layout apply and group show/raise operations over a Native backend."""
+
+    def __init__(self, native: Native):
+        self.native = native
+
+    def read(self, hwnds: Iterable[int]) -> Dict[int, WinState]:
+        """Current state of every live window in one pass."""
+        out = {}
+        for hwnd in hwnds:
+            st = self.native.read(hwnd)
+            if st is not None:
+                out[hwnd] = st
+        return out
+
+    def apply(self, pairs: Sequence[Tuple[int, Optional[Rect]]], stack: bool = False) -> ApplyResult:
+        """Move windows to their rects; windows already restored and in place are not touched.
+
+        With ``stack=True`` the pairs are also put in z-order, first one
+        topmost, in the same transaction; skipped if they already are. A
+        rect of None only takes part in the z-order (the window isn't moved
+        or restored).
+        """
+        res = ApplyResult()
+        states = self.read(h for h, _ in pairs)
+        todo: List[Tuple[int, Rect]] = []
+        for hwnd, rect in pairs:
+            st = states.get(hwnd)
+            if st is None:
+                res.missing += 1
+            elif rect is None or (st.state == STATE_NORMAL and st.rect == rect):
+                res.unchanged += 1
+            else:
+                if st.state != STATE_NORMAL:
+                    self.native.show(hwnd, STATE_NORMAL)
+                    res.restored += 1
+                todo.append((hwnd, rect))
+        restack = stack and self._out_of_order([h for h, _ in pairs if h in states])
+        if not todo and not restack:
+            return res
+        if restack:
+            moving = dict(todo)
+            ops, prev = [], HWND_TOP
+            for hwnd, _rect in pairs:
+                if hwnd in states:
+                    ops.append((hwnd, moving.get(hwnd), prev))
+                    prev = hwnd
+        else:
+            ops = [(h, r, None) for h, r in todo]
+        if self._commit(ops):
+            res.transactions = 1
+            res.moved = len(todo)
+            return res
+        # a window vanished mid-batch; move the rest one by one (z-order is left as it is)
+        res.fallback = True
+        for hwnd, rect in todo:
+            try:
+                self.native.move(hwnd, rect)
+                res.moved += 1
+            except Exception:
+                res.missing += 1
+        return res
+
+    def set_normal(self, pairs: Sequence[Tuple[int, Rect]]) -> int:
+        """Set where minimized/maximized windows go when restored, without showing them; returns how many changed."""
+        changed = 0
+        states = self.read(h for h, _ in pairs)
+        for hwnd, rect in pairs:
+            st = states.get(hwnd)
+            if st is None or st.normal == rect:
+                continue
+            try:
+                self.native.set_normal(hwnd, rect)
+                changed += 1
+            except Exception:
+                pass
+        return changed
+
+    def z_order(self, hwnds: Iterable[int]) -> List[int]:
+        """The given windows sorted topmost first (windows that are gone are dropped)."""
+        want = set(hwnds)
+        return [h for h in self.native.stack() if h in want]
+
+    def _out_of_order(self, hwnds: List[int]) -> bool:
+        return self.z_order(hwnds) != hwnds
+
+    def minimize(self, hwnds: Sequence[int]) -> int:
+        return self._show_all(hwnds, STATE_MINIMIZED)
+
+    def restore(self, hwnds: Sequence[int]) -> int:
+        return self._show_all(hwnds, STATE_NORMAL)
+
+    def maximize(self, hwnds: Sequence[int]) -> int:
+        return self._show_all(hwnds, STATE_MAXIMIZED)
+
+    def raise_(self, hwnds: Sequence[int]) -> bool:
+        """Bring the windows to the top of the z-order, first one topmost, in one transaction."""
+        live = [h for h, st in self.read(hwnds).items() if st.state != STATE_MINIMIZED]
+        if not live:
+            return True
+        ops = []
+        prev = HWND_TOP
+        for hwnd in live:
+            ops.append((hwnd, None, prev))
+            prev = hwnd
+        return self._commit(ops)
+
+    def _show_all(self, hwnds: Sequence[int], state: str) -> int:
+        changed = 0
+        for hwnd, st in self.read(hwnds).items():
+            if st.state != state:
+                self.native.show(hwnd, state, sync=False)
+                changed += 1
+        return changed
+
+    def _commit(self, ops: List[Tuple[int, Optional[Rect], Optional[int]]]) -> bool:
+        try:
+            batch = self.native.begin(len(ops))
+            for hwnd, rect, after in ops:
+                batch = self.native.defer(batch, hwnd, rect, after)
+            self.native.end(batch)
+            return True
+        except Exception:
+            return False
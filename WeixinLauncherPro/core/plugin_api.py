@@ -1,28 +1,110 @@
-import os
+"""Plugin discovery and lazy loading.
+
+Every plugins/<dir>/ carries a static plugin.json manifest, e.g.
+
+    {"id": "scheduler", "name": "定时任务", "version": "0.2.0",
+     "entry": "plugin.py", "activation": ["onAction:focus_and_copy"]}
+
+load_all() reads the manifests only (no plugin code runs) and adds one
+placeholder page per plugin to the notebook. A plugin is imported,
+init()-ed and started when one of its activation events fires; its tab is
+built with get_tab() the first time its page is selected (activating it
+first if needed). Activation events:
+
+- ``onStartup``: at startup;
+- ``onConfig:<field>``: at startup, if that AppConfig field is truthy;
+- ``onAction:<action_type>``: as soon as a persisted or newly added job
+  needs that action (see JobManager.expect_action).
+
+A plugin directory without a manifest is loaded at startup, as before.
+
+A manifest may also name a ``worker`` module holding the plugin's non-UI
+logic (see core.isolation). Its handle is started when the plugin
+activates and passed to the plugin's attach_worker(handle), if it has one,
+before init(). With ``plugin_isolation`` on, the worker runs in a
+supervised child process, so a blocking or crashing worker cannot stall
+or take down the Tk loop.
+"""
+
 import importlib.util
-from dataclasses import dataclass
-from typing import Protocol, List
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Protocol
 from tkinter import ttk
 
-from core.context import AppContext
+from core.isolation import InProcessWorker, IsolatedWorker
 from core.paths import resource_path
 
+if TYPE_CHECKING:  # core.context pulls in the win32 modules; plugin discovery doesn't need them
+    from core.context import AppContext
+
+MANIFEST_FILE = "plugin.json"
+ON_STARTUP = "onStartup"
+ON_CONFIG = "onConfig:"
+ON_ACTION = "onAction:"
+ON_TAB = "onTab"
+
+STATE_PENDING = "pending"
+STATE_ACTIVE = "active"
+STATE_FAILED = "failed"
+
 
 class Plugin(Protocol):
     id: str
     name: str
     version: str
 
-    def init(self, ctx: AppContext) -> None: ...
+    def init(self, ctx: "AppContext") -> None: ...
     def get_tab(self, parent) -> ttk.Frame: ...
     def on_start(self) -> None: ...
     def on_stop(self) -> None: ...
 
 
+@dataclass
+class PluginManifest:
+    id: str
+    name: str
+    version: str = "0.0.0"
+    entry: str = "plugin.py"
+    activation: List[str] = field(default_factory=list)
+    path: str = ""  # plugin directory
+    worker: str = ""  # optional worker module (core.isolation), relative to path
+
+
 @dataclass
 class LoadedPlugin:
-    plugin: Plugin
-    tab: ttk.Frame
+    manifest: PluginManifest
+    plugin: Optional[Plugin] = None
+    tab: Optional[ttk.Frame] = None  # notebook page; the plugin's own tab is packed into it once built
+    state: str = STATE_PENDING
+    built: bool = False
+    activated_by: str = ""
+    load_ms: float = 0.0             # import + create_plugin() + init() + on_start()
+    build_ms: float = 0.0            # get_tab()
+    error: str = ""
+    worker: Optional[object] = None  # InProcessWorker / IsolatedWorker
+
+
+def read_manifest(plugin_dir: str) -> Optional[PluginManifest]:
+    """The manifest of a plugin directory, None if it has none; ValueError if it is malformed."""
+    path = os.path.join(plugin_dir, MANIFEST_FILE)
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ValueError(f"{path}: {e}")
+    if not isinstance(raw, dict) or not raw.get("id") or not raw.get("name"):
+        raise ValueError(f"{path}: 'id' and 'name' are required")
+    activation = raw.get("activation") or []
+    if not isinstance(activation, list):
+        raise ValueError(f"{path}: 'activation' must be a list")
+    return PluginManifest(id=str(raw["id"]), name=str(raw["name"]), version=str(raw.get("version", "0.0.0")),
+                          entry=str(raw.get("entry") or "plugin.py"), activation=[str(a) for a in activation],
+                          path=plugin_dir, worker=str(raw.get("worker") or ""))
 
 
 def _load_plugin_module_from_file(mod_name: str, file_path: str):
@@ -34,60 +116,204 @@ def _load_plugin_module_from_file(mod_name: str, file_path: str):
     return mod
 
 
-def load_single_plugin_from_dir(plugin_dir_name: str, ctx: AppContext) -> Plugin:
-    """Load a single plugin by directory name under plugins/. For debug runner."""
-    plugin_py = resource_path("plugins", plugin_dir_name, "plugin.py")
-    if not os.path.isfile(plugin_py):
-        raise FileNotFoundError(f"plugin.py not found: {plugin_py}")
-    mod = _load_plugin_module_from_file(f"plugin_{plugin_dir_name}", plugin_py)
+def _create(manifest: PluginManifest) -> Plugin:
+    entry = os.path.join(manifest.path, manifest.entry)
+    if not os.path.isfile(entry):
+        raise FileNotFoundError(f"{manifest.entry} not found: {entry}")
+    mod = _load_plugin_module_from_file(f"plugin_{os.path.basename(manifest.path)}", entry)
     if not hasattr(mod, "create_plugin"):
         raise RuntimeError("create_plugin() not found")
-    plugin = mod.create_plugin()
+    return mod.create_plugin()
+
+
+def load_single_plugin_from_dir(plugin_dir_name: str, ctx: "AppContext") -> Plugin:
+    """Load a single plugin by directory name under plugins/. For debug runner."""
+    plugin_dir = resource_path("plugins", plugin_dir_name)
+    manifest = read_manifest(plugin_dir) or PluginManifest(plugin_dir_name, plugin_dir_name, path=plugin_dir)
+    plugin = _create(manifest)
     plugin.init(ctx)
     return plugin
 
 
 class PluginHost:
-    def __init__(self, ctx: AppContext):
+    def __init__(self, ctx: "AppContext", plugins_dir: Optional[str] = None):
         self.ctx = ctx
+        self.plugins_dir = plugins_dir or resource_path("plugins")
         self.loaded: List[LoadedPlugin] = []
+        self.discover_ms = 0.0
+        self._notebook: Optional[ttk.Notebook] = None
+        self._by_page: Dict[str, LoadedPlugin] = {}
+        self._notes: Dict[str, ttk.Label] = {}
+
+    # discovery
+
+    def discover(self) -> List[LoadedPlugin]:
+        """Read every manifest under plugins_dir; no plugin code is imported."""
+        t0 = time.perf_counter()
+        self.loaded = []
+        if not os.path.isdir(self.plugins_dir):
+            self.ctx.log.warn(f"plugins dir not found: {self.plugins_dir}")
+            return self.loaded
+        for name in sorted(os.listdir(self.plugins_dir)):
+            plugin_dir = os.path.join(self.plugins_dir, name)
+            try:
+                manifest = read_manifest(plugin_dir)
+            except ValueError as e:
+                self.ctx.log.error(f"Bad plugin manifest: {e}")
+                continue
+            if manifest is None:
+                if not os.path.isfile(os.path.join(plugin_dir, "plugin.py")):
+                    continue
+                # no manifest: nothing to show until its code runs, so load it at startup
+                manifest = PluginManifest(name, name, activation=[ON_STARTUP], path=plugin_dir)
+            self.loaded.append(LoadedPlugin(manifest))
+        self.discover_ms = (time.perf_counter() - t0) * 1000
+        return self.loaded
 
     def load_all(self, notebook: ttk.Notebook):
-        plugins_dir = resource_path("plugins")
-        if not os.path.isdir(plugins_dir):
-            self.ctx.log.warn(f"plugins dir not found: {plugins_dir}")
+        """Add a placeholder page per plugin; plugins load on activation or first selection."""
+        self._notebook = notebook
+        for rec in self.discover():
+            page = ttk.Frame(notebook)
+            note = ttk.Label(page, text="正在加载插件…")
+            note.pack(anchor="w", padx=10, pady=10)
+            notebook.add(page, text=rec.manifest.name)
+            rec.tab = page
+            self._by_page[str(page)] = rec
+            self._notes[rec.manifest.id] = note
+        self.expect_actions()
+        notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed, add="+")
+        self.ctx.log.info(f"Found {len(self.loaded)} plugin(s); manifests read in {self.discover_ms:.1f} ms.")
+
+    def expect_actions(self):
+        """Tell the JobManager which job actions not-yet-loaded plugins provide (onAction events)."""
+        if self.ctx.jobs is None:
             return
+        for rec in self.loaded:
+            for ev in rec.manifest.activation:
+                if ev.startswith(ON_ACTION) and rec.state == STATE_PENDING:
+                    self.ctx.jobs.expect_action(ev[len(ON_ACTION):], self._activation_hook(rec))
 
-        for name in os.listdir(plugins_dir):
-            plugin_py = os.path.join(plugins_dir, name, "plugin.py")
-            if not os.path.isfile(plugin_py):
-                continue
+    def _activation_hook(self, rec: LoadedPlugin) -> Callable[[str], None]:
+        def fire(action_type: str):
+            # may be called from a control/worker thread; plugins load on the UI thread
+            post = self.ctx.tasks.post if self.ctx.tasks is not None else (lambda fn: fn())
+            post(lambda: self.activate(rec, ON_ACTION + action_type))
+        return fire
 
-            try:
-                mod = _load_plugin_module_from_file(f"plugin_{name}", plugin_py)
-                if not hasattr(mod, "create_plugin"):
-                    self.ctx.log.warn(f"{name} missing create_plugin()")
-                    continue
+    def _on_tab_changed(self, _evt=None):
+        rec = self._by_page.get(str(self._notebook.select()))
+        if rec is not None and not rec.built and rec.state != STATE_FAILED:
+            self._notebook.update_idletasks()  # paint the placeholder before a slow build
+            self.build(rec)
 
-                plugin = mod.create_plugin()
-                plugin.init(self.ctx)
-                tab = plugin.get_tab(notebook)
-                notebook.add(tab, text=plugin.name)
-                self.loaded.append(LoadedPlugin(plugin=plugin, tab=tab))
-                self.ctx.log.info(f"Loaded plugin: {plugin.name} v{plugin.version}")
-            except Exception as e:
-                self.ctx.log.error(f"Load plugin failed: {name}: {e}")
+    # activation
 
     def start_all(self):
-        for p in self.loaded:
-            try:
-                p.plugin.on_start()
-            except Exception as e:
-                self.ctx.log.error(f"Plugin start error: {p.plugin.name}: {e}")
+        """Activate the plugins whose startup events hold (onStartup, onConfig:<field>)."""
+        for rec in self.loaded:
+            for ev in rec.manifest.activation:
+                if ev == ON_STARTUP or (ev.startswith(ON_CONFIG)
+                                        and getattr(self.ctx.cfg, ev[len(ON_CONFIG):], False)):
+                    self.activate(rec, ev)
+                    break
+
+    def activate(self, rec: LoadedPlugin, reason: str) -> bool:
+        """Import, create, init() and start the plugin (once); the tab is left for build()."""
+        if rec.state != STATE_PENDING:
+            return rec.state == STATE_ACTIVE
+        m = rec.manifest
+        t0 = time.perf_counter()
+        try:
+            plugin = _create(m)
+            if m.worker:
+                rec.worker = self._start_worker(m)
+                if hasattr(plugin, "attach_worker"):
+                    plugin.attach_worker(rec.worker)
+            plugin.init(self.ctx)
+        except Exception as e:
+            self._stop_worker(rec)
+            self._fail(rec, f"Load plugin failed: {m.id}: {e}", e)
+            return False
+        if getattr(plugin, "id", m.id) != m.id:
+            self.ctx.log.warn(f"Plugin {m.id}: manifest id differs from plugin id {plugin.id!r}")
+        rec.plugin = plugin
+        rec.state = STATE_ACTIVE
+        rec.activated_by = reason
+        try:
+            plugin.on_start()
+        except Exception as e:
+            self.ctx.log.error(f"Plugin start error: {plugin.name}: {e}")
+        rec.load_ms = (time.perf_counter() - t0) * 1000
+        if self._notebook is not None and rec.tab is not None:
+            self._notebook.tab(rec.tab, text=plugin.name)
+        self.ctx.log.info(f"Loaded plugin: {plugin.name} v{plugin.version} ({reason}, {rec.load_ms:.0f} ms)")
+        return True
+
+    def _start_worker(self, m: PluginManifest):
+        path = os.path.join(m.path, m.worker)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"{m.worker} not found: {path}")
+        cfg = asdict(self.ctx.cfg)
+        if getattr(self.ctx.cfg, "plugin_isolation", False):
+            worker = IsolatedWorker(m.id, path, self.ctx, cfg, hang_s=self.ctx.cfg.plugin_hang_s,
+                                    on_log=self.ctx.log.warn)
+        else:
+            worker = InProcessWorker(m.id, path, self.ctx, cfg, on_log=self.ctx.log.warn)
+        worker.start()
+        return worker
+
+    def _stop_worker(self, rec: LoadedPlugin):
+        if rec.worker is None:
+            return
+        try:
+            rec.worker.stop()
+        except Exception as e:
+            self.ctx.log.error(f"Plugin worker stop error: {rec.manifest.id}: {e}")
+        rec.worker = None
+
+    def build(self, rec: LoadedPlugin) -> bool:
+        """Build the plugin's tab into its page (activating the plugin first if needed)."""
+        if rec.built:
+            return True
+        if not self.activate(rec, ON_TAB):
+            return False
+        t0 = time.perf_counter()
+        try:
+            tab = rec.plugin.get_tab(rec.tab)
+        except Exception as e:
+            self._fail(rec, f"Build plugin tab failed: {rec.manifest.id}: {e}", e)
+            return False
+        note = self._notes.pop(rec.manifest.id, None)
+        if note is not None:
+            note.destroy()
+        tab.pack(fill="both", expand=True)
+        rec.built = True
+        rec.build_ms = (time.perf_counter() - t0) * 1000
+        self.ctx.log.info(f"Built plugin tab: {rec.plugin.name} ({rec.build_ms:.0f} ms)")
+        return True
+
+    def _fail(self, rec: LoadedPlugin, msg: str, e: Exception):
+        rec.state = STATE_FAILED
+        rec.error = str(e)
+        self.ctx.log.error(msg)
+        note = self._notes.get(rec.manifest.id)
+        if note is not None:
+            note.configure(text=f"插件加载失败：{e}")
+
+    def stats(self) -> List[Dict]:
+        return [{"id": r.manifest.id, "state": r.state, "built": r.built, "activated_by": r.activated_by,
+                 "load_ms": round(r.load_ms, 1), "build_ms": round(r.build_ms, 1), "error": r.error,
+                 "worker": r.worker.metrics() if r.worker is not None else None}
+                for r in self.loaded]
 
     def stop_all(self):
+        """on_stop() every active plugin, then stop its worker; errors are logged, not raised."""
         for p in self.loaded:
+            if p.state != STATE_ACTIVE:
+                continue
             try:
                 p.plugin.on_stop()
-            except Exception:
-                pass
+            except Exception as e:
+                self.ctx.log.error(f"Plugin stop error: {p.manifest.id}: {e}")
+            self._stop_worker(p)
@@ -0,0 +1,114 @@
+import os
+import threading
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import psutil
+
+
+ProcKey = Tuple[int, float]
+
+
+def norm_path(p: str) -> str:
+    try:
+        return os.path.normcase(os.path.abspath(p))
+    except Exception:
+        return (p or "").lower()
+
+
+def _iter_process_table() -> Iterable[Tuple[int, float]]:
+    for p in psutil.process_iter(["pid", "create_time"]):
+        info = p.info
+        yield info["pid"], info.get("create_time") or 0.0
+
+
+def _resolve_exe(pid: int) -> str:
+    return psutil.Process(pid).exe()
+
+
+def _create_time(pid: int) -> float:
+    return psutil.Process(pid).create_time()
+
+
+class ProcessIndex:
+    """PID -> normalized exe path cache shared across window scans.
+
+    ``begin_scan()`` takes one snapshot of the process table. Entries are keyed
+    by (pid, create_time) so a recycled PID never inherits a stale exe, and
+    entries for processes that are gone from the snapshot are dropped.
+    PIDs born after the snapshot (e.g. a window probed from an event hook) are
+    added to it on first lookup. Between snapshots a PID can die and be
+    reused, so lookups outside a scan pass ``verify=True`` to re-read its
+    create time and evict the dead process's entry on mismatch.
+    """
+
+    def __init__(self,
+                 iter_processes: Callable[[], Iterable[Tuple[int, float]]] = _iter_process_table,
+                 resolve_exe: Callable[[int], str] = _resolve_exe,
+                 create_time_of: Callable[[int], float] = _create_time):
+        self._iter_processes = iter_processes
+        self._resolve_exe = resolve_exe
+        self._create_time_of = create_time_of
+        self._lock = threading.Lock()
+        self._live: Dict[int, float] = {}
+        self._exe: Dict[ProcKey, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def begin_scan(self) -> None:
+        live = {int(pid): float(ct) for pid, ct in self._iter_processes()}
+        with self._lock:
+            self._live = live
+            stale = [k for k in self._exe if live.get(k[0]) != k[1]]
+            for k in stale:
+                del self._exe[k]
+            self.evictions += len(stale)
+
+    def exe_of(self, pid: int, verify: bool = False) -> Optional[str]:
+        """Normalized exe path of ``pid`` in the current snapshot, or None if unknown/inaccessible.
+
+        ``verify`` checks the snapshot's create time against the live process
+        first (one cheap query), for lookups made between scans.
+        """
+        with self._lock:
+            ct = self._live.get(pid)
+        if ct is None or verify:
+            try:
+                fresh = float(self._create_time_of(pid))
+            except Exception:
+                return None
+            if ct is not None and fresh != ct:
+                with self._lock:  # the PID was reused since the snapshot
+                    if self._exe.pop((pid, ct), None) is not None:
+                        self.evictions += 1
+            ct = fresh
+        with self._lock:
+            self._live[pid] = ct
+            key = (pid, ct)
+            if key in self._exe:
+                self.hits += 1
+                return self._exe[key]
+            self.misses += 1
+        try:
+            exe = norm_path(self._resolve_exe(pid))
+        except Exception:
+            # cache access failures too (e.g. elevated processes), as "" never matches
+            exe = ""
+        with self._lock:
+            self._exe[key] = exe
+        return exe or None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "cached": len(self._exe),
+                "processes": len(self._live),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._live.clear()
+            self._exe.clear()
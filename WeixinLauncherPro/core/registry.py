@@ -0,0 +1,301 @@
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Protocol, Sequence, Tuple
+
+WINDOW_CREATE = "create"
+WINDOW_DESTROY = "destroy"
+WINDOW_SHOW = "show"
+WINDOW_HIDE = "hide"
+WINDOW_RENAME = "rename"
+WINDOW_FOREGROUND = "foreground"
+
+
+def window_sort_key(w: Dict):
+    # 1) has title first, 2) pid, 3) hwnd
+    return (0 if w.get("title") else 1, w["pid"], w["hwnd"])
+
+
+def number_windows(ws: List[Dict]) -> List[Dict]:
+    """Assign index/label (微信1/微信2/...) in place, in list order."""
+    for i, w in enumerate(ws, start=1):
+        w["index"] = i
+        w["label"] = f"微信{i}"
+    return ws
+
+
+@dataclass(frozen=True)
+class WindowEvent:
+    kind: str
+    hwnd: int
+
+
+class EventSource(Protocol):
+    def start(self, emit: Callable[[WindowEvent], None]) -> None: ...
+    def stop(self) -> None: ...
+
+
+class FakeEventSource:
+    """In-process event source for tests and simulations: call emit() by hand."""
+
+    def __init__(self):
+        self._emit: Optional[Callable[[WindowEvent], None]] = None
+
+    def start(self, emit: Callable[[WindowEvent], None]) -> None:
+        self._emit = emit
+
+    def stop(self) -> None:
+        self._emit = None
+
+    def emit(self, kind: str, hwnd: int) -> None:
+        if self._emit:
+            self._emit(WindowEvent(kind, int(hwnd)))
+
+
+class WindowRegistry:
+    """Incremental model of the WeChat windows on the desktop.
+
+    The model is fed by window events (create/destroy/show/hide/rename) and
+    each change republishes an immutable, already-numbered snapshot, so
+    snapshot() is O(1) for every caller. A full rescan only happens in
+    reconcile(): on start, when exe/class filters change, on refresh(), and
+    every ``rescan_s`` seconds while no event source is live (0 = never).
+
+    ``scan(exe_path, class_name)`` and ``probe(hwnd, exe_path, class_name)``
+    are injected (core.windows.list_windows_by_exe / probe_window in the app);
+    ``number`` labels the sorted windows (positional by default, the
+    IdentityIndex in the app).
+    """
+
+    def __init__(self,
+                 scan: Callable[[str, str], List[Dict]],
+                 probe: Callable[[int, str, str], Optional[Dict]],
+                 source: Optional[EventSource] = None,
+                 exe_path: str = "",
+                 class_name: str = "",
+                 number: Callable[[List[Dict]], List[Dict]] = number_windows,
+                 rescan_s: float = 0.0):
+        self._scan = scan
+        self._rescan_s = rescan_s
+        self._halt = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+        self._number = number
+        self._probe = probe
+        self._source = source
+        self._exe = exe_path
+        self._cls = class_name
+        self._lock = threading.RLock()
+        self._windows: Dict[int, Dict] = {}
+        # changes applied while a reconcile scan runs: (hwnd, info or None for gone),
+        # replayed over the scan result so the older scan can't undo them
+        self._journal: List[Tuple[int, Optional[Dict]]] = []
+        self._scans = 0
+        self._snapshot: Tuple[Dict, ...] = ()
+        self._listeners: List[Callable[[Sequence[Dict]], None]] = []
+        self._fg_listeners: List[Callable[[int], None]] = []
+        self.foreground = 0
+        self._started = False
+        self.version = 0
+        self.events_applied = 0
+        self.events_ignored = 0
+        self.reconciles = 0
+
+    # lifecycle
+
+    def start(self):
+        if self._started:
+            return
+        self._started = True
+        if self._source:
+            self._source.start(self.apply_event)
+        self.reconcile()
+        if self._rescan_s > 0:
+            self._halt.clear()
+            self._poller = threading.Thread(target=self._poll, name="window-rescan", daemon=True)
+            self._poller.start()
+
+    def stop(self):
+        if not self._started:
+            return
+        self._started = False
+        self._halt.set()
+        if self._poller:
+            self._poller.join(timeout=2)
+            self._poller = None
+        if self._source:
+            self._source.stop()
+
+    def configure(self, exe_path: str, class_name: str = ""):
+        """Change filters; triggers a reconcile only if they actually changed."""
+        with self._lock:
+            if (exe_path, class_name) == (self._exe, self._cls):
+                return
+            self._exe, self._cls = exe_path, class_name
+        self.reconcile()
+
+    def refresh(self, exe_path: str, class_name: str = "") -> Sequence[Dict]:
+        """Explicit refresh: set the filters and always rescan, changed or not."""
+        with self._lock:
+            self._exe, self._cls = exe_path, class_name
+        return self.reconcile()
+
+    def _poll(self):
+        # without an event hook nothing else updates the model between refreshes
+        while not self._halt.wait(self._rescan_s):
+            if self.is_live():
+                continue
+            try:
+                self.reconcile()
+            except Exception:
+                pass
+
+    # queries
+
+    def snapshot(self) -> Sequence[Dict]:
+        """Current numbered windows. Treat the result and its dicts as read-only."""
+        return self._snapshot
+
+    def is_live(self) -> bool:
+        """True if an event source is feeding the model (otherwise only reconcile() updates it)."""
+        return self._started and self._source is not None and getattr(self._source, "active", True)
+
+    def get(self, hwnd: int) -> Optional[Dict]:
+        with self._lock:
+            return self._windows.get(int(hwnd))
+
+    def subscribe(self, cb: Callable[[Sequence[Dict]], None]):
+        """cb(snapshot) runs on whichever thread applied the change."""
+        with self._lock:
+            self._listeners.append(cb)
+
+    def unsubscribe(self, cb: Callable[[Sequence[Dict]], None]):
+        with self._lock:
+            if cb in self._listeners:
+                self._listeners.remove(cb)
+
+    def subscribe_foreground(self, cb: Callable[[int], None]):
+        """cb(hwnd) on every foreground change, WeChat window or not; runs on the event thread."""
+        with self._lock:
+            self._fg_listeners.append(cb)
+
+    def unsubscribe_foreground(self, cb: Callable[[int], None]):
+        with self._lock:
+            if cb in self._fg_listeners:
+                self._fg_listeners.remove(cb)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "windows": len(self._snapshot),
+            "version": self.version,
+            "events_applied": self.events_applied,
+            "events_ignored": self.events_ignored,
+            "reconciles": self.reconciles,
+        }
+
+    # updates
+
+    def reconcile(self) -> Sequence[Dict]:
+        """Full rescan. Events applied while the scan runs are replayed over its result."""
+        with self._lock:
+            exe, cls = self._exe, self._cls
+            start = len(self._journal)
+            self._scans += 1
+        try:
+            ws = self._scan(exe, cls) if exe else []
+        except Exception:
+            with self._lock:
+                self._end_scan()
+            raise
+        with self._lock:
+            replay = self._journal[start:]
+            self._end_scan()
+            if (exe, cls) != (self._exe, self._cls):
+                # filters changed while scanning; the newer reconcile wins
+                return self._snapshot
+            windows = {int(w["hwnd"]): w for w in ws}
+            for hwnd, info in replay:
+                if info is None:
+                    windows.pop(hwnd, None)
+                else:
+                    windows[hwnd] = info
+            self._windows = windows
+            self.reconciles += 1
+            self._publish()
+        return self._snapshot
+
+    def _end_scan(self):
+        self._scans -= 1
+        if not self._scans:
+            self._journal.clear()
+
+    def republish(self):
+        """Renumber the current windows without rescanning (e.g. an identity fact arrived late)."""
+        with self._lock:
+            self._publish()
+
+    def apply_event(self, ev: WindowEvent):
+        hwnd = int(ev.hwnd)
+        if ev.kind == WINDOW_FOREGROUND:
+            # doesn't change the window set; just fan it out
+            self.foreground = hwnd
+            with self._lock:
+                listeners = list(self._fg_listeners)
+            for cb in listeners:
+                try:
+                    cb(hwnd)
+                except Exception:
+                    pass
+            return
+        with self._lock:
+            exe, cls = self._exe, self._cls
+            # during a scan an unknown hwnd may still be in the scan's result
+            known = hwnd in self._windows or self._scans > 0
+        if not exe:
+            return
+
+        if ev.kind in (WINDOW_DESTROY, WINDOW_HIDE):
+            if not known:
+                self.events_ignored += 1
+                return
+            info = None
+        elif ev.kind in (WINDOW_CREATE, WINDOW_SHOW):
+            info = self._probe(hwnd, exe, cls)
+            if info is None and not known:
+                self.events_ignored += 1
+                return
+        elif ev.kind == WINDOW_RENAME:
+            if not known:
+                self.events_ignored += 1
+                return
+            info = self._probe(hwnd, exe, cls)
+        else:
+            self.events_ignored += 1
+            return
+
+        with self._lock:
+            if (exe, cls) != (self._exe, self._cls):
+                return
+            if self._scans:
+                self._journal.append((hwnd, info))
+            if info is None:
+                if hwnd not in self._windows:
+                    return  # only matters to the running scan
+                self._windows.pop(hwnd, None)
+            else:
+                old = self._windows.get(hwnd)
+                if old and all(old.get(k) == info.get(k) for k in ("pid", "title", "class")):
+                    self.events_ignored += 1
+                    return
+                self._windows[hwnd] = info
+            self.events_applied += 1
+            self._publish()
+
+    def _publish(self):
+        ws = sorted((dict(w) for w in self._windows.values()), key=window_sort_key)
+        self._snapshot = tuple(self._number(ws))
+        self.version += 1
+        snap = self._snapshot
+        for cb in list(self._listeners):
+            try:
+                cb(snap)
+            except Exception:
+                pass
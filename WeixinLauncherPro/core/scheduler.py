@@ -1,7 +1,27 @@
+import heapq
+import itertools
 import threading
 import time
+import zlib
 from dataclasses import dataclass
-from typing import Callable, Dict, Optional, List
+from typing import Callable, Dict, Optional, List, Tuple
+
+from core.triggers import Trigger, IntervalTrigger
+from core.workers import Task, WorkerPool
+
+# What to do when a job comes due while a previous run is still going
+OVERLAP_SKIP = "skip"              # drop this fire
+OVERLAP_QUEUE = "queue"            # run it right after the current one finishes
+OVERLAP_CONCURRENT = "concurrent"  # run alongside, up to max_concurrency
+
+# What to do with fires missed by more than misfire_grace_sec (sleep/resume, a busy pool, ...)
+MISFIRE_FIRE_ONCE = "fire_once"  # run once to catch up, then continue from now
+MISFIRE_FIRE_ALL = "fire_all"    # replay every missed fire, at most misfire_cap in a row
+MISFIRE_SKIP = "skip"            # drop missed fires, continue from now
+
+MAX_QUEUED_PER_JOB = 100
+CLOCK_STEP_SEC = 2.0   # wall-vs-monotonic drift that counts as a clock step
+MAX_WAIT_SEC = 60.0    # upper bound on one sleep, so wall clock steps are noticed
 
 
 @dataclass
@@ -10,55 +30,305 @@ class Job:
     interval_sec: int
     action: Callable[[], None]
     enabled: bool = True
+    overlap: str = OVERLAP_SKIP
+    max_concurrency: int = 1
+    timeout_sec: float = 0.0  # 0 = no timeout
+    trigger: Optional[Trigger] = None  # None = IntervalTrigger(interval_sec), first fire after one interval
+    misfire: str = MISFIRE_FIRE_ONCE
+    misfire_cap: int = 10
+    misfire_grace_sec: float = 1.0
+
+    def concurrency_limit(self) -> int:
+        return max(1, self.max_concurrency) if self.overlap == OVERLAP_CONCURRENT else 1
+
+    def describe(self) -> str:
+        return self.trigger.describe() if self.trigger else f"每 {self.interval_sec}s"
 
 
 class Scheduler:
-    """A tiny in-process scheduler for plugins."""
+    """A tiny in-process scheduler for plugins.
+
+    Due times live in a min-heap on the monotonic clock; the worker sleeps on a
+    condition variable until the earliest one (or until add_or_update/remove/
+    stop wakes it), so an idle scheduler costs nothing and dispatch is
+    O(log n) per fire. Updated or removed jobs leave stale heap entries behind
+    that are skipped by generation number and compacted once they dominate
+    the heap.
+
+    Each fire computes only that job's next fire from its Trigger. Fires that
+    are late by more than misfire_grace_sec follow the job's misfire policy,
+    and the single catch-up fire is staggered by a per-job offset within
+    ``misfire_spread_sec`` so thousands of jobs don't stampede after a resume.
+    A wall clock step re-plans wall-anchored (cron / fixed-time) jobs.
 
-    def __init__(self, on_log: Callable[[str], None]):
+    Actions run on a bounded WorkerPool, never on the timer thread. A run that
+    exceeds timeout_sec is reported and its pool worker replaced, but it keeps
+    holding its job's concurrency slot until it really returns, so a hung
+    target window stalls only its own job.
+    """
+
+    def __init__(self, on_log: Callable[[str], None], workers: int = 4,
+                 misfire_spread_sec: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time):
+        self._workers = max(1, int(workers))
+        self._pool: Optional[WorkerPool] = None
+        self._running: Dict[str, int] = {}
+        self._queued: Dict[str, int] = {}
         self._jobs: Dict[str, Job] = {}
-        self._lock = threading.Lock()
+        self._triggers: Dict[str, Trigger] = {}
+        self._gen: Dict[str, int] = {}
+        self._due: Dict[str, float] = {}
+        self._catchup: Dict[str, int] = {}
+        self._heap: List[Tuple[float, int, str, int, float]] = []  # (due, seq, job_id, generation, nominal)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
         self._stop = threading.Event()
         self._thread: Optional[threading.Thread] = None
         self._log = on_log
+        self._clock = clock
+        self._wall = wall_clock
+        self._offset = wall_clock() - clock()
+        self.misfire_spread_sec = max(0.0, misfire_spread_sec)
+        self.skipped = 0
+        self.misfires = 0
+        self._exhausted_listeners: List[Callable[[str], None]] = []
 
     def start(self):
         if self._thread and self._thread.is_alive():
             return
         self._stop.clear()
+        self._pool = WorkerPool(self._workers)
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
         self._log("Scheduler started.")
 
     def stop(self):
         self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+            pool, self._pool = self._pool, None
+        if pool:
+            pool.shutdown()
         self._log("Scheduler stopped.")
 
-    def add_or_update(self, job: Job):
-        with self._lock:
+    def add_or_update(self, job: Job, next_fire: Optional[float] = None):
+        """Add or replace a job. ``next_fire`` (wall epoch) restores a persisted plan instead of
+        starting the trigger afresh; if it lies in the past the misfire policy applies."""
+        with self._cond:
+            gen = self._gen.get(job.job_id, 0) + 1
+            trig = job.trigger or IntervalTrigger(job.interval_sec)
             self._jobs[job.job_id] = job
+            self._triggers[job.job_id] = trig
+            self._gen[job.job_id] = gen
+            self._catchup.pop(job.job_id, None)
+            self._maybe_compact()
+            offset = self._offset_now()
+            if next_fire is not None:
+                first = next_fire - offset
+                trig.resume(first)
+            else:
+                first = trig.first(self._clock(), offset)
+            self._schedule(job.job_id, gen, first)
 
     def remove(self, job_id: str):
-        with self._lock:
-            self._jobs.pop(job_id, None)
+        with self._cond:
+            if self._jobs.pop(job_id, None) is not None:
+                self._drop(job_id)
+                self._maybe_compact()
+                self._cond.notify()
+
+    def subscribe_exhausted(self, cb: Callable[[str], None]):
+        """cb(job_id) when a job's trigger runs out (a one-shot fired); runs under the scheduler lock."""
+        with self._cond:
+            self._exhausted_listeners.append(cb)
 
     def list_jobs(self) -> List[Job]:
-        with self._lock:
+        with self._cond:
             return list(self._jobs.values())
 
-    def _run(self):
-        last_run: Dict[str, float] = {}
-        while not self._stop.is_set():
-            now = time.time()
-            jobs = self.list_jobs()
-            for j in jobs:
-                if not j.enabled:
-                    continue
-                prev = last_run.get(j.job_id, 0.0)
-                if now - prev >= j.interval_sec:
+    def next_fire(self, job_id: str) -> Optional[float]:
+        """Wall-clock epoch of the job's next planned fire, or None."""
+        with self._cond:
+            due = self._due.get(job_id)
+            return None if due is None else due + self._offset_now()
+
+    def metrics(self) -> Dict:
+        """Pool counters plus per-job running/queued counts."""
+        with self._cond:
+            pool = self._pool
+            out = {
+                "jobs": len(self._jobs),
+                "skipped": self.skipped,
+                "misfires": self.misfires,
+                "running_by_job": {k: v for k, v in self._running.items() if v},
+                "queued_by_job": {k: v for k, v in self._queued.items() if v},
+            }
+        out.update(pool.metrics() if pool else {})
+        return out
+
+    # timing
+
+    def _offset_now(self) -> float:
+        return self._wall() - self._clock()
+
+    def _stagger(self, job_id: str) -> float:
+        return (zlib.crc32(job_id.encode("utf-8")) % 1000) / 1000.0 * self.misfire_spread_sec
+
+    def _push(self, due: float, job_id: str, gen: int, nominal: float):
+        was_first = not self._heap or due < self._heap[0][0]
+        heapq.heappush(self._heap, (due, next(self._seq), job_id, gen, nominal))
+        self._due[job_id] = due
+        if was_first:
+            self._cond.notify()
+
+    def _schedule(self, job_id: str, gen: int, t: Optional[float]):
+        if t is None:
+            # trigger exhausted (one-shot fired): the job is done
+            if self._jobs.pop(job_id, None) is not None:
+                self._drop(job_id)
+                for cb in self._exhausted_listeners:
                     try:
-                        j.action()
+                        cb(job_id)
                     except Exception as e:
-                        self._log(f"[Scheduler] job {j.job_id} error: {e}")
-                    last_run[j.job_id] = now
-            time.sleep(0.3)
+                        self._log(f"[Scheduler] exhausted callback for {job_id} failed: {e}")
+            return
+        self._push(t, job_id, gen, t)
+
+    def _drop(self, job_id: str):
+        self._gen[job_id] = self._gen.get(job_id, 0) + 1
+        self._triggers.pop(job_id, None)
+        self._queued.pop(job_id, None)
+        self._due.pop(job_id, None)
+        self._catchup.pop(job_id, None)
+
+    def _maybe_compact(self):
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._jobs):
+            self._heap = [e for e in self._heap if self._gen.get(e[2]) == e[3] and e[2] in self._jobs]
+            heapq.heapify(self._heap)
+
+    def _check_clock_step(self):
+        offset = self._offset_now()
+        step = offset - self._offset
+        if abs(step) < CLOCK_STEP_SEC:
+            return
+        self._offset = offset
+        now = self._clock()
+        replanned = 0
+        for job_id, trig in list(self._triggers.items()):
+            if not trig.wall_anchored:
+                continue
+            gen = self._gen[job_id] + 1
+            self._gen[job_id] = gen
+            self._schedule(job_id, gen, trig.first(now, offset))
+            replanned += 1
+        self._log(f"[Scheduler] wall clock stepped by {step:+.1f}s; re-planned {replanned} job(s).")
+
+    def _next_due(self) -> Optional[Tuple[Job, int, float, float]]:
+        """Block until a job is due (or stop); pop it. Returns (job, generation, due, nominal)."""
+        with self._cond:
+            while not self._stop.is_set():
+                self._check_clock_step()
+                while self._heap and (self._heap[0][2] not in self._jobs
+                                      or self._gen.get(self._heap[0][2]) != self._heap[0][3]):
+                    heapq.heappop(self._heap)
+                if not self._heap:
+                    self._cond.wait(MAX_WAIT_SEC)
+                    continue
+                due, _, job_id, gen, nominal = self._heap[0]
+                delay = due - self._clock()
+                if delay > 0:
+                    self._cond.wait(min(delay, MAX_WAIT_SEC))
+                    continue
+                heapq.heappop(self._heap)
+                return self._jobs[job_id], gen, due, nominal
+        return None
+
+    # dispatch
+
+    def _run(self):
+        while True:
+            nxt = self._next_due()
+            if nxt is None:
+                return
+            with self._cond:
+                j, gen, due, nominal = nxt
+                if self._gen.get(j.job_id) == gen:
+                    self._fire(j, gen, due, nominal)
+
+    def _fire(self, j: Job, gen: int, due: float, nominal: float):
+        """Run one due entry and plan the job's next one. Caller holds the lock."""
+        job_id = j.job_id
+        trig = self._triggers[job_id]
+        now = self._clock()
+        offset = self._offset_now()
+        catchup = self._catchup.get(job_id, 0)
+        misfired = now - nominal > j.misfire_grace_sec
+
+        if misfired and due == nominal and catchup == 0:
+            self.misfires += 1
+            if j.misfire != MISFIRE_SKIP and self.misfire_spread_sec > 0:
+                # first late fire after a stall: spread catch-ups out instead of firing all at once
+                self._push(now + self._stagger(job_id), job_id, gen, nominal)
+                return
+
+        dispatched = False
+        if j.enabled and not (misfired and j.misfire == MISFIRE_SKIP):
+            dispatched = self._dispatch(j, gen)
+
+        if trig.fixed_delay:
+            if not dispatched:
+                self._schedule(job_id, gen, trig.next_after(now, offset))
+            # otherwise _release plans the next fire from the completion time
+            return
+
+        t = trig.next_after(nominal, offset)
+        if t is not None and now - t > j.misfire_grace_sec:
+            if j.misfire == MISFIRE_FIRE_ALL and catchup < j.misfire_cap:
+                self._catchup[job_id] = catchup + 1
+            else:
+                self._catchup[job_id] = 0
+                t = trig.next_after(now, offset)
+        else:
+            self._catchup[job_id] = 0
+        self._schedule(job_id, gen, t)
+
+    def _dispatch(self, j: Job, gen: int) -> bool:
+        """Apply the overlap policy and hand the action to the pool. Caller holds the lock."""
+        if self._running.get(j.job_id, 0) >= j.concurrency_limit():
+            if j.overlap == OVERLAP_QUEUE and self._queued.get(j.job_id, 0) < MAX_QUEUED_PER_JOB:
+                self._queued[j.job_id] = self._queued.get(j.job_id, 0) + 1
+            else:
+                self.skipped += 1
+            return False
+        pool = self._pool
+        if pool is None:
+            return False
+        self._running[j.job_id] = self._running.get(j.job_id, 0) + 1
+        pool.submit(Task(
+            fn=j.action,
+            timeout=j.timeout_sec,
+            on_done=lambda err, j=j, gen=gen: self._finished(j, gen, err),
+            on_timeout=lambda j=j: self._timed_out(j),
+        ))
+        return True
+
+    def _finished(self, j: Job, gen: int, err: Optional[BaseException]):
+        if err is not None:
+            self._log(f"[Scheduler] job {j.job_id} error: {err}")
+        self._release(j, gen)
+
+    def _timed_out(self, j: Job):
+        self._log(f"[Scheduler] job {j.job_id} timed out after {j.timeout_sec}s; worker replaced.")
+
+    def _release(self, j: Job, gen: int):
+        with self._cond:
+            self._running[j.job_id] = max(0, self._running.get(j.job_id, 0) - 1)
+            if self._gen.get(j.job_id) != gen or self._stop.is_set():
+                return
+            trig = self._triggers.get(j.job_id)
+            if trig is not None and trig.fixed_delay:
+                self._schedule(j.job_id, gen, trig.next_after(self._clock(), self._offset_now()))
+            if self._queued.get(j.job_id):
+                self._queued[j.job_id] -= 1
+                self._dispatch(self._jobs[j.job_id], gen)
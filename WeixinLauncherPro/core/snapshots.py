@@ -0,0 +1,196 @@
+"""Named layout snapshots: where every identified instance was, and in what z-order.
+
+A snapshot records, per instance identity (see core.identity), the window's
+restored rect (rcNormalPosition, so a minimized or maximized window keeps
+where it un-minimizes to), show state, the monitor it was on and its place
+in the z-order. Restoring looks the identities up in the live hwnd map and
+hands every window to WindowPlacer.apply in one z-ordered transaction;
+windows that are to stay minimized or maximized only get their restored
+rect set, without being shown in between. Switching
+between two saved arrangements costs a read pass and one DeferWindowPos
+batch, no relaunch or rescan. Windows whose monitor is gone are moved to
+the same spot on the primary monitor.
+
+Snapshots live in one JSON file next to config.json.
+"""
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from core.config import Rect
+from core.layout import LayoutRequest, Monitor
+from core.placement import ApplyResult, STATE_MAXIMIZED, STATE_MINIMIZED, WindowPlacer
+
+AUTO_SNAPSHOT = "上次退出"
+
+
+@dataclass
+class SnapshotEntry:
+    identity: str
+    label: str
+    state: str
+    rect: Optional[Rect]          # restored rect; None in snapshots that predate it for minimized windows
+    monitor: Optional[Monitor]    # the monitor the restored rect's centre is on
+    z: int                        # 0 = topmost of the snapshot's windows
+
+
+@dataclass
+class Snapshot:
+    name: str
+    saved_at: float
+    entries: List[SnapshotEntry] = field(default_factory=list)
+
+
+@dataclass
+class RestoreResult:
+    applied: ApplyResult
+    missing: List[str]            # labels with no live window
+    remapped: int = 0             # windows moved off a monitor that is no longer attached
+    minimized: int = 0
+    maximized: int = 0
+    elapsed: float = 0.0
+
+
+def _entry_from_dict(d: Dict) -> SnapshotEntry:
+    return SnapshotEntry(
+        identity=d["identity"], label=d.get("label", ""), state=d.get("state", "normal"),
+        rect=Rect(**d["rect"]) if d.get("rect") else None,
+        monitor=Monitor(**d["monitor"]) if d.get("monitor") else None,
+        z=int(d.get("z", 0)),
+    )
+
+
+def remap_rect(rect: Rect, saved: Optional[Monitor], monitors: Sequence[Monitor]) -> Optional[Rect]:
+    """Where ``rect`` goes on the current monitors, or None if its monitor is still attached as it was.
+
+    A monitor that moved (same name and size) takes its windows along;
+    otherwise the window keeps its offset on the primary monitor, clamped
+    into the work area.
+    """
+    if saved is None or saved in monitors:
+        return None
+    same = next((m for m in monitors if saved.name and m.name == saved.name and (m.w, m.h) == (saved.w, saved.h)),
+                None)
+    target = same or next((m for m in monitors if m.primary), monitors[0])
+    w, h = min(rect.w, target.w), min(rect.h, target.h)
+    x = target.x + max(0, min(rect.x - saved.x, target.w - w))
+    y = target.y + max(0, min(rect.y - saved.y, target.h - h))
+    return Rect(x, y, w, h)
+
+
+class SnapshotStore:
+    """Named snapshots persisted to ``path``; capture/restore go through a WindowPlacer."""
+
+    def __init__(self, path: Optional[str] = None, clock: Callable[[], float] = time.time):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snaps: Dict[str, Snapshot] = {}
+        if path:
+            self.load()
+
+    # persistence
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for d in raw.get("snapshots", []):
+                try:
+                    snap = Snapshot(d["name"], float(d.get("saved_at", 0.0)),
+                                    [_entry_from_dict(e) for e in d.get("entries", [])])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                self._snaps[snap.name] = snap
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            raw = {"snapshots": [asdict(s) for s in self._snaps.values()]}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(raw, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+    # access
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._snaps, key=lambda n: (n != AUTO_SNAPSHOT, n))
+
+    def get(self, name: str) -> Optional[Snapshot]:
+        with self._lock:
+            return self._snaps.get(name)
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            return self._snaps.pop(name, None) is not None
+
+    # capture / restore
+
+    def capture(self, name: str, ws: Sequence[Dict], placer: WindowPlacer,
+                monitors: Sequence[Monitor]) -> Snapshot:
+        """Record every identified window in ``ws`` (registry rows) under ``name``, replacing any old one."""
+        rows = {int(w["hwnd"]): w for w in ws if w.get("identity")}
+        states = placer.read(rows)
+        z = {hwnd: i for i, hwnd in enumerate(placer.z_order(states))}
+        entries = []
+        for hwnd, st in states.items():
+            w = rows[hwnd]
+            rect = st.normal or st.rect
+            mon = LayoutRequest(rect, 1, monitors).base_monitor() if rect is not None and monitors else None
+            entries.append(SnapshotEntry(w["identity"], w.get("label", ""), st.state, rect, mon,
+                                         z.get(hwnd, len(z))))
+        entries.sort(key=lambda e: e.z)
+        snap = Snapshot(name, self._clock(), entries)
+        with self._lock:
+            self._snaps[name] = snap
+        return snap
+
+    def restore(self, name: str, hwnd_of: Callable[[str], Optional[int]], placer: WindowPlacer,
+                monitors: Sequence[Monitor]) -> RestoreResult:
+        """Put every instance in the snapshot back: one z-ordered transaction, then min/max states."""
+        snap = self.get(name)
+        if snap is None:
+            raise KeyError(f"unknown snapshot: {name}")
+        t0 = time.perf_counter()
+        live = [(e, hwnd_of(e.identity)) for e in snap.entries]  # entries are topmost first
+        # a window that is minimized or maximized now and should stay that way only gets its restored
+        # rect set; moving it would show it restored and then minimize or maximize it again. Windows to
+        # be minimized are minimized before their restored rect is set, for the same reason.
+        wants_hidden = [h for e, h in live if h is not None and e.state in (STATE_MINIMIZED, STATE_MAXIMIZED)]
+        hidden_now = {h for h, st in placer.read(wants_hidden).items()
+                      if st.state in (STATE_MINIMIZED, STATE_MAXIMIZED)}
+        pairs, normal, minimized, maximized, missing = [], [], [], [], []
+        remapped = 0
+        for e, hwnd in live:
+            if hwnd is None:
+                missing.append(e.label or e.identity)
+                continue
+            if e.state == STATE_MINIMIZED:
+                minimized.append(hwnd)
+            elif e.state == STATE_MAXIMIZED:
+                maximized.append(hwnd)
+            if e.rect is None:
+                continue
+            rect = remap_rect(e.rect, e.monitor, monitors) if monitors else None
+            remapped += rect is not None
+            rect = rect or e.rect
+            if hwnd in hidden_now or e.state == STATE_MINIMIZED:
+                normal.append((hwnd, rect))
+            else:
+                pairs.append((hwnd, rect))
+        n_min = placer.minimize(minimized) if minimized else 0
+        if normal:
+            placer.set_normal(normal)
+        applied = placer.apply(pairs, stack=True) if pairs else ApplyResult()
+        n_max = placer.maximize(maximized) if maximized else 0
+        return RestoreResult(applied, missing, remapped, n_min, n_max, time.perf_counter() - t0)
@@ -0,0 +1,182 @@
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional
+
+
+class Cancelled(Exception):
+    """Raised inside a task by CancelToken.check() once cancel() was requested."""
+
+
+class CancelToken:
+    def __init__(self, handle: "TaskHandle"):
+        self._handle = handle
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled()
+
+    def progress(self, done: int, total: int, msg: str = ""):
+        self._handle._report(done, total, msg)
+
+
+class TaskHandle:
+    def __init__(self, runner: "TaskRunner", name: str,
+                 on_done: Optional[Callable[["TaskHandle"], None]],
+                 on_progress: Optional[Callable[[int, int, str], None]]):
+        self.name = name
+        self.future: Future = Future()
+        self.token = CancelToken(self)
+        self._runner = runner
+        self._on_done = on_done
+        self._on_progress = on_progress
+        self._progress = None
+        self._progress_posted = False
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Ask the task to stop; a task that hasn't started yet never runs."""
+        self.token._event.set()
+        self.future.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token.cancelled
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None):
+        return self.future.result(timeout)
+
+    def error(self) -> Optional[BaseException]:
+        """The task's exception (None on success or cancellation); only valid once done."""
+        if self.future.cancelled():
+            return None
+        err = self.future.exception()
+        return None if isinstance(err, Cancelled) else err
+
+    def _report(self, done: int, total: int, msg: str):
+        if self._on_progress is None:
+            return
+        # keep only the latest value; one callback is in flight at a time
+        with self._lock:
+            self._progress = (done, total, msg)
+            if self._progress_posted:
+                return
+            self._progress_posted = True
+        self._runner._post(self._deliver_progress)
+
+    def _deliver_progress(self):
+        with self._lock:
+            p, self._progress = self._progress, None
+            self._progress_posted = False
+        if p is not None:
+            self._on_progress(*p)
+
+
+class TaskRunner:
+    """Runs blocking work off the UI thread.
+
+    submit(fn) calls ``fn(token)`` on a worker; on_done(handle) and
+    on_progress(done, total, msg) are delivered through the UI thread: after
+    attach(root) they are queued and run from a root.after() pump, otherwise
+    they run inline on the worker (headless use). Tasks submitted with a
+    ``key`` are exclusive: while one is running, submitting the same key
+    returns the running handle instead of starting another.
+    """
+
+    def __init__(self, workers: int = 2, on_log: Optional[Callable[[str], None]] = None):
+        self._log = on_log or (lambda m: None)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="Task")
+        self._calls: Deque[Callable[[], None]] = deque()
+        self._root = None
+        self._pump_ms = 30
+        self._lock = threading.Lock()
+        self._running: Dict[str, TaskHandle] = {}
+        self._closed = False
+
+    def attach(self, root, pump_ms: int = 30):
+        self._root = root
+        self._pump_ms = pump_ms
+        root.after(pump_ms, self._pump)
+
+    def submit(self, fn: Callable[[CancelToken], object], name: str = "", key: Optional[str] = None,
+               on_done: Optional[Callable[[TaskHandle], None]] = None,
+               on_progress: Optional[Callable[[int, int, str], None]] = None) -> TaskHandle:
+        with self._lock:
+            if key is not None and key in self._running:
+                return self._running[key]
+            h = TaskHandle(self, name or (key or getattr(fn, "__name__", "task")), on_done, on_progress)
+            if key is not None:
+                self._running[key] = h
+        if self._closed:
+            h.future.cancel()
+            self._finish(h, key)
+            return h
+
+        def run():
+            if not h.future.set_running_or_notify_cancel():
+                self._finish(h, key)
+                return
+            try:
+                h.token.check()
+                res = fn(h.token)
+            except BaseException as e:
+                h.future.set_exception(e)
+            else:
+                h.future.set_result(res)
+            self._finish(h, key)
+
+        self._pool.submit(run)
+        return h
+
+    def busy(self, key: str) -> bool:
+        with self._lock:
+            return key in self._running
+
+    def shutdown(self, cancel: bool = True):
+        self._closed = True
+        if cancel:
+            with self._lock:
+                running = list(self._running.values())
+            for h in running:
+                h.cancel()
+        self._pool.shutdown(wait=False)
+
+    def _finish(self, h: TaskHandle, key: Optional[str]):
+        if key is not None:
+            with self._lock:
+                if self._running.get(key) is h:
+                    del self._running[key]
+        if h._on_done is not None:
+            self._post(lambda: h._on_done(h))
+
+    def post(self, fn: Callable[[], None]):
+        """Run ``fn`` on the UI thread (from the pump after attach(), inline otherwise)."""
+        self._post(fn)
+
+    def _post(self, fn: Callable[[], None]):
+        if self._root is None:
+            fn()
+        else:
+            self._calls.append(fn)
+
+    def _pump(self):
+        calls = self._calls
+        for _ in range(len(calls)):
+            fn = calls.popleft()
+            try:
+                fn()
+            except Exception as e:
+                self._log(f"[Tasks] UI callback failed: {e}")
+        if not self._closed:
+            try:
+                self._root.after(self._pump_ms, self._pump)
+            except Exception:
+                pass
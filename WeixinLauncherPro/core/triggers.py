@@ -0,0 +1,217 @@
+"""Job triggers for core.scheduler.
+
+All scheduling happens on the monotonic clock. Wall-clock anchored triggers
+(cron, one-shot at a given time) are converted through ``offset`` =
+wall - monotonic, which the scheduler re-reads on every computation, so an
+NTP step or sleep/resume only shifts the next computed fire time instead of
+replaying a burst.
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set
+
+FIXED_RATE = "fixed_rate"    # fires at anchor + k * interval, regardless of run time
+FIXED_DELAY = "fixed_delay"  # next fire = previous run's completion + interval
+
+
+class Trigger:
+    wall_anchored = False
+    fixed_delay = False
+
+    def first(self, now: float, offset: float) -> Optional[float]:
+        """First fire time (monotonic) for a job added at ``now``."""
+        raise NotImplementedError
+
+    def next_after(self, t: float, offset: float) -> Optional[float]:
+        """Smallest fire time strictly after monotonic ``t``; None when exhausted."""
+        raise NotImplementedError
+
+    def resume(self, t: float) -> None:
+        """Continue from a restored fire time ``t`` instead of first()."""
+
+    def to_dict(self) -> Dict:
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        return self.__class__.__name__
+
+
+class IntervalTrigger(Trigger):
+    def __init__(self, interval_sec: float, mode: str = FIXED_RATE, start_delay_sec: Optional[float] = None):
+        if mode not in (FIXED_RATE, FIXED_DELAY):
+            raise ValueError(f"unknown interval mode: {mode}")
+        self.interval = max(0.01, float(interval_sec))
+        self.mode = mode
+        self.fixed_delay = mode == FIXED_DELAY
+        self.start_delay = self.interval if start_delay_sec is None else max(0.0, float(start_delay_sec))
+        self.anchor: Optional[float] = None
+
+    def first(self, now: float, offset: float) -> Optional[float]:
+        self.anchor = now + self.start_delay
+        return self.anchor
+
+    def next_after(self, t: float, offset: float) -> Optional[float]:
+        if self.fixed_delay or self.anchor is None:
+            return t + self.interval
+        k = max(0, math.floor((t - self.anchor) / self.interval) + 1)
+        nxt = self.anchor + k * self.interval
+        if nxt <= t:  # float rounding put t exactly on a boundary
+            nxt += self.interval
+        return nxt
+
+    def resume(self, t: float) -> None:
+        self.anchor = t
+
+    def to_dict(self) -> Dict:
+        return {"type": "interval", "interval": self.interval, "mode": self.mode, "start_delay": self.start_delay}
+
+    def describe(self) -> str:
+        kind = "固定延迟" if self.fixed_delay else "每"
+        return f"{kind} {self.interval:g}s"
+
+
+class OneShotTrigger(Trigger):
+    """Fire once, either ``delay_sec`` after being added or at wall-clock epoch ``at``."""
+
+    def __init__(self, delay_sec: float = 0.0, at: Optional[float] = None):
+        self.delay = max(0.0, float(delay_sec))
+        self.at = at
+        self.wall_anchored = at is not None
+
+    def first(self, now: float, offset: float) -> Optional[float]:
+        if self.at is not None:
+            return self.at - offset
+        return now + self.delay
+
+    def next_after(self, t: float, offset: float) -> Optional[float]:
+        return None
+
+    def to_dict(self) -> Dict:
+        return {"type": "once", "delay": self.delay, "at": self.at}
+
+    def describe(self) -> str:
+        if self.at is not None:
+            return "一次 " + datetime.fromtimestamp(self.at).strftime("%Y-%m-%d %H:%M:%S")
+        return f"一次 {self.delay:g}s 后"
+
+
+_FIELDS = [  # (name, lo, hi)
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 6),  # 0 = Sunday, 7 is accepted as Sunday too
+]
+
+
+def _parse_field(spec: str, lo: int, hi: int, name: str) -> Set[int]:
+    out: Set[int] = set()
+    top = 7 if name == "weekday" else hi
+    for part in spec.split(","):
+        step = 1
+        if "/" in part:
+            part, s = part.split("/", 1)
+            step = int(s)
+            if step <= 0:
+                raise ValueError(f"bad step in {name}: {spec}")
+        if part == "*":
+            a, b = lo, hi
+        elif "-" in part:
+            x, y = part.split("-", 1)
+            a, b = int(x), int(y)
+        else:
+            a = int(part)
+            b = a if step == 1 else top
+        if not (lo <= a <= top and lo <= b <= top and a <= b):
+            raise ValueError(f"{name} out of range: {spec}")
+        out.update(range(a, b + 1, step))
+    if name == "weekday" and 7 in out:
+        out.discard(7)
+        out.add(0)
+    return out
+
+
+class CronTrigger(Trigger):
+    """Classic 5-field cron: minute hour day-of-month month day-of-week, in local time.
+
+    Supports ``*``, lists, ranges and ``/step``. As in cron, when both day
+    fields are restricted a day matches if either one does.
+    """
+
+    wall_anchored = True
+
+    def __init__(self, expr: str):
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron needs 5 fields, got {len(parts)}: {expr!r}")
+        self.expr = " ".join(parts)
+        sets: List[Set[int]] = [_parse_field(p, lo, hi, n) for p, (n, lo, hi) in zip(parts, _FIELDS)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = sets
+        self._minute_list = sorted(self.minutes)
+        self._hour_list = sorted(self.hours)
+        self._dom_any = parts[2] == "*"
+        self._dow_any = parts[4] == "*"
+
+    def _day_ok(self, d: datetime) -> bool:
+        dom = d.day in self.days
+        dow = (d.isoweekday() % 7) in self.weekdays
+        if self._dom_any and self._dow_any:
+            return True
+        if self._dom_any:
+            return dow
+        if self._dow_any:
+            return dom
+        return dom or dow
+
+    def next_wall(self, wall: float) -> Optional[float]:
+        d = datetime.fromtimestamp(wall).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = d + timedelta(days=366 * 5)
+        while d <= limit:
+            if d.month not in self.months:
+                d = (d.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+                continue
+            if not self._day_ok(d):
+                d = (d + timedelta(days=1)).replace(hour=0, minute=0)
+                continue
+            if d.hour not in self.hours:
+                h = next((h for h in self._hour_list if h > d.hour), None)
+                if h is None:
+                    d = (d + timedelta(days=1)).replace(hour=0, minute=0)
+                else:
+                    d = d.replace(hour=h, minute=0)
+                continue
+            if d.minute not in self.minutes:
+                m = next((m for m in self._minute_list if m > d.minute), None)
+                if m is None:
+                    d = (d + timedelta(hours=1)).replace(minute=0)
+                else:
+                    d = d.replace(minute=m)
+                continue
+            return d.timestamp()
+        return None
+
+    def first(self, now: float, offset: float) -> Optional[float]:
+        w = self.next_wall(now + offset)
+        return None if w is None else w - offset
+
+    def next_after(self, t: float, offset: float) -> Optional[float]:
+        w = self.next_wall(t + offset)
+        return None if w is None else w - offset
+
+    def to_dict(self) -> Dict:
+        return {"type": "cron", "expr": self.expr}
+
+    def describe(self) -> str:
+        return f"cron {self.expr}"
+
+
+def trigger_from_dict(d: Dict) -> Trigger:
+    kind = d.get("type")
+    if kind == "interval":
+        return IntervalTrigger(d["interval"], d.get("mode", FIXED_RATE), d.get("start_delay"))
+    if kind == "once":
+        return OneShotTrigger(d.get("delay", 0.0), d.get("at"))
+    if kind == "cron":
+        return CronTrigger(d["expr"])
+    raise ValueError(f"unknown trigger type: {kind!r}")
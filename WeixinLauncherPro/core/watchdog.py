@@ -0,0 +1,254 @@
+"""Crash watchdog for launched WeChat instances.
+
+Every instance started through the launch pipeline is tracked by PID and
+create time (so a reused PID doesn't count as alive) together with its layout
+slot; later launches add slots instead of replacing the earlier ones. When the
+process goes away the watchdog relaunches it with exponential backoff, moves
+the new window into the same slot and tells ``on_recovered`` so jobs pointing
+at the old hwnd can be remapped. An instance that exits with code 0 (the user
+quit it) is untracked instead, and one that exits more than ``loop_max`` times
+within ``loop_window_s`` is left alone (crash loop).
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Sequence
+
+from core.config import Rect
+from core.weixin_launcher import LaunchResult, exit_code, pid_alive, process_create_time
+
+STATE_RUNNING = "running"
+STATE_BACKOFF = "backoff"
+STATE_GAVE_UP = "gave_up"
+
+
+@dataclass
+class Tracked:
+    slot: int                 # 0-based layout slot
+    pid: int
+    hwnd: Optional[int]
+    rect: Optional[Rect]
+    create_time: Optional[float] = None  # None = unknown, liveness by PID alone
+    state: str = STATE_RUNNING
+    died_at: Optional[float] = None
+    next_attempt: float = 0.0
+    failures: int = 0         # failed relaunches since the last death
+    deaths: Deque[float] = field(default_factory=deque)
+
+
+@dataclass
+class Recovery:
+    slot: int
+    old_pid: int
+    old_hwnd: Optional[int]
+    new_pid: Optional[int]
+    new_hwnd: int
+    time_to_recovery: float   # seconds from noticing the exit to the window being back in its slot
+    attempts: int
+
+
+class Watchdog:
+    """Polls tracked PIDs; relaunches and re-places instances that exited.
+
+    ``launch_one()`` starts one instance and waits for its window (e.g.
+    launch_tracked(exe, 1, ...)[0]); ``place(hwnd, rect)`` moves it. Both run
+    on the watchdog thread. ``exit_code(pid)`` is the code of an exited
+    process when it's known (we spawned it), else None, which counts as a crash.
+    """
+
+    def __init__(self, launch_one: Callable[[], LaunchResult],
+                 place: Callable[[int, Rect], None],
+                 is_alive: Callable[[int], bool] = pid_alive,
+                 create_time: Callable[[int], Optional[float]] = process_create_time,
+                 exit_code: Callable[[int], Optional[int]] = exit_code,
+                 on_recovered: Optional[Callable[[Recovery], None]] = None,
+                 backoff_initial_s: float = 2.0, backoff_max_s: float = 60.0,
+                 loop_window_s: float = 300.0, loop_max: int = 5,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_log: Optional[Callable[[str], None]] = None):
+        self._launch_one = launch_one
+        self._place = place
+        self._is_alive = is_alive
+        self._create_time = create_time
+        self._exit_code = exit_code
+        self._on_recovered = on_recovered
+        self.backoff_initial_s = backoff_initial_s
+        self.backoff_max_s = backoff_max_s
+        self.loop_window_s = loop_window_s
+        self.loop_max = max(1, int(loop_max))
+        self._clock = clock
+        self._log = on_log or (lambda m: None)
+        self._lock = threading.Lock()
+        self._tracked: Dict[int, Tracked] = {}  # slot -> instance
+        self.recoveries: List[Recovery] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # lifecycle
+
+    def start(self, interval: float = 1.0):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="Watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def _run(self, interval: float):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                self._log(f"[Watchdog] poll failed: {e}")
+            self._stop.wait(interval)
+
+    # tracking
+
+    def track(self, slot: int, pid: int, hwnd: Optional[int], rect: Optional[Rect]):
+        t = Tracked(slot, int(pid), hwnd, rect, self._create_time(int(pid)))
+        with self._lock:
+            self._tracked[slot] = t
+
+    def track_launch(self, results: Sequence[LaunchResult], slot_of: Dict[int, int],
+                     rects: Sequence[Rect]):
+        """Track every successful launch next to the instances already tracked.
+
+        ``slot_of`` maps hwnd -> index into ``rects``, this launch's layout
+        (unplaced ones get rect None). An index already used by an earlier
+        launch's instance gets a fresh slot number with the same rect.
+        """
+        new = [(r, self._create_time(int(r.pid))) for r in results if r.ok and r.pid is not None]
+        with self._lock:
+            pids = {int(r.pid) for r, _ct in new}
+            for slot in [s for s, t in self._tracked.items() if t.pid in pids]:
+                del self._tracked[slot]  # the same instance, arranged again
+            taken = set(self._tracked) | set(slot_of.values())
+            spare = (s for s in itertools.count() if s not in taken)
+            for r, ct in new:
+                idx = slot_of.get(r.hwnd)
+                rect = rects[idx] if idx is not None and idx < len(rects) else None
+                slot = idx if idx is not None and idx not in self._tracked else next(spare)
+                self._tracked[slot] = Tracked(slot, int(r.pid), r.hwnd, rect, ct)
+
+    def untrack(self, slot: int) -> bool:
+        """Stop watching one slot (e.g. the user closed that instance on purpose)."""
+        with self._lock:
+            return self._tracked.pop(slot, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._tracked.clear()
+
+    def tracked(self) -> List[Tracked]:
+        with self._lock:
+            return sorted(self._tracked.values(), key=lambda t: t.slot)
+
+    # policy
+
+    def _backoff(self, t: Tracked) -> float:
+        n = len(t.deaths) - 1 + t.failures
+        return min(self.backoff_max_s, self.backoff_initial_s * (2 ** max(0, n)))
+
+    def poll(self) -> List[Recovery]:
+        """Check every tracked PID once and run the relaunches that are due."""
+        now = self._clock()
+        due: List[Tracked] = []
+        with self._lock:
+            items = list(self._tracked.values())
+        for t in items:
+            if t.state == STATE_RUNNING:
+                if self._alive(t):
+                    continue
+                if self._exit_code(t.pid) == 0:
+                    self.untrack(t.slot)
+                    self._log(f"[Watchdog] slot {t.slot + 1} (pid={t.pid}) exited normally; no longer watched.")
+                    continue
+                t.died_at = now
+                t.failures = 0
+                t.deaths.append(now)
+                while t.deaths and now - t.deaths[0] > self.loop_window_s:
+                    t.deaths.popleft()
+                if len(t.deaths) > self.loop_max:
+                    t.state = STATE_GAVE_UP
+                    self._log(f"[Watchdog] slot {t.slot + 1} (pid={t.pid}) exited {len(t.deaths)} times "
+                              f"in {self.loop_window_s:g}s; crash loop, not relaunching.")
+                    continue
+                t.state = STATE_BACKOFF
+                t.next_attempt = now + self._backoff(t)
+                self._log(f"[Watchdog] slot {t.slot + 1} (pid={t.pid}) exited; "
+                          f"relaunching in {t.next_attempt - now:.1f}s.")
+            if t.state == STATE_BACKOFF and now >= t.next_attempt:
+                due.append(t)
+        out = []
+        for t in due:
+            rec = self._relaunch(t)
+            if rec is not None:
+                out.append(rec)
+        return out
+
+    def _alive(self, t: Tracked) -> bool:
+        if not self._is_alive(t.pid):
+            return False
+        # the PID may belong to a new process by now
+        return t.create_time is None or self._create_time(t.pid) == t.create_time
+
+    def _relaunch(self, t: Tracked) -> Optional[Recovery]:
+        try:
+            r = self._launch_one()
+        except Exception as e:
+            r = LaunchResult(index=t.slot + 1, error=str(e))
+        if not r.ok:
+            t.failures += 1
+            if t.failures >= self.loop_max:
+                t.state = STATE_GAVE_UP
+                self._log(f"[Watchdog] slot {t.slot + 1} relaunch failed {t.failures} times ({r.error}); giving up.")
+                return None
+            t.next_attempt = self._clock() + self._backoff(t)
+            self._log(f"[Watchdog] slot {t.slot + 1} relaunch failed ({r.error}); "
+                      f"retry in {t.next_attempt - self._clock():.1f}s.")
+            return None
+        if t.rect is not None:
+            try:
+                self._place(r.hwnd, t.rect)
+            except Exception as e:
+                self._log(f"[Watchdog] slot {t.slot + 1} placement failed: {e}")
+        rec = Recovery(t.slot, t.pid, t.hwnd, r.pid, r.hwnd, self._clock() - (t.died_at or self._clock()),
+                       t.failures + 1)
+        ct = self._create_time(r.pid) if r.pid is not None else None
+        with self._lock:
+            if r.pid is not None:
+                t.pid, t.create_time = r.pid, ct
+            t.hwnd = r.hwnd
+            t.state = STATE_RUNNING
+            t.failures = 0
+            self.recoveries.append(rec)
+        self._log(f"[Watchdog] slot {t.slot + 1} recovered: pid {rec.old_pid} -> {rec.new_pid}, "
+                  f"hwnd {rec.old_hwnd} -> {rec.new_hwnd} in {rec.time_to_recovery:.2f}s")
+        if self._on_recovered:
+            try:
+                self._on_recovered(rec)
+            except Exception as e:
+                self._log(f"[Watchdog] recovery hook failed: {e}")
+        return rec
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            ttr = sorted(r.time_to_recovery for r in self.recoveries)
+            states = [t.state for t in self._tracked.values()]
+        return {
+            "tracked": len(states),
+            "running": states.count(STATE_RUNNING),
+            "backoff": states.count(STATE_BACKOFF),
+            "gave_up": states.count(STATE_GAVE_UP),
+            "recoveries": len(ttr),
+            "ttr_avg_s": round(sum(ttr) / len(ttr), 3) if ttr else 0.0,
+            "ttr_max_s": round(ttr[-1], 3) if ttr else 0.0,
+        }
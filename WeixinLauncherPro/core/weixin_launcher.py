@@ -1,13 +1,227 @@
 import os
 import time
 import subprocess
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
 
+import psutil
 
-def launch_instances(exe_path: str, n: int, delay_ms: int):
-    """Launch WeChat N times with delay. (Multi-instance behavior depends on WeChat build.)"""
-    for _ in range(n):
-        try:
-            os.startfile(exe_path)
-        except Exception:
-            subprocess.Popen([exe_path], close_fds=True)
-        time.sleep(max(0, delay_ms) / 1000.0)
+
+@dataclass
+class LaunchResult:
+    index: int
+    pid: Optional[int] = None
+    hwnd: Optional[int] = None
+    time_to_window: Optional[float] = None  # seconds from spawn to first matching window
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.hwnd is not None
+
+
+# pid -> handle of every instance we spawned, so the watchdog can read exit codes
+_children: Dict[int, subprocess.Popen] = {}
+
+
+def spawn_process(exe_path: str) -> Optional[int]:
+    """Start one instance and return its PID (None if only the shell fallback worked)."""
+    try:
+        p = subprocess.Popen([exe_path], close_fds=True, cwd=os.path.dirname(exe_path) or None)
+        _children[p.pid] = p
+        return p.pid
+    except OSError:
+        os.startfile(exe_path)
+        return None
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except Exception:
+        return False
+
+
+def process_create_time(pid: int) -> Optional[float]:
+    """Create time of a live process (tells a reused PID apart), or None."""
+    try:
+        return psutil.Process(pid).create_time()
+    except Exception:
+        return None
+
+
+def exit_code(pid: int) -> Optional[int]:
+    """Exit code of an instance spawned here that has exited; None if still running or not ours."""
+    p = _children.get(pid)
+    if p is None:
+        return None
+    rc = p.poll()
+    if rc is not None:
+        _children.pop(pid, None)
+    return rc
+
+
+@dataclass
+class _Pending:
+    result: LaunchResult
+    spawned_at: float
+    deadline: float
+
+
+class LaunchPipeline:
+    """Readiness-driven launcher: each spawned instance is tracked until its window shows up.
+
+    Instead of sleeping a fixed delay per instance, the pipeline keeps at most
+    ``max_inflight`` instances starting at once and launches the next one as
+    soon as a slot frees up. With more than one slot, spawns are spaced by the
+    observed startup latency (EWMA) divided by the slot count, clamped to
+    [min_gap_ms, max_gap_ms].
+
+    A window matches a pending instance when it is new (not present before the
+    run) and owned by the spawned PID; if that PID is unknown or already gone
+    (launcher trampolines), the oldest such instance takes any unclaimed new
+    window.
+    """
+
+    def __init__(self,
+                 spawn: Callable[[], Optional[int]],
+                 list_windows: Callable[[], Sequence[Dict]],
+                 timeout_ms: int = 30000,
+                 max_inflight: int = 1,
+                 min_gap_ms: int = 100,
+                 max_gap_ms: int = 800,
+                 poll_ms: int = 50,
+                 is_alive: Callable[[int], bool] = pid_alive,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self._spawn = spawn
+        self._list_windows = list_windows
+        self.timeout_s = max(0.001, timeout_ms / 1000.0)
+        self.max_inflight = max(1, int(max_inflight))
+        self.min_gap_s = max(0, min_gap_ms) / 1000.0
+        self.max_gap_s = max(self.min_gap_s, max_gap_ms / 1000.0)
+        self.poll_s = max(0.001, poll_ms / 1000.0)
+        self._is_alive = is_alive
+        self._clock = clock
+        self._sleep = sleep
+        self.ewma_s: Optional[float] = None
+
+    def _gap(self) -> float:
+        if self.max_inflight == 1 or self.ewma_s is None:
+            return self.max_gap_s if self.max_inflight > 1 else self.min_gap_s
+        return min(self.max_gap_s, max(self.min_gap_s, self.ewma_s / self.max_inflight))
+
+    def _observe(self, latency: float):
+        self.ewma_s = latency if self.ewma_s is None else 0.7 * self.ewma_s + 0.3 * latency
+
+    def run(self, n: int,
+            on_result: Optional[Callable[[LaunchResult], None]] = None,
+            should_stop: Optional[Callable[[], bool]] = None,
+            on_tick: Optional[Callable[[], None]] = None) -> List[LaunchResult]:
+        known = {int(w["hwnd"]) for w in self._list_windows()}
+        results: List[LaunchResult] = []
+        pending: List[_Pending] = []
+        launched = 0
+        next_launch_at = self._clock()
+
+        def finish(p: _Pending):
+            pending.remove(p)
+            if on_result:
+                on_result(p.result)
+
+        while launched < n or pending:
+            if should_stop and should_stop():
+                for p in list(pending):
+                    p.result.error = "cancelled"
+                    finish(p)
+                break
+
+            now = self._clock()
+            if launched < n and len(pending) < self.max_inflight and now >= next_launch_at:
+                r = LaunchResult(index=launched + 1)
+                results.append(r)
+                launched += 1
+                try:
+                    r.pid = self._spawn()
+                except Exception as e:
+                    r.error = f"spawn failed: {e}"
+                    if on_result:
+                        on_result(r)
+                    continue
+                pending.append(_Pending(r, now, now + self.timeout_s))
+                next_launch_at = now + self._gap()
+
+            if pending:
+                self._match(pending, known, finish)
+                now = self._clock()
+                for p in [p for p in pending if now >= p.deadline]:
+                    alive = p.result.pid is None or self._is_alive(p.result.pid)
+                    p.result.error = "timeout" if alive else "process exited without a window"
+                    finish(p)
+                if len(pending) < self.max_inflight:
+                    # a slot freed up: don't hold the next spawn for a full gap
+                    next_launch_at = min(next_launch_at, now + self.min_gap_s)
+
+            if on_tick:
+                on_tick()
+
+            if launched < n or pending:
+                wait = self.poll_s
+                if launched < n and len(pending) < self.max_inflight:
+                    wait = min(wait, max(0.0, next_launch_at - self._clock()))
+                self._sleep(wait)
+
+        return results
+
+    def _match(self, pending: List[_Pending], known: set, finish: Callable[[_Pending], None]):
+        fresh = [w for w in self._list_windows() if int(w["hwnd"]) not in known]
+        if not fresh:
+            return
+        pending_pids = {p.result.pid for p in pending if p.result.pid is not None}
+        now = self._clock()
+
+        def claim(p: _Pending, w: Dict):
+            hwnd = int(w["hwnd"])
+            known.add(hwnd)
+            p.result.hwnd = hwnd
+            p.result.pid = int(w["pid"])  # may differ when a launcher process handed off
+            p.result.time_to_window = now - p.spawned_at
+            self._observe(p.result.time_to_window)
+            finish(p)
+
+        for p in list(pending):
+            if p.result.pid is None:
+                continue
+            for w in fresh:
+                if int(w["pid"]) == p.result.pid and int(w["hwnd"]) not in known:
+                    claim(p, w)
+                    break
+
+        orphans = [w for w in fresh if int(w["hwnd"]) not in known and int(w["pid"]) not in pending_pids]
+        for p in list(pending):
+            if not orphans:
+                break
+            if p.result.pid is not None and self._is_alive(p.result.pid):
+                continue
+            claim(p, orphans.pop(0))
+
+
+def launch_tracked(exe_path: str, n: int,
+                   list_windows: Callable[[], Sequence[Dict]],
+                   timeout_ms: int = 30000,
+                   max_inflight: int = 1,
+                   max_gap_ms: int = 800,
+                   poll_ms: int = 50,
+                   on_result: Optional[Callable[[LaunchResult], None]] = None,
+                   should_stop: Optional[Callable[[], bool]] = None,
+                   on_tick: Optional[Callable[[], None]] = None) -> List[LaunchResult]:
+    """Launch N instances and wait for each one's window; see LaunchPipeline."""
+    pipe = LaunchPipeline(
+        spawn=lambda: spawn_process(exe_path),
+        list_windows=list_windows,
+        timeout_ms=timeout_ms,
+        max_inflight=max_inflight,
+        max_gap_ms=max_gap_ms,
+        poll_ms=poll_ms,
+    )
+    return pipe.run(n, on_result=on_result, should_stop=should_stop, on_tick=on_tick)
@@ -1,20 +1,23 @@
-import os
-import math
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Tuple
 
-import psutil
+import win32api
 import win32gui
 import win32con
 import win32process
 
-from core.config import Rect
+from core import layout
+from core.config import AppConfig, Rect
+from core.layout import LayoutRequest, Monitor
+from core.placement import ApplyResult, WindowPlacer, Win32Native
+from core.procindex import ProcessIndex, norm_path as _norm
+from core.registry import WindowRegistry, number_windows, window_sort_key
+from core.snapshots import RestoreResult, Snapshot, SnapshotStore
 
-
-def _norm(p: str) -> str:
-    try:
-        return os.path.normcase(os.path.abspath(p))
-    except Exception:
-        return (p or "").lower()
+# Shared across scans so each refresh costs one process-table snapshot
+# instead of one process open per visible window.
+process_index = ProcessIndex()
+FALLBACK_RESCAN_S = 2.0  # registry rescan period while the win event hook isn't running
+placer: Optional[WindowPlacer] = None
 
 
 def work_area():
@@ -22,42 +25,76 @@ def work_area():
     return l, t, r, b
 
 
-def list_windows_by_exe(exe_path: str, class_name: str = "") -> List[Dict]:
+def _window_info(hwnd: int, exe_norm: str, class_name: str, idx: ProcessIndex,
+                 verify: bool = False) -> Optional[Dict]:
+    if not win32gui.IsWindowVisible(hwnd):
+        return None
+    cls = win32gui.GetClassName(hwnd)
+    if class_name and cls != class_name:
+        return None
+    _, pid = win32process.GetWindowThreadProcessId(hwnd)
+    exe = idx.exe_of(pid, verify=verify)
+    if exe is None or (exe_norm and exe != exe_norm):
+        return None
+    title = win32gui.GetWindowText(hwnd)
+    return {"hwnd": int(hwnd), "pid": int(pid), "title": title, "class": cls}
+
+
+def list_windows_by_exe(exe_path: str, class_name: str = "", index: Optional[ProcessIndex] = None) -> List[Dict]:
     """List visible top-level windows that belong to the given exe path, optionally filtering by class name."""
     exe_norm = _norm(exe_path)
     out: List[Dict] = []
+    idx = index or process_index
+    idx.begin_scan()
 
     def cb(hwnd, _):
-        if not win32gui.IsWindowVisible(hwnd):
-            return
-        cls = win32gui.GetClassName(hwnd)
-        if class_name and cls != class_name:
-            return
-        _, pid = win32process.GetWindowThreadProcessId(hwnd)
-        try:
-            p = psutil.Process(pid)
-            if exe_norm and _norm(p.exe()) != exe_norm:
-                return
-        except Exception:
-            return
-        title = win32gui.GetWindowText(hwnd)
-        out.append({"hwnd": int(hwnd), "pid": int(pid), "title": title, "class": cls})
+        info = _window_info(hwnd, exe_norm, class_name, idx)
+        if info:
+            out.append(info)
 
     win32gui.EnumWindows(cb, None)
 
     # Sort to make numbering more stable:
     # 1) has title first, 2) pid, 3) hwnd
-    out.sort(key=lambda x: (0 if x["title"] else 1, x["pid"], x["hwnd"]))
+    out.sort(key=window_sort_key)
     return out
 
 
-def list_numbered_wechat_windows(exe_path: str, class_name: str = "") -> List[Dict]:
-    """Return windows with a stable sequential index: 微信1/微信2/..."""
-    ws = list_windows_by_exe(exe_path, class_name)
-    for i, w in enumerate(ws, start=1):
-        w["index"] = i
-        w["label"] = f"微信{i}"
-    return ws
+def probe_window(hwnd: int, exe_path: str, class_name: str = "") -> Optional[Dict]:
+    """Describe a single window the way list_windows_by_exe would, or None if it doesn't match."""
+    try:
+        if not win32gui.IsWindow(hwnd):
+            return None
+        # between scans the cached snapshot may predate a PID reuse
+        return _window_info(hwnd, _norm(exe_path), class_name, process_index, verify=True)
+    except Exception:
+        return None
+
+
+def list_numbered_wechat_windows(exe_path: str, class_name: str = "",
+                                 number: Callable[[List[Dict]], List[Dict]] = number_windows) -> List[Dict]:
+    """Return windows labelled 微信1/微信2/... (positionally, or by ``number``, e.g. IdentityIndex.number)."""
+    return number(list_windows_by_exe(exe_path, class_name))
+
+
+def create_registry(exe_path: str, class_name: str = "",
+                    number: Callable[[List[Dict]], List[Dict]] = number_windows) -> WindowRegistry:
+    """Window registry fed by the native win event hook; call start() to begin tracking."""
+    # imported here so one-shot callers (the CLI) don't pay for the ctypes hook bindings
+    from core.winevents import WinEventSource
+    return WindowRegistry(
+        scan=list_windows_by_exe,
+        probe=probe_window,
+        source=WinEventSource(),
+        exe_path=exe_path,
+        class_name=class_name,
+        number=number,
+        rescan_s=FALLBACK_RESCAN_S,
+    )
+
+
+def foreground_window() -> int:
+    return int(win32gui.GetForegroundWindow() or 0)
 
 
 def focus(hwnd: int):
@@ -65,13 +102,43 @@ def focus(hwnd: int):
     win32gui.SetForegroundWindow(hwnd)
 
 
+def _placer() -> WindowPlacer:
+    global placer
+    if placer is None:
+        placer = WindowPlacer(Win32Native())
+    return placer
+
+
 def set_rect(hwnd: int, rect: Rect):
-    win32gui.ShowWindow(hwnd, win32con.SW_RESTORE)
-    win32gui.SetWindowPos(
-        hwnd, None,
-        rect.x, rect.y, rect.w, rect.h,
-        win32con.SWP_NOZORDER | win32con.SWP_NOACTIVATE
-    )
+    _placer().apply([(hwnd, rect)])
+
+
+def set_rects(pairs: List[Tuple[int, Rect]]) -> ApplyResult:
+    """Move several windows in one DeferWindowPos transaction; windows already in place are skipped."""
+    return _placer().apply(pairs)
+
+
+def minimize_windows(hwnds: List[int]) -> int:
+    return _placer().minimize(hwnds)
+
+
+def restore_windows(hwnds: List[int]) -> int:
+    return _placer().restore(hwnds)
+
+
+def raise_windows(hwnds: List[int]) -> bool:
+    """Bring the windows to the front, first one on top, without activating any of them."""
+    return _placer().raise_(hwnds)
+
+
+def save_snapshot(store: SnapshotStore, name: str, ws: List[Dict]) -> Snapshot:
+    """Record the current rect, monitor and z-order of every identified window in ``ws``."""
+    return store.capture(name, ws, _placer(), monitors())
+
+
+def restore_snapshot(store: SnapshotStore, name: str, hwnd_of: Callable[[str], Optional[int]]) -> RestoreResult:
+    """Put the instances of a saved snapshot back in one batched, z-ordered apply."""
+    return store.restore(name, hwnd_of, _placer(), monitors())
 
 
 def get_rect(hwnd: int) -> Rect:
@@ -79,29 +146,32 @@ def get_rect(hwnd: int) -> Rect:
     return Rect(int(l), int(t), int(r - l), int(b - t))
 
 
-def layout_cascade(base: Rect, count: int, dx: int, dy: int) -> List[Rect]:
-    wa_l, wa_t, wa_r, wa_b = work_area()
-    rects = []
-    for i in range(count):
-        x = max(wa_l, min(base.x + i * dx, wa_r - base.w))
-        y = max(wa_t, min(base.y + i * dy, wa_b - base.h))
-        rects.append(Rect(x, y, base.w, base.h))
-    return rects
-
-
-def layout_tile(base: Rect, count: int) -> List[Rect]:
-    wa_l, wa_t, wa_r, wa_b = work_area()
-    wa_w, wa_h = wa_r - wa_l, wa_b - wa_t
-    cols = math.ceil(math.sqrt(count))
-    rows = math.ceil(count / cols)
-    cell_w = max(1, wa_w // cols)
-    cell_h = max(1, wa_h // rows)
-    w = min(base.w, cell_w)
-    h = min(base.h, cell_h)
-
-    rects = []
-    for i in range(count):
-        r = i // cols
-        c = i % cols
-        rects.append(Rect(wa_l + c * cell_w, wa_t + r * cell_h, w, h))
-    return rects
+def monitors() -> List[Monitor]:
+    """Work area of every attached monitor; falls back to the primary work area."""
+    out = []
+    try:
+        for hmon, _hdc, _rc in win32api.EnumDisplayMonitors(None, None):
+            info = win32api.GetMonitorInfo(hmon)
+            l, t, r, b = info["Work"]
+            out.append(Monitor(l, t, r - l, b - t, bool(info["Flags"] & win32con.MONITORINFOF_PRIMARY),
+                               info.get("Device", "")))
+    except win32api.error:
+        out = []
+    if not out:
+        l, t, r, b = work_area()
+        out = [Monitor(l, t, r - l, b - t, True)]
+    return out
+
+
+def layout_rects(cfg: AppConfig, count: int, name: Optional[str] = None) -> List[Rect]:
+    """Target rects for ``count`` windows using cfg.base_rect and the given (or configured) layout.
+
+    Unknown names (e.g. a strategy whose plugin is no longer loaded) fall back to cascade.
+    """
+    mons = monitors()
+    if not cfg.layout_all_monitors:
+        mons = layout.primary_only(mons, cfg.base_rect)
+    name = name or cfg.layout
+    if name not in dict(layout.available_layouts()):
+        name = "cascade"
+    return layout.compute_layout(name, LayoutRequest(cfg.base_rect, count, mons, cfg.cascade_dx, cfg.cascade_dy))
@@ -0,0 +1,116 @@
+import ctypes
+import ctypes.wintypes as wt
+import threading
+from typing import Callable, Optional
+
+from core.registry import (
+    WindowEvent, WINDOW_CREATE, WINDOW_DESTROY, WINDOW_SHOW, WINDOW_HIDE, WINDOW_RENAME, WINDOW_FOREGROUND,
+)
+
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_OBJECT_CREATE = 0x8000
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+WINEVENT_SKIPOWNPROCESS = 0x0002
+OBJID_WINDOW = 0
+CHILDID_SELF = 0
+GA_ROOT = 2
+WM_QUIT = 0x0012
+
+_KINDS = {
+    EVENT_OBJECT_CREATE: WINDOW_CREATE,
+    EVENT_OBJECT_DESTROY: WINDOW_DESTROY,
+    EVENT_OBJECT_SHOW: WINDOW_SHOW,
+    EVENT_OBJECT_HIDE: WINDOW_HIDE,
+    EVENT_OBJECT_NAMECHANGE: WINDOW_RENAME,
+    EVENT_SYSTEM_FOREGROUND: WINDOW_FOREGROUND,
+}
+
+WinEventProc = ctypes.WINFUNCTYPE(
+    None, wt.HANDLE, wt.DWORD, wt.HWND, wt.LONG, wt.LONG, wt.DWORD, wt.DWORD
+)
+
+# private handles so our argtypes don't leak into ctypes.windll users elsewhere
+_user32 = ctypes.WinDLL("user32", use_last_error=True)
+_kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+_user32.SetWinEventHook.restype = wt.HANDLE
+_user32.SetWinEventHook.argtypes = [wt.DWORD, wt.DWORD, wt.HMODULE, WinEventProc, wt.DWORD, wt.DWORD, wt.DWORD]
+_user32.UnhookWinEvent.argtypes = [wt.HANDLE]
+_user32.GetAncestor.restype = wt.HWND
+_user32.GetAncestor.argtypes = [wt.HWND, wt.UINT]
+_user32.PostThreadMessageW.argtypes = [wt.DWORD, wt.UINT, wt.WPARAM, wt.LPARAM]
+
+
+class WinEventSource:
+    """Top-level window create/destroy/show/hide/rename/foreground events via SetWinEventHook.
+
+    Out-of-context hooks are delivered to the thread that installed them, so
+    the hook lives on its own thread running a message loop.
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._thread_id = 0
+        self._ready = threading.Event()
+        self._emit: Optional[Callable[[WindowEvent], None]] = None
+        self.active = False
+        self._proc = WinEventProc(self._callback)  # keep a reference for the hook's lifetime
+
+    def start(self, emit: Callable[[WindowEvent], None]) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._emit = emit
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="WinEventSource", daemon=True)
+        self._thread.start()
+        self._ready.wait(2.0)
+
+    def stop(self) -> None:
+        if self._thread_id:
+            _user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        if self._thread:
+            self._thread.join(timeout=2.0)
+        self._thread = None
+        self._thread_id = 0
+
+    def _callback(self, _hook, event, hwnd, id_object, id_child, _thread, _time):
+        if id_object != OBJID_WINDOW or id_child != CHILDID_SELF or not hwnd:
+            return
+        kind = _KINDS.get(event)
+        if kind is None or self._emit is None:
+            return
+        # destroyed windows can't be asked about their ancestry; the registry ignores unknown ones
+        if kind != WINDOW_DESTROY and _user32.GetAncestor(hwnd, GA_ROOT) != hwnd:
+            return
+        try:
+            self._emit(WindowEvent(kind, int(hwnd)))
+        except Exception:
+            pass
+
+    def _run(self):
+        user32 = _user32
+        self._thread_id = _kernel32.GetCurrentThreadId()
+        flags = WINEVENT_OUTOFCONTEXT | WINEVENT_SKIPOWNPROCESS
+        # separate ranges so the very chatty LOCATIONCHANGE (0x800B) never reaches Python
+        hooks = [
+            user32.SetWinEventHook(EVENT_OBJECT_CREATE, EVENT_OBJECT_HIDE, None, self._proc, 0, 0, flags),
+            user32.SetWinEventHook(EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_NAMECHANGE, None, self._proc, 0, 0, flags),
+            user32.SetWinEventHook(EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND, None, self._proc, 0, 0, flags),
+        ]
+        self.active = all(hooks)
+        self._ready.set()
+        try:
+            if not self.active:
+                return
+            msg = wt.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            self.active = False
+            for h in hooks:
+                if h:
+                    user32.UnhookWinEvent(h)
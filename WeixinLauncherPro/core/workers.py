@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+
+@dataclass
+class Task:
+    fn: Callable[[], None]
+    timeout: float = 0.0  # seconds, 0 = none
+    on_done: Optional[Callable[[Optional[BaseException]], None]] = None
+    on_timeout: Optional[Callable[[], None]] = None
+    submitted_at: float = field(default_factory=time.monotonic)
+
+
+class _Worker(threading.Thread):
+    def __init__(self, pool: "WorkerPool", n: int):
+        super().__init__(name=f"SchedulerWorker-{n}", daemon=True)
+        self.key = n
+        self.pool = pool
+        self.task: Optional[Task] = None
+        self.deadline = 0.0
+        self.abandoned = False
+        self.replaced = False
+
+    def run(self):
+        self.pool._worker_loop(self)
+
+
+class WorkerPool:
+    """Fixed-size thread pool with per-task timeouts.
+
+    Threads can't be killed, so a task that overruns its timeout is
+    abandoned: its on_timeout fires and its worker is replaced (up to
+    ``max_abandoned`` at a time) so the healthy capacity stays at ``workers``.
+    on_done still fires whenever the task finally returns; the stuck thread
+    then exits, or rejoins the pool if it could not be replaced.
+    """
+
+    def __init__(self, workers: int = 4, max_abandoned: int = 8):
+        self.size = max(1, int(workers))
+        self.max_abandoned = max(0, int(max_abandoned))
+        self._q: "queue.Queue[Optional[Task]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._workers: Dict[int, _Worker] = {}
+        self._seq = 0
+        self._closed = False
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+        for _ in range(self.size):
+            self._spawn_worker()
+        self._monitor = threading.Thread(target=self._watch_deadlines, name="SchedulerWorkerMonitor", daemon=True)
+        self._monitor.start()
+
+    def _spawn_worker(self):
+        self._seq += 1
+        w = _Worker(self, self._seq)
+        self._workers[self._seq] = w
+        w.start()
+
+    def submit(self, task: Task):
+        if self._closed:
+            raise RuntimeError("worker pool is shut down")
+        task.submitted_at = time.monotonic()
+        self._q.put(task)
+        depth = self._q.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            n = sum(1 for w in self._workers.values() if not w.abandoned)
+            self._wake.notify_all()
+        for _ in range(n):
+            self._q.put(None)
+
+    def metrics(self) -> Dict[str, float]:
+        with self._lock:
+            running = sum(1 for w in self._workers.values() if w.task is not None and not w.abandoned)
+            stuck = sum(1 for w in self._workers.values() if w.abandoned)
+        done = self.completed + self.failed
+        return {
+            "workers": self.size,
+            "running": running,
+            "queue_depth": self._q.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "stuck_threads": stuck,
+            "avg_queue_wait_ms": (self.total_wait / done * 1000.0) if done else 0.0,
+        }
+
+    def _worker_loop(self, w: _Worker):
+        while True:
+            task = self._q.get()
+            if task is None:
+                return
+            started = time.monotonic()
+            with self._lock:
+                w.task = task
+                w.deadline = started + task.timeout if task.timeout > 0 else 0.0
+                self.total_wait += started - task.submitted_at
+                if w.deadline:
+                    self._wake.notify()
+            err: Optional[BaseException] = None
+            try:
+                task.fn()
+            except Exception as e:
+                err = e
+            with self._lock:
+                w.task = None
+                late = w.abandoned
+                retire = w.abandoned and w.replaced
+                w.abandoned = False
+                if retire:
+                    self._workers.pop(w.key, None)
+                if not late:
+                    if err is None:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+            if task.on_done:
+                try:
+                    task.on_done(err)
+                except Exception:
+                    pass
+            if retire:
+                return
+
+    def _watch_deadlines(self):
+        with self._lock:
+            while not self._closed:
+                now = time.monotonic()
+                expired = [w for w in self._workers.values()
+                           if w.task is not None and not w.abandoned and w.deadline and w.deadline <= now]
+                for w in expired:
+                    w.abandoned = True
+                    self.timeouts += 1
+                    stuck = sum(1 for x in self._workers.values() if x.abandoned and x.replaced)
+                    if stuck < self.max_abandoned:
+                        w.replaced = True
+                        self._spawn_worker()
+                    cb = w.task.on_timeout if w.task else None
+                    if cb:
+                        self._lock.release()
+                        try:
+                            cb()
+                        except Exception:
+                            pass
+                        finally:
+                            self._lock.acquire()
+                deadlines = [w.deadline for w in self._workers.values()
+                             if w.task is not None and not w.abandoned and w.deadline]
+                self._wake.wait(max(0.0, min(deadlines) - time.monotonic()) if deadlines else None)
+
@@ -15,6 +15,9 @@ from core.config import load_config
 from core.logger import Logger
 from core.scheduler import Scheduler
 from core.context import AppContext
+from core.focus import FocusDispatcher
+from core.clipboard import create_clipboard
+from core.tasks import TaskRunner
 from core import windows
 from core.plugin_api import load_single_plugin_from_dir
 
@@ -32,20 +35,34 @@ def main():
     txt = tk.Text(root, height=10, wrap="word")
     txt.pack(side="bottom", fill="x")
 
-    def sink(msg: str):
-        txt.insert("end", msg + "\n")
-        txt.see("end")
-
     cfg = load_config()
-    logger = Logger(sink)
-    scheduler = Scheduler(sink)
+    logger = Logger(capacity=cfg.log_max_lines)
+    sink = logger.info
+
+    def flush_log():
+        recs = logger.drain()
+        if recs:
+            txt.insert("end", "\n".join(r.line() for r in recs) + "\n")
+            txt.see("end")
+        root.after(100, flush_log)
+
+    root.after(100, flush_log)
+    scheduler = Scheduler(sink, workers=cfg.scheduler_workers)
     scheduler.start()
-    ctx = AppContext(cfg=cfg, log=logger, scheduler=scheduler, windows=windows)
+    registry = windows.create_registry(cfg.exe_path, cfg.class_name)
+    registry.start()
+    focus = FocusDispatcher(windows.focus, min_dwell_ms=cfg.focus_dwell_ms, on_log=sink)
+    focus.start()
+    ctx = AppContext(cfg=cfg, log=logger, scheduler=scheduler, windows=windows, registry=registry, focus=focus,
+                     clipboard=create_clipboard(root), tasks=TaskRunner(on_log=sink))
+    ctx.tasks.attach(root)
 
     try:
         plugin = load_single_plugin_from_dir(plugin_name, ctx)
     except Exception as e:
         messagebox.showerror("Load failed", str(e))
+        focus.stop()
+        registry.stop()
         root.destroy()
         return
 
@@ -55,6 +72,7 @@ def main():
     nb.add(tab, text=plugin.name)
 
     def on_close():
+        ctx.tasks.shutdown()
         try:
             plugin.on_stop()
         except Exception:
@@ -63,6 +81,11 @@ def main():
             scheduler.stop()
         except Exception:
             pass
+        try:
+            focus.stop()
+            registry.stop()
+        except Exception:
+            pass
         root.destroy()
 
     try:
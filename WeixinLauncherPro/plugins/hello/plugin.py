@@ -6,6 +6,11 @@ class HelloPlugin:
     name = "Hello"
     version = "0.2.0"
 
+    worker = None  # set by the plugin host from the manifest's "worker" entry
+
+    def attach_worker(self, worker):
+        self.worker = worker
+
     def init(self, ctx):
         self.ctx = ctx
 
@@ -13,6 +18,7 @@ class HelloPlugin:
         frame = ttk.Frame(parent)
         ttk.Label(frame, text="这是一个示例插件，用于验证插件系统。").pack(anchor="w", padx=10, pady=10)
         ttk.Button(frame, text="Hello", command=self._hello).pack(anchor="w", padx=10, pady=6)
+        ttk.Button(frame, text="询问后台 worker", command=self._ask_worker).pack(anchor="w", padx=10, pady=6)
         ttk.Label(frame, text="你可以用 python debug_plugin.py hello 单独调试这个插件。").pack(anchor="w", padx=10, pady=6)
         return frame
 
@@ -20,6 +26,25 @@ class HelloPlugin:
         self.ctx.log.info("Hello plugin clicked.")
         messagebox.showinfo("Hello", "插件系统工作正常。")
 
+    def _ask_worker(self):
+        if self.worker is None:
+            messagebox.showinfo("Hello", "worker 未加载（单独调试时不启动 worker）。")
+            return
+        # the call waits on the worker (maybe another process); keep it off the Tk thread
+        self.ctx.tasks.submit(lambda token: self.worker.call("summary", timeout=5.0), name="hello-worker",
+                              on_done=self._worker_answered)
+
+    def _worker_answered(self, handle):
+        err = handle.error()
+        if err is not None:
+            messagebox.showerror("Hello", f"worker 调用失败：{err}")
+            return
+        if handle.cancelled:
+            return
+        res = handle.result()
+        mode = "独立进程" if self.worker.isolated else "主进程内"
+        messagebox.showinfo("Hello", f"worker（{mode}）看到 {res['windows']} 个微信窗口，已定时执行 {res['ticks']} 次。")
+
     def on_start(self):
         pass
 
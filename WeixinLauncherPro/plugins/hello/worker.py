@@ -0,0 +1,25 @@
+"""Non-UI half of the hello plugin: runs in-process, or in a child process with plugin_isolation on."""
+
+
+class HelloWorker:
+    def start(self, services):
+        self.svc = services
+        self.ticks = 0
+        self.svc.scheduler.every("tick", 600, self._tick)
+        self.svc.log.info("Hello worker started.")
+
+    def _tick(self):
+        self.ticks += 1
+        self.svc.log.info(f"Hello worker tick #{self.ticks}: {len(self.svc.windows.list())} WeChat window(s).")
+
+    def handle(self, method, args):
+        if method == "summary":
+            return {"windows": len(self.svc.windows.list()), "ticks": self.ticks}
+        raise ValueError(f"unknown method: {method}")
+
+    def stop(self):
+        self.svc.scheduler.remove("tick")
+
+
+def create_worker():
+    return HelloWorker()
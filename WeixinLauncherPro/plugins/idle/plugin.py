@@ -0,0 +1,54 @@
+from core.idle import IdleManager, IdlePolicy, PsutilProcessBackend
+from .ui import IdleTab
+
+TICK_SEC = 5.0
+
+
+def policy_from_config(cfg) -> IdlePolicy:
+    return IdlePolicy(
+        idle_after_s=float(cfg.idle_after_s),
+        trim=cfg.idle_trim,
+        priority=cfg.idle_priority,
+        spread_affinity=cfg.idle_spread_affinity,
+        dry_run=cfg.idle_dry_run,
+    )
+
+
+class IdlePlugin:
+    id = "idle"
+    name = "实例节能"
+    version = "0.1.0"
+
+    def init(self, ctx):
+        self.ctx = ctx
+        foreground = getattr(ctx.windows, "foreground_window", None)
+        self.manager = IdleManager(PsutilProcessBackend(), ctx.wechat_windows, policy_from_config(ctx.cfg),
+                                   foreground=foreground, on_log=ctx.log.info)
+
+    def get_tab(self, parent):
+        self.tab = IdleTab(parent, self.ctx, self)
+        return self.tab
+
+    def apply_config(self):
+        """Re-read the policy from ctx.cfg; starts/stops the engine as needed."""
+        self.manager.set_policy(policy_from_config(self.ctx.cfg))
+        if self.ctx.cfg.idle_enabled:
+            self.manager.start(TICK_SEC)
+        else:
+            self.manager.stop(restore=True)
+
+    def on_start(self):
+        if self.ctx.registry is not None:
+            # foreground events restore an instance right away instead of on the next tick
+            self.ctx.registry.subscribe_foreground(self.manager.note_foreground)
+        if self.ctx.cfg.idle_enabled:
+            self.manager.start(TICK_SEC)
+
+    def on_stop(self):
+        if self.ctx.registry is not None:
+            self.ctx.registry.unsubscribe_foreground(self.manager.note_foreground)
+        self.manager.stop(restore=True)
+
+
+def create_plugin():
+    return IdlePlugin()
@@ -0,0 +1,100 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from core.config import save_config
+from core.idle import PRIORITY_BELOW_NORMAL, PRIORITY_IDLE
+from ui.tree_model import TreeModel
+
+REFRESH_MS = 1000
+
+PRIORITY_CHOICES = [("不调整", ""), ("低于正常", PRIORITY_BELOW_NORMAL), ("空闲（最低）", PRIORITY_IDLE)]
+
+
+def _mb(n) -> str:
+    return "" if n is None else f"{n / (1024 * 1024):.0f}"
+
+
+class IdleTab(ttk.Frame):
+    def __init__(self, parent, ctx, plugin):
+        super().__init__(parent)
+        self.ctx = ctx
+        self.plugin = plugin
+        self.manager = plugin.manager
+        self._build()
+        self.after(REFRESH_MS, self._refresh)
+
+    def _build(self):
+        cfg = self.ctx.cfg
+        frm = ttk.LabelFrame(self, text="空闲实例策略（非前台且长时间无操作的微信）")
+        frm.pack(fill="x", padx=10, pady=10)
+
+        self.var_enabled = tk.BooleanVar(value=cfg.idle_enabled)
+        ttk.Checkbutton(frm, text="启用", variable=self.var_enabled).grid(row=0, column=0, sticky="w", padx=8, pady=6)
+        ttk.Label(frm, text="空闲判定（秒）：").grid(row=0, column=1, sticky="e", padx=8, pady=6)
+        self.spn_after = ttk.Spinbox(frm, from_=10, to=86400, increment=30, width=10)
+        self.spn_after.set(str(cfg.idle_after_s))
+        self.spn_after.grid(row=0, column=2, sticky="w", padx=8, pady=6)
+        self.var_dry = tk.BooleanVar(value=cfg.idle_dry_run)
+        ttk.Checkbutton(frm, text="仅演练（只写日志，不实际修改进程）", variable=self.var_dry).grid(
+            row=0, column=3, sticky="w", padx=8, pady=6)
+
+        self.var_trim = tk.BooleanVar(value=cfg.idle_trim)
+        ttk.Checkbutton(frm, text="回收内存（修剪工作集）", variable=self.var_trim).grid(
+            row=1, column=0, sticky="w", padx=8, pady=6)
+        ttk.Label(frm, text="进程优先级：").grid(row=1, column=1, sticky="e", padx=8, pady=6)
+        self.cmb_priority = ttk.Combobox(frm, width=12, state="readonly", values=[t for t, _ in PRIORITY_CHOICES])
+        self.cmb_priority.current(next((i for i, (_, v) in enumerate(PRIORITY_CHOICES) if v == cfg.idle_priority), 0))
+        self.cmb_priority.grid(row=1, column=2, sticky="w", padx=8, pady=6)
+        self.var_affinity = tk.BooleanVar(value=cfg.idle_spread_affinity)
+        ttk.Checkbutton(frm, text="分散到不同 CPU 核心", variable=self.var_affinity).grid(
+            row=1, column=3, sticky="w", padx=8, pady=6)
+
+        ttk.Button(frm, text="应用并保存", command=self.apply).grid(row=2, column=0, sticky="w", padx=8, pady=6)
+        ttk.Label(frm, text="切回前台的微信会立即恢复优先级与 CPU 设置。").grid(
+            row=2, column=1, columnspan=3, sticky="w", padx=8, pady=6)
+
+        lf = ttk.LabelFrame(self, text="实例状态与内存回收报告")
+        lf.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        cols = [("label", "编号", 80), ("pid", "PID", 80), ("state", "状态", 80), ("idle_for", "无操作（秒）", 100),
+                ("before", "回收前 MB", 100), ("after", "回收后 MB", 100)]
+        self.tree = ttk.Treeview(lf, columns=[c for c, _, _ in cols], show="headings", height=12)
+        for c, t, w in cols:
+            self.tree.heading(c, text=t)
+            self.tree.column(c, width=w, anchor="w")
+        self.tree.pack(fill="both", expand=True, padx=8, pady=8)
+        self.model = TreeModel(self.tree)
+        self.lbl_summary = ttk.Label(lf, text="")
+        self.lbl_summary.pack(anchor="w", padx=8, pady=(0, 8))
+
+    def apply(self):
+        try:
+            after = int(self.spn_after.get())
+        except ValueError:
+            messagebox.showerror("错误", "空闲判定秒数必须是整数。")
+            return
+        cfg = self.ctx.cfg
+        cfg.idle_enabled = bool(self.var_enabled.get())
+        cfg.idle_after_s = max(10, after)
+        cfg.idle_trim = bool(self.var_trim.get())
+        cfg.idle_priority = PRIORITY_CHOICES[self.cmb_priority.current()][1]
+        cfg.idle_spread_affinity = bool(self.var_affinity.get())
+        cfg.idle_dry_run = bool(self.var_dry.get())
+        save_config(cfg)
+        self.plugin.apply_config()
+        self.ctx.log.info(f"[Idle] policy {'enabled' if cfg.idle_enabled else 'disabled'}"
+                          f"{' (dry run)' if cfg.idle_dry_run else ''}")
+
+    def _refresh(self):
+        if not self.winfo_exists():
+            return
+        if self.winfo_ismapped():
+            rows = []
+            for r in self.manager.snapshot():
+                rows.append((r["pid"], (r["label"], r["pid"], "空闲" if r["idle"] else "活跃", f"{r['idle_for']:.0f}",
+                                        _mb(r["before_rss"]), _mb(r["after_rss"]))))
+            self.model.update(rows)
+            rep = self.manager.memory_report()
+            self.lbl_summary.configure(
+                text=f"{rep['instances']} 个实例，已回收 {rep['trimmed']} 个：回收前 {_mb(rep['before_rss'])} MB → "
+                     f"回收后 {_mb(rep['after_rss'])} MB（节省 {_mb(rep['saved'])} MB）；当前总占用 {_mb(rep['current_rss'])} MB")
+        self.after(REFRESH_MS, self._refresh)
@@ -0,0 +1,34 @@
+from core.monitor import ResourceMonitor
+from .ui import MonitorTab
+
+
+class MonitorPlugin:
+    id = "monitor"
+    name = "资源监控"
+    version = "0.1.0"
+
+    def init(self, ctx):
+        self.ctx = ctx
+        self.monitor = ResourceMonitor(self._targets, on_log=ctx.log.warn)
+
+    def _targets(self):
+        out = {}
+        for w in self.ctx.wechat_windows():
+            pid = w.get("pid")
+            if pid and pid not in out:
+                out[pid] = w["label"]
+        return out
+
+    def get_tab(self, parent):
+        self.tab = MonitorTab(parent, self.ctx, self.monitor)
+        return self.tab
+
+    def on_start(self):
+        self.monitor.start()
+
+    def on_stop(self):
+        self.monitor.stop()
+
+
+def create_plugin():
+    return MonitorPlugin()
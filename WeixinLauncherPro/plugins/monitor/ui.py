@@ -0,0 +1,49 @@
+from tkinter import ttk
+
+from ui.tree_model import TreeModel
+
+REFRESH_MS = 1000
+
+
+def _mb(n: int) -> str:
+    return f"{n / (1024 * 1024):.0f}"
+
+
+class MonitorTab(ttk.Frame):
+    def __init__(self, parent, ctx, monitor):
+        super().__init__(parent)
+        self.ctx = ctx
+        self.monitor = monitor
+        self._build()
+        self.after(REFRESH_MS, self._refresh)
+
+    def _build(self):
+        lf = ttk.LabelFrame(self, text="各微信实例资源占用（自动刷新）")
+        lf.pack(fill="both", expand=True, padx=10, pady=10)
+        cols = [("label", "编号", 80), ("pid", "PID", 80), ("cpu", "CPU %", 80), ("rss", "内存 MB", 90),
+                ("private", "私有 MB", 90), ("handles", "句柄", 80), ("threads", "线程", 80), ("peak", "内存峰值 MB", 110)]
+        self.tree = ttk.Treeview(lf, columns=[c for c, _, _ in cols], show="headings", height=16)
+        for c, t, w in cols:
+            self.tree.heading(c, text=t)
+            self.tree.column(c, width=w, anchor="w")
+        self.tree.pack(fill="both", expand=True, padx=8, pady=8)
+        self.model = TreeModel(self.tree)
+        self.var_status = ttk.Label(lf, text="")
+        self.var_status.pack(anchor="w", padx=8, pady=(0, 8))
+
+    def _refresh(self):
+        if not self.winfo_exists():
+            return
+        visible = bool(self.winfo_ismapped())
+        self.monitor.set_active(visible)
+        if visible:
+            rows = []
+            for r in self.monitor.latest():
+                peak = max((s.rss for s in self.monitor.history(r["pid"])), default=r["rss"])
+                rows.append((r["pid"], (r["label"], r["pid"], f"{r['cpu']:.1f}", _mb(r["rss"]), _mb(r["private"]),
+                                        r["handles"], r["threads"], _mb(peak))))
+            self.model.update(rows)
+            self.var_status.configure(
+                text=f"{len(rows)} 个实例 · 采样间隔 {self.monitor.current_interval:.1f}s"
+                     f" · 单次采样耗时 {self.monitor.last_cost * 1000:.1f}ms")
+        self.after(REFRESH_MS, self._refresh)
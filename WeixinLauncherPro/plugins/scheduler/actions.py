@@ -1,15 +1,49 @@
-import tkinter as tk
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Optional
 
+ACTION_FOCUS_AND_COPY = "focus_and_copy"
+FOCUS_WAIT_SEC = 60.0
+
+
+def focus_and_copy(ctx, hwnd: int, text: str) -> bool:
+    """Safer default action: focus target window + copy message to clipboard for manual paste/send.
+
+    With a focus dispatcher on the context the copy runs as a queued foreground
+    op, so concurrent jobs don't fight over focus and the clipboard. Returns
+    True only if the text is on the clipboard.
+    """
+    if ctx.focus is not None:
+        try:
+            return ctx.focus.run(hwnd, lambda: _copy(ctx, text), timeout=FOCUS_WAIT_SEC)
+        except FutureTimeout:
+            ctx.log.error(f"focus queue busy; gave up on {hwnd} after {FOCUS_WAIT_SEC:g}s")
+        except Exception as e:
+            ctx.log.error(f"focus failed: {e}")
+        return False
 
-def focus_and_copy(ctx, hwnd: int, text: str):
-    """Safer default action: focus target window + copy message to clipboard for manual paste/send."""
     try:
         ctx.windows.focus(hwnd)
     except Exception as e:
         ctx.log.error(f"focus failed: {e}")
-        return
+        return False
+    return _copy(ctx, text)
 
+
+def _copy(ctx, text: str) -> bool:
+    if ctx.clipboard is not None:
+        try:
+            written = ctx.clipboard.copy_sync(text)
+        except Exception as e:
+            ctx.log.error(f"clipboard failed: {e}")
+            return False
+        if not written:
+            # a newer copy was coalesced with this one and won; this text never reached the clipboard
+            ctx.log.warn("Message superseded by a newer clipboard copy; not copied.")
+            return False
+        ctx.log.info("Message copied to clipboard (manual paste + send).")
+        return True
     try:
+        import tkinter as tk
         r = tk.Tk()
         r.withdraw()
         r.clipboard_clear()
@@ -17,5 +51,47 @@ def focus_and_copy(ctx, hwnd: int, text: str):
         r.update()
         r.destroy()
         ctx.log.info("Message copied to clipboard (manual paste + send).")
+        return True
     except Exception as e:
         ctx.log.error(f"clipboard failed: {e}")
+        return False
+
+
+def resolve_target(ctx, target: dict) -> Optional[int]:
+    """Map a persisted target ({identity, label, hwnd}) to a live hwnd.
+
+    With an identity index this is a dict lookup by identity (or by label for
+    jobs saved before identities existed); otherwise same hwnd if still
+    listed, else same label.
+    """
+    if ctx.identities is not None:
+        return ctx.identities.resolve(target)
+    ws = ctx.wechat_windows()
+    hwnd = target.get("hwnd")
+    for w in ws:
+        if w["hwnd"] == hwnd:
+            return hwnd
+    label = target.get("label")
+    for w in ws:
+        if w["label"] == label:
+            return w["hwnd"]
+    return None
+
+
+def make_focus_and_copy(ctx):
+    """Action factory for JobManager: rebuilds the job action from its spec."""
+    def factory(spec):
+        target = dict(spec.target)
+        text = spec.payload.get("text", "")
+
+        def action():
+            hwnd = resolve_target(ctx, target)
+            if hwnd is None:
+                ctx.log.warn(f"[job {spec.job_id}] target {target.get('label')} not found; skipped.")
+                return
+            if focus_and_copy(ctx, hwnd, text):
+                ctx.log.info(f"[{target.get('label')} job {spec.job_id}] executed.")
+            else:
+                ctx.log.warn(f"[{target.get('label')} job {spec.job_id}] message not copied.")
+        return action
+    return factory
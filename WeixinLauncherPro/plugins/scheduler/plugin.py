@@ -1,3 +1,4 @@
+from .actions import ACTION_FOCUS_AND_COPY, make_focus_and_copy
 from .ui import SchedulerTab
 
 
@@ -8,6 +9,8 @@ class SchedulerPlugin:
 
     def init(self, ctx):
         self.ctx = ctx
+        if ctx.jobs is not None:
+            ctx.jobs.register_action(ACTION_FOCUS_AND_COPY, make_focus_and_copy(ctx))
 
     def get_tab(self, parent):
         self.tab = SchedulerTab(parent, self.ctx)
@@ -1,15 +1,29 @@
+import time
 import uuid
 from tkinter import ttk, messagebox
 
-from core.scheduler import Job
-from core import windows
-from .actions import focus_and_copy
+from core.scheduler import Job, OVERLAP_SKIP, OVERLAP_QUEUE, OVERLAP_CONCURRENT
+from core.triggers import CronTrigger, IntervalTrigger, OneShotTrigger, FIXED_RATE, FIXED_DELAY
+from core.jobstore import JobSpec
+from ui.tree_model import TreeModel
+from .actions import ACTION_FOCUS_AND_COPY, make_focus_and_copy
+
+
+OVERLAP_CHOICES = [
+    ("上次未完成则跳过", OVERLAP_SKIP),
+    ("上次未完成则排队", OVERLAP_QUEUE),
+    ("允许并发执行", OVERLAP_CONCURRENT),
+]
+
+
+TRIGGER_CHOICES = ["间隔（固定频率）", "间隔（固定延迟）", "Cron 表达式", "一次性（N 秒后）"]
 
 
 class SchedulerTab(ttk.Frame):
     def __init__(self, parent, ctx):
         super().__init__(parent)
         self.ctx = ctx
+        self._cmb_windows = []
         self._build()
 
     def _build(self):
@@ -19,49 +33,107 @@ class SchedulerTab(ttk.Frame):
         ttk.Label(frm, text="目标微信：").grid(row=0, column=0, sticky="w", padx=8, pady=6)
         self.cmb = ttk.Combobox(frm, width=58, state="readonly")
         self.cmb.grid(row=0, column=1, sticky="w", padx=8, pady=6)
-        ttk.Button(frm, text="刷新窗口", command=self.refresh_windows).grid(row=0, column=2, padx=8, pady=6)
-
-        ttk.Label(frm, text="间隔(秒)：").grid(row=1, column=0, sticky="w", padx=8, pady=6)
-        self.spn_interval = ttk.Spinbox(frm, from_=5, to=86400, increment=5, width=12)
+        ttk.Button(frm, text="刷新窗口", command=self.rescan_windows).grid(row=0, column=2, padx=8, pady=6)
+
+        ttk.Label(frm, text="触发方式：").grid(row=1, column=0, sticky="w", padx=8, pady=6)
+        trig = ttk.Frame(frm)
+        trig.grid(row=1, column=1, columnspan=2, sticky="w", padx=8, pady=6)
+        self.cmb_trigger = ttk.Combobox(trig, width=16, state="readonly", values=TRIGGER_CHOICES)
+        self.cmb_trigger.current(0)
+        self.cmb_trigger.pack(side="left")
+        ttk.Label(trig, text="秒数：").pack(side="left", padx=(16, 4))
+        self.spn_interval = ttk.Spinbox(trig, from_=5, to=86400, increment=5, width=10)
         self.spn_interval.set("60")
-        self.spn_interval.grid(row=1, column=1, sticky="w", padx=8, pady=6)
+        self.spn_interval.pack(side="left")
+        ttk.Label(trig, text="Cron：").pack(side="left", padx=(16, 4))
+        self.ent_cron = ttk.Entry(trig, width=18)
+        self.ent_cron.insert(0, "0 9 * * 1-5")
+        self.ent_cron.pack(side="left")
 
         ttk.Label(frm, text="消息内容：").grid(row=2, column=0, sticky="w", padx=8, pady=6)
         self.ent_text = ttk.Entry(frm, width=70)
         self.ent_text.grid(row=2, column=1, columnspan=2, sticky="w", padx=8, pady=6)
         self.ent_text.insert(0, "示例：到点提醒我发这条消息")
 
-        ttk.Button(frm, text="添加任务", command=self.add_job).grid(row=3, column=1, sticky="w", padx=8, pady=10)
-        ttk.Button(frm, text="删除选中任务", command=self.remove_job).grid(row=3, column=2, sticky="w", padx=8, pady=10)
+        ttk.Label(frm, text="重叠策略：").grid(row=3, column=0, sticky="w", padx=8, pady=6)
+        opts = ttk.Frame(frm)
+        opts.grid(row=3, column=1, columnspan=2, sticky="w", padx=8, pady=6)
+        self.cmb_overlap = ttk.Combobox(opts, width=18, state="readonly", values=[t for t, _ in OVERLAP_CHOICES])
+        self.cmb_overlap.current(0)
+        self.cmb_overlap.pack(side="left")
+        ttk.Label(opts, text="超时(秒，0=不限)：").pack(side="left", padx=(16, 4))
+        self.spn_timeout = ttk.Spinbox(opts, from_=0, to=3600, increment=5, width=8)
+        self.spn_timeout.set("30")
+        self.spn_timeout.pack(side="left")
+
+        ttk.Button(frm, text="添加任务", command=self.add_job).grid(row=4, column=1, sticky="w", padx=8, pady=10)
+        ttk.Button(frm, text="删除选中任务", command=self.remove_job).grid(row=4, column=2, sticky="w", padx=8, pady=10)
 
         lf = ttk.LabelFrame(self, text="任务列表")
         lf.pack(fill="both", expand=True, padx=10, pady=(0, 10))
         self.tree = ttk.Treeview(lf, columns=("id","interval","target","text"), show="headings", height=10)
-        for c, t, w in [("id","ID",120), ("interval","间隔(秒)",90), ("target","目标",140), ("text","内容",540)]:
+        for c, t, w in [("id","ID",120), ("interval","触发",150), ("target","目标",140), ("text","内容",480)]:
             self.tree.heading(c, text=t)
             self.tree.column(c, width=w, anchor="w")
         self.tree.pack(fill="both", expand=True, padx=8, pady=8)
+        self.job_model = TreeModel(self.tree)
 
         self.refresh_windows()
         self.refresh_jobs()
+        if self.ctx.cfg.auto_refresh_ms > 0:
+            self.after(self.ctx.cfg.auto_refresh_ms, self._auto_refresh)
+
+    def _auto_refresh(self):
+        if not self.winfo_exists():
+            return
+        self.refresh_windows()
+        self.refresh_jobs()
+        self.after(self.ctx.cfg.auto_refresh_ms, self._auto_refresh)
+
+    def rescan_windows(self):
+        """The button: a real rescan (the timer only re-reads the registry snapshot)."""
+        reg, tasks = self.ctx.registry, self.ctx.tasks
+        if reg is None:
+            self.refresh_windows()
+            return
+        exe, cls = self.ctx.cfg.exe_path, self.ctx.cfg.class_name
+        if tasks is None:
+            reg.refresh(exe, cls)
+            self.refresh_windows()
+            return
+        tasks.submit(lambda token: reg.refresh(exe, cls), name="scheduler-rescan", key="scheduler-rescan",
+                     on_done=lambda h: self.winfo_exists() and self.refresh_windows())
 
     def refresh_windows(self):
-        exe = self.ctx.cfg.exe_path
-        cls = self.ctx.cfg.class_name
-        ws = windows.list_numbered_wechat_windows(exe, cls)
+        ws = self.ctx.wechat_windows()
+        self._cmb_windows = list(ws)
         items = []
         for w in ws:
             title = w.get("title") or "(无标题)"
             items.append(f"{w['label']} | {w['hwnd']} | {title}")
+        if tuple(items) == tuple(self.cmb["values"]):
+            return
+        # keep the chosen window selected across refreshes (matched by hwnd)
+        cur = self.cmb.get().split("|")
+        hwnd = cur[1].strip() if len(cur) > 1 else None
         self.cmb["values"] = items
         if items:
-            self.cmb.current(0)
+            idx = next((i for i, w in enumerate(ws) if str(w["hwnd"]) == hwnd), 0)
+            self.cmb.current(idx)
+        else:
+            self.cmb.set("")
 
     def refresh_jobs(self):
-        for i in self.tree.get_children():
-            self.tree.delete(i)
+        jobs = self.ctx.jobs
+        rows = []
         for j in self.ctx.scheduler.list_jobs():
-            self.tree.insert("", "end", values=(j.job_id, j.interval_sec, "-", "(action)"))
+            spec = jobs.get(j.job_id) if jobs else None
+            if spec is not None:
+                values = (j.job_id, j.describe(), spec.target.get("label", "-"), spec.payload.get("text", ""))
+            else:
+                values = (j.job_id, j.describe(), "-", "(action)")
+            rows.append((j.job_id, values))
+        self.job_model.update(rows)
 
     def add_job(self):
         if not self.cmb.get():
@@ -73,30 +145,66 @@ class SchedulerTab(ttk.Frame):
             messagebox.showinfo("提示", "间隔必须是整数秒。")
             return
 
+        kind = max(0, self.cmb_trigger.current())
+        try:
+            if kind == 2:
+                trigger = CronTrigger(self.ent_cron.get())
+            elif kind == 3:
+                trigger = OneShotTrigger(at=time.time() + interval)
+            else:
+                trigger = IntervalTrigger(interval, FIXED_DELAY if kind == 1 else FIXED_RATE)
+        except ValueError as e:
+            messagebox.showinfo("提示", f"Cron 表达式无效：{e}")
+            return
+
+        try:
+            timeout = float(self.spn_timeout.get())
+        except Exception:
+            messagebox.showinfo("提示", "超时必须是数字（秒）。")
+            return
+        overlap = OVERLAP_CHOICES[max(0, self.cmb_overlap.current())][1]
+
         text = self.ent_text.get().strip()
         if not text:
             messagebox.showinfo("提示", "消息内容不能为空。")
             return
 
-        parts = [p.strip() for p in self.cmb.get().split("|")]
-        target_label = parts[0]
-        hwnd = int(parts[1])
+        idx = self.cmb.current()
+        if not 0 <= idx < len(self._cmb_windows):
+            messagebox.showinfo("提示", "请先刷新并选择目标微信窗口。")
+            return
+        w = self._cmb_windows[idx]
+        target = {"label": w["label"], "hwnd": w["hwnd"]}
+        if w.get("identity"):
+            target["identity"] = w["identity"]
+        target_label = w["label"]
 
         job_id = str(uuid.uuid4())[:8]
 
-        def action():
-            focus_and_copy(self.ctx, hwnd, text)
-            self.ctx.log.info(f"[{target_label} job {job_id}] executed.")
-
-        self.ctx.scheduler.add_or_update(Job(job_id=job_id, interval_sec=interval, action=action, enabled=True))
-        self.ctx.log.info(f"Added job {job_id} for {target_label} every {interval}s.")
+        spec = JobSpec(
+            job_id=job_id, action_type=ACTION_FOCUS_AND_COPY, trigger=trigger.to_dict(),
+            target=target, payload={"text": text},
+            overlap=overlap, timeout_sec=max(0.0, timeout),
+        )
+        if self.ctx.jobs is not None:
+            if not self.ctx.jobs.add(spec):
+                messagebox.showerror("错误", "任务添加失败，详见日志。")
+                return
+        else:
+            # same action the job manager would build: resolved per fire, logs when nothing was copied
+            action = make_focus_and_copy(self.ctx)(spec)
+            self.ctx.scheduler.add_or_update(Job(job_id=job_id, interval_sec=interval, action=action, enabled=True,
+                                                 overlap=overlap, timeout_sec=max(0.0, timeout), trigger=trigger))
+        self.ctx.log.info(f"Added job {job_id} for {target_label}: {trigger.describe()}.")
         self.refresh_jobs()
 
     def remove_job(self):
-        sel = self.tree.selection()
-        if not sel:
+        job_id = self.job_model.selected_key()
+        if job_id is None:
             return
-        job_id = self.tree.item(sel[0], "values")[0]
-        self.ctx.scheduler.remove(job_id)
+        if self.ctx.jobs is not None:
+            self.ctx.jobs.remove(job_id)
+        else:
+            self.ctx.scheduler.remove(job_id)
         self.ctx.log.info(f"Removed job {job_id}.")
         self.refresh_jobs()
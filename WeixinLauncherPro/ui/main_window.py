@@ -1,15 +1,32 @@
 import os
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
 
-from core.config import load_config, save_config
-from core.logger import Logger
+from core.config import (ensure_control_token, load_config, save_config, jobs_db_path, log_path, identities_path,
+                         snapshots_path)
+from core.logger import Logger, RotatingJsonFileSink
 from core.scheduler import Scheduler
+from core.jobstore import JobStore, JobManager
+from core.focus import FocusDispatcher
+from core.clipboard import create_clipboard
 from core.context import AppContext
 from core.plugin_api import PluginHost
 from core import windows
-from core.weixin_launcher import launch_instances
+from core.weixin_launcher import launch_tracked
+from core.watchdog import Watchdog
+from core.identity import IdentityIndex
+from core.layout import available_layouts
+from core.snapshots import AUTO_SNAPSHOT, SnapshotStore
+from core.arrange import StreamingArranger
+from core.tasks import TaskRunner
+from core.control import AppBackend, ControlServer, make_handlers
 from ui.setup_wizard import SetupWizard
+from ui.tree_model import TreeModel
+
+
+LOG_FLUSH_MS = 100
+LOG_FLUSH_BATCH = 500
 
 
 class MainWindow(tk.Tk):
@@ -22,11 +39,37 @@ class MainWindow(tk.Tk):
         self.cfg = load_config()
 
         self.txt_log = None
-        self.logger = Logger(self._append_log)
-        self.scheduler = Scheduler(self._append_log)
+        file_sink = None
+        if self.cfg.log_to_file:
+            try:
+                file_sink = RotatingJsonFileSink(log_path())
+            except OSError:
+                file_sink = None
+        self.logger = Logger(capacity=self.cfg.log_max_lines, file_sink=file_sink)
+        self.scheduler = Scheduler(self._append_log, workers=self.cfg.scheduler_workers)
         self.scheduler.start()
-
-        self.ctx = AppContext(cfg=self.cfg, log=self.logger, scheduler=self.scheduler, windows=windows)
+        self.job_store = JobStore(jobs_db_path())
+        self.jobs = JobManager(self.scheduler, self.job_store, self._append_log)
+
+        self.identities = IdentityIndex(identities_path())
+        self.snapshots = SnapshotStore(snapshots_path())
+        self.registry = windows.create_registry(self.cfg.exe_path, self.cfg.class_name, self.identities.number)
+        self.identities.on_account = self.registry.republish  # accounts are probed off the event thread
+        self.registry.start()
+        self.focuser = FocusDispatcher(windows.focus, min_dwell_ms=self.cfg.focus_dwell_ms, on_log=self._append_log)
+        self.focuser.start()
+        self.clipboard_service = create_clipboard(self)
+        self.tasks = TaskRunner(workers=2, on_log=self._append_log)
+        self.tasks.attach(self)
+        self._launch_task = None
+        self.watchdog = Watchdog(self._relaunch_one, windows.set_rect, on_recovered=self._on_recovered,
+                                 loop_max=self.cfg.watchdog_max_restarts, on_log=self._append_log)
+        self.watchdog.start()
+
+        self.ctx = AppContext(cfg=self.cfg, log=self.logger, scheduler=self.scheduler, windows=windows,
+                              registry=self.registry, jobs=self.jobs, focus=self.focuser,
+                              clipboard=self.clipboard_service, tasks=self.tasks, watchdog=self.watchdog,
+                              identities=self.identities, snapshots=self.snapshots)
 
         # first-run wizard if needed
         self.withdraw()
@@ -43,21 +86,49 @@ class MainWindow(tk.Tk):
         self.host.load_all(self.notebook)
         self.host.start_all()
 
+        self.control = None
+        if self.cfg.control_enabled:
+            try:
+                self.control = ControlServer(make_handlers(AppBackend(self.ctx)), port=self.cfg.control_port,
+                                             token=ensure_control_token(self.cfg), on_log=self._append_log)
+                self.control.start()
+            except OSError as e:
+                self.logger.error(f"Control server not started: {e}")
+                self.control = None
+
+        t0 = time.perf_counter()
+        n_jobs = self.jobs.restore()
+        self.logger.info(f"Restored {n_jobs} job(s) in {(time.perf_counter() - t0) * 1000:.0f} ms.")
+        if self.cfg.snapshot_on_start and self.snapshots.get(self.cfg.snapshot_on_start):
+            self._restore_snapshot(self.cfg.snapshot_on_start)
+
         self._append_log("Ready.")
 
     def _ensure_config_ready(self) -> bool:
         exe_ok = bool(self.cfg.exe_path) and os.path.exists(self.cfg.exe_path)
         if (not exe_ok) or (self.cfg.base_rect is None):
-            wiz = SetupWizard(self, self.cfg)
+            wiz = SetupWizard(self, self.cfg, self.registry, self.tasks)
             self.wait_window(wiz)
             return bool(getattr(wiz, "result_ok", False))
         return True
 
     def _append_log(self, msg: str):
+        # safe from any thread: only queues the line; _flush_log renders it
+        self.logger.info(msg)
+
+    def _flush_log(self):
         if not self.txt_log:
             return
-        self.txt_log.insert("end", msg + "\n")
-        self.txt_log.see("end")
+        recs = self.logger.drain(LOG_FLUSH_BATCH)
+        if recs:
+            self.txt_log.insert("end", "\n".join(r.line() for r in recs) + "\n")
+            lines = int(self.txt_log.index("end-1c").split(".")[0]) - 1
+            excess = lines - self.cfg.log_max_lines
+            if excess > 0:
+                self.txt_log.delete("1.0", f"{excess + 1}.0")
+            self.txt_log.see("end")
+        # come back quickly while a burst is still queued
+        self.after(LOG_FLUSH_MS if len(recs) < LOG_FLUSH_BATCH else 1, self._flush_log)
 
     def _build_ui(self):
         root = ttk.Frame(self)
@@ -79,6 +150,9 @@ class MainWindow(tk.Tk):
         self.var_layout = tk.StringVar(value=self.cfg.layout)
         self.var_dx = tk.IntVar(value=self.cfg.cascade_dx)
         self.var_dy = tk.IntVar(value=self.cfg.cascade_dy)
+        self.var_all_monitors = tk.BooleanVar(value=self.cfg.layout_all_monitors)
+        self.var_stream = tk.BooleanVar(value=self.cfg.stream_arrange)
+        self.var_watchdog = tk.BooleanVar(value=self.cfg.watchdog_enabled)
 
         ttk.Label(frm, text="WeiXin.exe：").grid(row=0, column=0, sticky="w", padx=8, pady=6)
         ttk.Entry(frm, textvariable=self.var_exe, width=70).grid(row=0, column=1, sticky="w", padx=8, pady=6)
@@ -95,15 +169,32 @@ class MainWindow(tk.Tk):
         ttk.Spinbox(frm, from_=100, to=3000, increment=100, textvariable=self.var_delay, width=10).grid(row=2, column=3, sticky="w", padx=8, pady=6)
 
         ttk.Label(frm, text="布局：").grid(row=3, column=0, sticky="w", padx=8, pady=6)
-        ttk.Radiobutton(frm, text="层叠", variable=self.var_layout, value="cascade").grid(row=3, column=1, sticky="w", padx=8, pady=6)
-        ttk.Radiobutton(frm, text="平铺", variable=self.var_layout, value="tile").grid(row=3, column=2, sticky="w", padx=8, pady=6)
+        lay = ttk.Frame(frm)
+        lay.grid(row=3, column=1, sticky="w", padx=8, pady=6)
+        # strategies come from core.layout; plugins may register more after startup
+        self.cmb_layout = ttk.Combobox(lay, state="readonly", width=12, postcommand=self._refresh_layouts)
+        self.cmb_layout.pack(side="left")
+        self.cmb_layout.bind("<<ComboboxSelected>>", self._on_layout_selected)
+        self._refresh_layouts()
+        ttk.Checkbutton(lay, text="跨所有显示器", variable=self.var_all_monitors).pack(side="left", padx=(12, 0))
 
         ttk.Label(frm, text="层叠偏移 dx/dy：").grid(row=3, column=3, sticky="e", padx=8, pady=6)
         ttk.Spinbox(frm, from_=0, to=200, textvariable=self.var_dx, width=6).grid(row=3, column=4, sticky="w", padx=(0,4), pady=6)
         ttk.Spinbox(frm, from_=0, to=200, textvariable=self.var_dy, width=6).grid(row=3, column=5, sticky="w", padx=4, pady=6)
 
-        ttk.Button(frm, text="启动并摆放（基于已保存位置）", command=self.launch_and_arrange).grid(
-            row=4, column=1, sticky="w", padx=8, pady=10
+        self.btn_launch = ttk.Button(frm, text="启动并摆放（基于已保存位置）", command=self.launch_and_arrange)
+        self.btn_launch.grid(row=4, column=1, sticky="w", padx=8, pady=10)
+        ttk.Checkbutton(frm, text="流式摆放（窗口出现即摆放）", variable=self.var_stream).grid(
+            row=4, column=2, columnspan=2, sticky="w", padx=8, pady=10
+        )
+        self.btn_cancel = ttk.Button(frm, text="取消", command=self.cancel_launch, state="disabled")
+        self.btn_cancel.grid(row=4, column=4, sticky="w", padx=8, pady=10)
+        self.var_progress = tk.StringVar(value="")
+        self.prog_launch = ttk.Progressbar(frm, length=160, mode="determinate")
+        self.prog_launch.grid(row=5, column=1, sticky="w", padx=8, pady=(0, 6))
+        ttk.Label(frm, textvariable=self.var_progress).grid(row=5, column=2, columnspan=2, sticky="w", padx=8, pady=(0, 6))
+        ttk.Checkbutton(frm, text="退出后自动重启", variable=self.var_watchdog, command=self._toggle_watchdog).grid(
+            row=5, column=4, columnspan=2, sticky="w", padx=8, pady=(0, 6)
         )
 
         # Windows list panel
@@ -115,23 +206,48 @@ class MainWindow(tk.Tk):
         ttk.Button(bar, text="刷新窗口列表", command=self.refresh_windows).pack(side="left")
         ttk.Button(bar, text="聚焦选中窗口", command=self.focus_selected).pack(side="left", padx=8)
         ttk.Button(bar, text="设为基准位置并保存", command=self.set_selected_as_base).pack(side="left", padx=8)
+        ttk.Button(bar, text="全部最小化", command=lambda: self._group(windows.minimize_windows)).pack(side="left", padx=(24, 4))
+        ttk.Button(bar, text="全部还原", command=lambda: self._group(windows.restore_windows)).pack(side="left", padx=4)
+        ttk.Button(bar, text="全部置前", command=lambda: self._group(windows.raise_windows)).pack(side="left", padx=4)
+
+        sbar = ttk.Frame(wpanel)
+        sbar.pack(fill="x", padx=8, pady=(0, 6))
+        ttk.Label(sbar, text="布局快照：").pack(side="left")
+        self.var_snapshot = tk.StringVar()
+        self.cmb_snapshot = ttk.Combobox(sbar, textvariable=self.var_snapshot, state="readonly", width=18,
+                                         postcommand=self._refresh_snapshots)
+        self.cmb_snapshot.pack(side="left")
+        self.cmb_snapshot.bind("<<ComboboxSelected>>", lambda _e: self._sync_snapshot_start())
+        ttk.Button(sbar, text="应用", command=lambda: self._restore_snapshot(self.var_snapshot.get())).pack(
+            side="left", padx=(8, 4))
+        ttk.Button(sbar, text="保存当前布局为…", command=self._save_snapshot).pack(side="left", padx=4)
+        ttk.Button(sbar, text="删除", command=self._delete_snapshot).pack(side="left", padx=4)
+        self.var_snapshot_start = tk.BooleanVar(value=False)
+        ttk.Checkbutton(sbar, text="启动时恢复此快照", variable=self.var_snapshot_start,
+                        command=self._toggle_snapshot_start).pack(side="left", padx=(16, 0))
+        self._refresh_snapshots()
 
         self.tree = ttk.Treeview(wpanel, columns=("idx","hwnd","title","class"), show="headings", height=10)
         for c, t, w in [("idx","编号",70), ("hwnd","HWND",120), ("title","标题",520), ("class","ClassName",180)]:
             self.tree.heading(c, text=t)
             self.tree.column(c, width=w, anchor="w")
         self.tree.pack(fill="both", expand=True, padx=8, pady=8)
+        self.win_model = TreeModel(self.tree)
+        self._shown_version = -1
 
         # Log
         logf = ttk.LabelFrame(tab_base, text="日志")
         logf.pack(fill="both", expand=True, padx=10, pady=(0, 10))
         self.txt_log = tk.Text(logf, height=10, wrap="word")
         self.txt_log.pack(fill="both", expand=True, padx=8, pady=8)
+        self.after(LOG_FLUSH_MS, self._flush_log)
 
         self.refresh_windows()
+        if self.cfg.auto_refresh_ms > 0:
+            self.after(self.cfg.auto_refresh_ms, self._auto_refresh)
 
     def _open_wizard(self):
-        wiz = SetupWizard(self, self.cfg)
+        wiz = SetupWizard(self, self.cfg, self.registry, self.tasks)
         self.wait_window(wiz)
         if getattr(wiz, "result_ok", False):
             # reload cfg and refresh UI vars
@@ -140,9 +256,22 @@ class MainWindow(tk.Tk):
             self.var_exe.set(self.cfg.exe_path)
             self.var_class.set(self.cfg.class_name)
             self.var_layout.set(self.cfg.layout)
+            self._refresh_layouts()
             self.refresh_windows()
             self.logger.info("Setup wizard completed and configuration reloaded.")
 
+    def _refresh_layouts(self):
+        self._layouts = available_layouts()
+        self.cmb_layout["values"] = [title for _name, title in self._layouts]
+        names = [name for name, _title in self._layouts]
+        cur = self.var_layout.get()
+        self.cmb_layout.current(names.index(cur) if cur in names else names.index("cascade"))
+
+    def _on_layout_selected(self, _evt=None):
+        i = self.cmb_layout.current()
+        if 0 <= i < len(self._layouts):
+            self.var_layout.set(self._layouts[i][0])
+
     def _browse_exe(self):
         p = filedialog.askopenfilename(
             title="选择 WeiXin.exe",
@@ -158,35 +287,127 @@ class MainWindow(tk.Tk):
         self.cfg.layout = self.var_layout.get()
         self.cfg.cascade_dx = int(self.var_dx.get())
         self.cfg.cascade_dy = int(self.var_dy.get())
+        self.cfg.layout_all_monitors = bool(self.var_all_monitors.get())
+        self.cfg.stream_arrange = bool(self.var_stream.get())
+        self.cfg.watchdog_enabled = bool(self.var_watchdog.get())
         save_config(self.cfg)
 
     def refresh_windows(self):
         exe = self.var_exe.get().strip()
         cls = self.var_class.get().strip()
-        for i in self.tree.get_children():
-            self.tree.delete(i)
         if not exe or not os.path.exists(exe):
+            self.win_model.clear()
+            self._shown_version = -1
             return
-        ws = windows.list_numbered_wechat_windows(exe, cls)
-        for w in ws:
-            self.tree.insert("", "end", values=(w["label"], w["hwnd"], w.get("title") or "", w.get("class") or ""))
+        # an explicit refresh always rescans; keep that off the Tk thread
+        self.tasks.submit(lambda token: self.registry.refresh(exe, cls), name="refresh",
+                          on_done=lambda h: self._render_windows())
+
+    def _render_windows(self):
+        self._shown_version = self.registry.version
+        self.win_model.update(
+            (w["hwnd"], (w["label"], w["hwnd"], w.get("title") or "", w.get("class") or ""))
+            for w in self.registry.snapshot()
+        )
+
+    def _auto_refresh(self):
+        # the registry bumps its version on every change; unchanged lists cost one int compare
+        if self._shown_version != -1 and self.registry.version != self._shown_version:
+            self._render_windows()
+        self.after(self.cfg.auto_refresh_ms, self._auto_refresh)
 
     def _selected_hwnd(self):
-        sel = self.tree.selection()
-        if not sel:
-            return None
-        vals = self.tree.item(sel[0], "values")
-        return int(vals[1])
+        return self.win_model.selected_key()
 
     def focus_selected(self):
         hwnd = self._selected_hwnd()
         if hwnd is None:
             messagebox.showinfo("提示", "请先选择一个窗口。")
             return
+        fut = self.focuser.submit(hwnd)
+
+        def done(f):
+            if not f.cancelled() and f.exception() is not None:
+                self.logger.error(f"focus {hwnd} failed: {f.exception()}")
+        fut.add_done_callback(done)
+
+    def _group(self, op):
+        """Run a group show/raise op on every listed window (the selected ones, if any are selected)."""
+        hwnds = [int(k) for k in self.win_model.selected_keys()] or [w["hwnd"] for w in self.registry.snapshot()]
+        if not hwnds:
+            return
         try:
-            windows.focus(hwnd)
+            op(hwnds)
         except Exception as e:
-            messagebox.showerror("错误", str(e))
+            self.logger.error(f"Window group operation failed: {e}")
+
+    def _refresh_snapshots(self):
+        names = self.snapshots.names()
+        self.cmb_snapshot["values"] = names
+        if self.var_snapshot.get() not in names:
+            pick = self.cfg.snapshot_on_start if self.cfg.snapshot_on_start in names else (names[0] if names else "")
+            self.var_snapshot.set(pick)
+        self._sync_snapshot_start()
+
+    def _sync_snapshot_start(self):
+        name = self.var_snapshot.get()
+        self.var_snapshot_start.set(bool(name) and name == self.cfg.snapshot_on_start)
+
+    def _toggle_snapshot_start(self):
+        name = self.var_snapshot.get()
+        if self.var_snapshot_start.get() and not name:
+            self.var_snapshot_start.set(False)
+            return
+        self.cfg.snapshot_on_start = name if self.var_snapshot_start.get() else ""
+        self._persist_cfg()
+
+    def _save_snapshot(self):
+        name = simpledialog.askstring("保存布局快照", "快照名称（如 工作 / 监控）：",
+                                      initialvalue=self.var_snapshot.get(), parent=self)
+        name = (name or "").strip()
+        if not name:
+            return
+        try:
+            snap = windows.save_snapshot(self.snapshots, name, list(self.registry.snapshot()))
+            self.snapshots.save()
+        except Exception as e:
+            self.logger.error(f"Saving layout snapshot {name!r} failed: {e}")
+            return
+        self.var_snapshot.set(name)
+        self._refresh_snapshots()
+        self.logger.info(f"Saved layout snapshot {name!r}: {len(snap.entries)} window(s).")
+
+    def _restore_snapshot(self, name: str):
+        if not name:
+            messagebox.showinfo("提示", "请先选择一个布局快照。")
+            return
+        try:
+            res = windows.restore_snapshot(self.snapshots, name, self.identities.hwnd_of)
+        except Exception as e:
+            self.logger.error(f"Restoring layout snapshot {name!r} failed: {e}")
+            return
+        msg = (f"Restored layout snapshot {name!r} in {res.elapsed * 1000:.1f} ms: {res.applied.moved} moved, "
+               f"{res.applied.unchanged} already in place, {res.minimized} minimized, {res.maximized} maximized")
+        if res.remapped:
+            msg += f", {res.remapped} moved off a detached monitor"
+        if res.missing:
+            msg += f"; not running: {', '.join(res.missing)}"
+        self.logger.info(msg + ".")
+
+    def _delete_snapshot(self):
+        name = self.var_snapshot.get()
+        if not name or not messagebox.askyesno("确认", f"删除布局快照“{name}”？"):
+            return
+        self.snapshots.delete(name)
+        try:
+            self.snapshots.save()
+        except OSError as e:
+            self.logger.error(f"Saving layout snapshots failed: {e}")
+        if self.cfg.snapshot_on_start == name:
+            self.cfg.snapshot_on_start = ""
+            self._persist_cfg()
+        self.var_snapshot.set("")
+        self._refresh_snapshots()
 
     def set_selected_as_base(self):
         hwnd = self._selected_hwnd()
@@ -197,7 +418,13 @@ class MainWindow(tk.Tk):
         self._persist_cfg()
         self.logger.info(f"Saved base rect: {self.cfg.base_rect}")
 
+    def _layout_rects(self, count: int):
+        return windows.layout_rects(self.cfg, count)
+
     def launch_and_arrange(self):
+        if self.tasks.busy("launch"):
+            messagebox.showinfo("提示", "正在启动中，请稍候或先取消。")
+            return
         self._persist_cfg()
         if not self.cfg.base_rect:
             messagebox.showinfo("提示", "还没有保存基准位置。请先选择一个窗口并“设为基准位置并保存”。")
@@ -205,39 +432,164 @@ class MainWindow(tk.Tk):
 
         n = int(self.var_n.get())
         delay = int(self.var_delay.get())
-        exe = self.cfg.exe_path
-        cls = self.cfg.class_name
-
-        self.logger.info(f"Launching {n} instance(s)...")
-        launch_instances(exe, n, delay)
+        self.btn_launch.configure(state="disabled")
+        self.btn_cancel.configure(state="normal")
+        self._on_launch_progress(0, n, "")
+        self._launch_task = self.tasks.submit(
+            lambda token: self._launch_and_arrange_bg(token, n, delay, self.cfg.exe_path, self.cfg.class_name),
+            key="launch", on_done=self._on_launch_done, on_progress=self._on_launch_progress,
+        )
 
-        self.logger.info("Scanning windows...")
-        ws = windows.list_numbered_wechat_windows(exe, cls)
-        targets = ws[:n]
-        if not targets:
+    def cancel_launch(self):
+        if self._launch_task is not None and not self._launch_task.done():
+            self._launch_task.cancel()
+            self.logger.warn("Launch cancelled; instances already started keep running.")
+
+    def _on_launch_progress(self, done: int, total: int, msg: str):
+        self.prog_launch.configure(maximum=max(1, total), value=done)
+        self.var_progress.set(f"{done}/{total} {msg}".strip())
+
+    def _on_launch_done(self, h):
+        self.btn_launch.configure(state="normal")
+        self.btn_cancel.configure(state="disabled")
+        self._launch_task = None
+        err = h.error()
+        if err is not None:
+            self.logger.error(f"Launch failed: {err}")
+            messagebox.showerror("错误", str(err))
+        elif not h.cancelled and h.result() == "no_windows":
             messagebox.showinfo("提示", "未扫描到窗口。")
-            return
-
-        if self.cfg.layout == "tile":
-            rects = windows.layout_tile(self.cfg.base_rect, len(targets))
-        else:
-            rects = windows.layout_cascade(self.cfg.base_rect, len(targets), self.cfg.cascade_dx, self.cfg.cascade_dy)
-
-        for i, (w, r) in enumerate(zip(targets, rects), start=1):
-            windows.set_rect(w["hwnd"], r)
-            self.logger.info(f"[微信{i}] moved: {w.get('title','')} -> {r}")
+        self.var_progress.set("已取消" if h.cancelled else "完成")
+        self._render_windows()
 
-        self.refresh_windows()
+    def _toggle_watchdog(self):
+        self.cfg.watchdog_enabled = bool(self.var_watchdog.get())
+        save_config(self.cfg)
+        if not self.cfg.watchdog_enabled:
+            self.watchdog.clear()
+
+    def _relaunch_one(self):
+        """Watchdog thread: start one instance with the current settings and wait for its window."""
+        list_windows = self.registry.snapshot if self.registry.is_live() else self.registry.reconcile
+        return launch_tracked(self.cfg.exe_path, 1, list_windows, timeout_ms=self.cfg.launch_timeout_ms)[0]
+
+    def _on_recovered(self, rec):
+        if rec.old_hwnd is not None:
+            moved = self.jobs.remap_target(rec.old_hwnd, rec.new_hwnd)
+            if moved:
+                self.logger.info(f"[Watchdog] {len(moved)} job(s) now target hwnd={rec.new_hwnd}.")
+
+    def _watch(self, results, slot_of, rects):
+        if self.cfg.watchdog_enabled:
+            self.watchdog.track_launch(results, slot_of, rects)
+
+    def _launch_and_arrange_bg(self, token, n: int, delay: int, exe: str, cls: str):
+        """Worker-thread body of launch_and_arrange: no Tk calls, UI updates go through token.progress."""
+        self.registry.configure(exe, cls)
+        live = self.registry.is_live()
+        list_windows = self.registry.snapshot if live else self.registry.reconcile
+
+        arranger = None
+        if self.cfg.stream_arrange:
+            stream_rects = self._layout_rects(n)
+            arranger = StreamingArranger(stream_rects, windows.set_rects)
+
+        ready = [0]
+
+        def on_result(r):
+            ready[0] += 1
+            token.progress(ready[0], n, "启动中")
+            if arranger and r.ok:
+                arranger.submit(r.index - 1, r.hwnd)
+
+        t0 = time.monotonic()
+        self.logger.info(f"Launching {n} instance(s)...")
+        results = launch_tracked(
+            exe, n, list_windows,
+            timeout_ms=self.cfg.launch_timeout_ms,
+            max_inflight=self.cfg.launch_concurrency,
+            max_gap_ms=delay,
+            poll_ms=50 if live else 250,
+            on_result=on_result,
+            should_stop=lambda: token.cancelled,
+            on_tick=arranger.tick if arranger else None,
+        )
+        for r in results:
+            if r.ok:
+                self.logger.info(f"[launch {r.index}] pid={r.pid} hwnd={r.hwnd} ready in {r.time_to_window:.2f}s")
+            else:
+                self.logger.warn(f"[launch {r.index}] pid={r.pid} failed: {r.error}")
+
+        if arranger:
+            arranger.flush()
+            for p in arranger.report():
+                if p["placed_at"] is not None:
+                    self.logger.info(f"[slot {p['slot']}] hwnd={p['hwnd']} placed at +{p['placed_at']:.2f}s -> {p['rect']}")
+            self.logger.info(f"Streaming arrange done in {time.monotonic() - t0:.2f}s ({arranger.batches} batch(es)).")
+            self._watch(results, {p["hwnd"]: p["slot"] - 1 for p in arranger.report() if p["placed_at"] is not None},
+                        stream_rects)
+            return "ok"
+        token.check()
+
+        # arrange the windows this launch produced, not whichever come first in label order
+        targets = [r.hwnd for r in results if r.ok]
+        if not targets:
+            return "no_windows"
+        ws = self.registry.snapshot()
+        if not set(targets) <= {w["hwnd"] for w in ws}:
+            # events may lag behind a burst of launches; fall back to one full rescan
+            self.logger.info("Scanning windows...")
+            ws = self.registry.reconcile()
+        labels = {w["hwnd"]: w["label"] for w in ws}
+
+        rects = self._layout_rects(len(targets))
+        token.check()
+        res = windows.set_rects(list(zip(targets, rects)))
+        token.progress(len(targets), len(targets), "摆放中")
+        for hwnd, r in zip(targets, rects):
+            self.logger.info(f"[{labels.get(hwnd, f'hwnd={hwnd}')}] -> {r}")
+        self.logger.info(f"Arranged {len(targets)} window(s) at +{time.monotonic() - t0:.2f}s: {res.moved} moved, "
+                         f"{res.unchanged} already in place, {res.restored} restored.")
+        self._watch(results, {hwnd: i for i, hwnd in enumerate(targets)}, rects)
+        return "ok"
 
     def on_close(self):
+        self.watchdog.stop()
+        if self.cfg.snapshot_autosave and self.registry.snapshot():
+            try:
+                windows.save_snapshot(self.snapshots, AUTO_SNAPSHOT, list(self.registry.snapshot()))
+                self.snapshots.save()
+            except Exception as e:
+                self.logger.error(f"Saving the exit layout snapshot failed: {e}")
+        self.tasks.shutdown()
+        if self.control is not None:
+            self.control.stop()
         try:
             self.host.stop_all()
         except Exception:
             pass
+        try:
+            self.jobs.checkpoint()
+            self.job_store.close()
+        except Exception:
+            pass
         try:
             self.scheduler.stop()
         except Exception:
             pass
+        try:
+            self.focuser.stop()
+        except Exception:
+            pass
+        try:
+            self.registry.stop()
+        except Exception:
+            pass
+        try:
+            self.identities.save()
+        except OSError:
+            pass
+        self.logger.close()
         self.destroy()
 
 
@@ -1,20 +1,27 @@
 import os
 import tkinter as tk
+from typing import Optional
 from tkinter import ttk, messagebox, filedialog
 
 from core.config import AppConfig, save_config
+from core.registry import WindowRegistry
+from core.tasks import TaskRunner
 from core import windows
+from ui.tree_model import TreeModel
 
 
 class SetupWizard(tk.Toplevel):
     """First-run setup wizard: choose WeiXin.exe and pick a base window rect."""
 
-    def __init__(self, master, cfg: AppConfig):
+    def __init__(self, master, cfg: AppConfig, registry: Optional[WindowRegistry] = None,
+                 tasks: Optional[TaskRunner] = None):
         super().__init__(master)
         self.title("首次定位向导")
         self.geometry("760x520")
         self.resizable(False, False)
         self.cfg = cfg
+        self.registry = registry
+        self.tasks = tasks
         self.result_ok = False
 
         self.var_exe = tk.StringVar(value=cfg.exe_path)
@@ -66,6 +73,7 @@ class SetupWizard(tk.Toplevel):
             self.tree.heading(c, text=t)
             self.tree.column(c, width=w, anchor="w")
         self.tree.pack(fill="both", expand=True, padx=8, pady=8)
+        self.model = TreeModel(self.tree)
 
         tip = ttk.Label(g2, text="选择一个窗口后点击“设为基准并保存”。")
         tip.pack(anchor="w", padx=8, pady=(0, 8))
@@ -101,20 +109,32 @@ class SetupWizard(tk.Toplevel):
     def _refresh(self):
         exe = self.var_exe.get().strip()
         cls = self.var_class.get().strip()
-        for i in self.tree.get_children():
-            self.tree.delete(i)
         if not exe:
+            self.model.clear()
             return
-        ws = windows.list_numbered_wechat_windows(exe, cls)
-        for w in ws:
-            self.tree.insert("", "end", values=(w["label"], w["hwnd"], w.get("title") or "", w.get("class") or ""))
+        if self.tasks is None:
+            self._show(self._scan(exe, cls))
+            return
+        self.tasks.submit(lambda token: self._scan(exe, cls), name="wizard-scan", on_done=self._on_scanned)
+
+    def _scan(self, exe: str, cls: str):
+        if self.registry is not None:
+            return self.registry.refresh(exe, cls)
+        return windows.list_numbered_wechat_windows(exe, cls)
+
+    def _on_scanned(self, h):
+        if not self.winfo_exists():
+            return
+        if h.error() is not None:
+            messagebox.showerror("错误", f"扫描失败：{h.error()}", parent=self)
+            return
+        self._show(h.result())
+
+    def _show(self, ws):
+        self.model.update((w["hwnd"], (w["label"], w["hwnd"], w.get("title") or "", w.get("class") or "")) for w in ws)
 
     def _get_selected_hwnd(self):
-        sel = self.tree.selection()
-        if not sel:
-            return None
-        vals = self.tree.item(sel[0], "values")
-        return int(vals[1])
+        return self.model.selected_key()
 
     def _fill_class(self):
         hwnd = self._get_selected_hwnd()
@@ -122,9 +142,7 @@ class SetupWizard(tk.Toplevel):
             messagebox.showinfo("提示", "请先选择一个窗口。")
             return
         # class name is in the list already; we can read it:
-        sel = self.tree.selection()[0]
-        vals = self.tree.item(sel, "values")
-        cls = vals[3]
+        cls = self.model.values(hwnd)[3]
         if cls:
             self.var_class.set(cls)
 
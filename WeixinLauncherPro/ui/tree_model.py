@@ -0,0 +1,74 @@
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+Row = Tuple[Hashable, Sequence]
+
+
+class TreeModel:
+    """Keyed rows for a flat ttk.Treeview, updated by diff instead of clear + reinsert.
+
+    Each row's iid is derived from its key (hwnd, job_id, ...), so update()
+    only issues delete/insert/item/move calls for rows that actually changed
+    and the widget keeps its selection, focus and scroll position. Works with
+    any object exposing the Treeview methods it uses.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._rows: Dict[str, Tuple] = {}
+        self._keys: Dict[str, Hashable] = {}
+        self._order: List[str] = []
+        self.last_diff = (0, 0, 0, 0)  # inserted, removed, changed, moved
+
+    def update(self, rows: Iterable[Row]) -> Tuple[int, int, int, int]:
+        new_order: List[str] = []
+        new_rows: Dict[str, Tuple] = {}
+        keys: Dict[str, Hashable] = {}
+        for key, values in rows:
+            iid = str(key)
+            if iid in new_rows:
+                continue
+            new_order.append(iid)
+            new_rows[iid] = tuple(values)
+            keys[iid] = key
+
+        gone = [iid for iid in self._order if iid not in new_rows]
+        if gone:
+            self.tree.delete(*gone)
+        kept = [iid for iid in self._order if iid in new_rows]
+
+        inserted = changed = moved = 0
+        # inserts land at the right index as long as surviving rows keep their relative order
+        reorder = kept != [iid for iid in new_order if iid in self._rows]
+        for pos, iid in enumerate(new_order):
+            values = new_rows[iid]
+            old = self._rows.get(iid)
+            if old is None:
+                self.tree.insert("", pos, iid=iid, values=values)
+                inserted += 1
+                continue
+            if old != values:
+                self.tree.item(iid, values=values)
+                changed += 1
+            if reorder:
+                self.tree.move(iid, "", pos)
+                moved += 1
+
+        self._rows, self._keys, self._order = new_rows, keys, new_order
+        self.last_diff = (inserted, len(gone), changed, moved)
+        return self.last_diff
+
+    def clear(self):
+        self.update(())
+
+    def selected_keys(self) -> List[Hashable]:
+        return [self._keys[iid] for iid in self.tree.selection() if iid in self._keys]
+
+    def selected_key(self) -> Optional[Hashable]:
+        keys = self.selected_keys()
+        return keys[0] if keys else None
+
+    def values(self, key: Hashable) -> Optional[Tuple]:
+        return self._rows.get(str(key))
+
+    def __len__(self):
+        return len(self._order)